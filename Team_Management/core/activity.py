@@ -0,0 +1,113 @@
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .events import activity_event, send_events
+from .models import Activity
+
+# Marks "attribute to whoever is making the current request"
+CURRENT_ACTOR = object()
+
+
+class ActivityBuffer:
+    """
+    Collect Activity rows in memory and write them with one bulk INSERT.
+
+    Rows recorded inside an atomic block are held per savepoint and released
+    by an ``on_commit`` hook, so rolling back drops the activity of the work
+    it undid. Released rows, and rows recorded outside a transaction, wait
+    in the request buffer while a request is being served (see
+    core.middleware.ActivityMiddleware) and are written straight away
+    anywhere else.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _batches(self) -> dict:
+        if not hasattr(self._local, 'batches'):
+            self._local.batches = {}
+        return self._local.batches
+
+    def add(self, activity: Activity, using: str = DEFAULT_DB_ALIAS) -> None:
+        connection = connections[using]
+        if not connection.in_atomic_block:
+            self._release([activity], using)
+            return
+
+        batches = self._batches()
+        scope = (using, tuple(connection.savepoint_ids))
+        entry = batches.get(scope)
+        if entry is None or not self._is_registered(connection, entry[1]):
+            self._prune(batches)
+            pending = []
+            callback = partial(self._flush, scope, pending)
+            batches[scope] = (pending, callback)
+            transaction.on_commit(callback, using=using)
+        batches[scope][0].append(activity)
+
+    def _flush(self, scope, pending) -> None:
+        batches = self._batches()
+        if scope in batches and batches[scope][0] is pending:
+            del batches[scope]
+        self._release(pending, scope[0])
+
+    def _release(self, rows, using) -> None:
+        held = getattr(self._local, 'held', None)
+        if held is None:
+            self.write(rows, using)
+        else:
+            held.setdefault(using, []).extend(rows)
+
+    @staticmethod
+    def write(rows, using) -> None:
+        if rows:
+            Activity.objects.using(using).bulk_create(rows)
+            send_events([activity_event(activity) for activity in rows], using)
+
+    @contextmanager
+    def hold(self, request=None):
+        """
+        Hold committed activity until the block exits and write it then, one
+        INSERT per database. Activity recorded without an explicit actor is
+        attributed to the user of ``request``.
+        """
+        outer = getattr(self._local, 'held', None), getattr(self._local, 'request', None)
+        self._local.held, self._local.request = {}, request
+        try:
+            yield
+        finally:
+            held = self._local.held
+            self._local.held, self._local.request = outer
+            for using, rows in held.items():
+                self._release(rows, using)
+
+    def current_actor_id(self):
+        user = getattr(getattr(self._local, 'request', None), 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    @staticmethod
+    def _is_registered(connection, callback) -> bool:
+        return any(entry[1] is callback for entry in connection.run_on_commit)
+
+    def _prune(self, batches) -> None:
+        # Batches whose hook was discarded by a rollback will never flush
+        for scope, (_, callback) in list(batches.items()):
+            if not self._is_registered(connections[scope[0]], callback):
+                del batches[scope]
+
+
+activity_buffer = ActivityBuffer()
+
+
+def record_activity(verb: str, project_id, task_id=None, actor_id=CURRENT_ACTOR,
+                    using: str = DEFAULT_DB_ALIAS, **data) -> None:
+    """Buffer one Activity; ``data`` holds what the feed displays."""
+    if actor_id is CURRENT_ACTOR:
+        actor_id = activity_buffer.current_actor_id()
+    activity_buffer.add(
+        Activity(verb=verb, project_id=project_id, task_id=task_id, actor_id=actor_id, data=data),
+        using=using,
+    )
@@ -2,11 +2,42 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import (
     User, Project, ProjectMember, Task, TaskAttachment, 
-    TaskComment, Team, TeamMember
+    TaskComment, Team, TeamMember, Tag
 )
+from .permissions import can_manage_project, get_project_roles, is_admin
 
 # Register your models here.
 
+class ProjectRoleAdminMixin:
+    """
+    Staff accounts that are not admins only see objects of their own projects
+    and only change those of projects they manage, checked against the cached
+    project role map instead of a membership query per row.
+    """
+    # Field on the model holding the project id: 'pk' for Project, 'project_id' otherwise
+    project_field = 'project_id'
+
+    def has_full_access(self, request) -> bool:
+        return request.user.is_superuser or is_admin(request.user)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.has_full_access(request):
+            return queryset
+        return queryset.filter(**{f'{self.project_field}__in': list(get_project_roles(request.user))})
+
+    def can_manage(self, request, obj) -> bool:
+        return obj is None or self.has_full_access(request) or can_manage_project(
+            request.user, getattr(obj, self.project_field)
+        )
+
+    def has_change_permission(self, request, obj=None):
+        return super().has_change_permission(request, obj) and self.can_manage(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return super().has_delete_permission(request, obj) and self.can_manage(request, obj)
+
+
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'role', 'is_active', 'date_joined')
@@ -24,12 +55,17 @@ class CustomUserAdmin(UserAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(ProjectRoleAdminMixin, admin.ModelAdmin):
+    project_field = 'pk'
     list_display = ('title', 'owner', 'status', 'priority', 'start_date', 'end_date', 'progress', 'is_overdue')
     list_filter = ('status', 'priority', 'start_date', 'end_date')
     search_fields = ('title', 'description', 'owner__username')
     ordering = ('-created_at',)
-    readonly_fields = ('progress', 'is_overdue', 'created_at', 'updated_at')
+    list_select_related = ('owner',)
+    readonly_fields = (
+        'progress', 'is_overdue', 'todo_task_count', 'in_progress_task_count', 'review_task_count',
+        'completed_task_count', 'cancelled_task_count', 'created_at', 'updated_at',
+    )
 
     fieldsets = (
         ('Basic Information', {
@@ -42,6 +78,11 @@ class ProjectAdmin(admin.ModelAdmin):
             'fields': ('start_date', 'end_date', 'budget')
         }),
 
+        ('Task Counters', {
+            'fields': ('todo_task_count', 'in_progress_task_count', 'review_task_count',
+                       'completed_task_count', 'cancelled_task_count'),
+            'classes': ('collapse',)
+        }),
         ('Metadata', {
             'fields': ('progress', 'is_overdue', 'created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -49,7 +90,7 @@ class ProjectAdmin(admin.ModelAdmin):
     )
 
 @admin.register(ProjectMember)
-class ProjectMemberAdmin(admin.ModelAdmin):
+class ProjectMemberAdmin(ProjectRoleAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'project', 'role', 'joined_at', 'is_active')
     list_filter = ('role', 'is_active', 'joined_at')
     search_fields = ('user__username', 'project__title')
@@ -57,7 +98,7 @@ class ProjectMemberAdmin(admin.ModelAdmin):
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(ProjectRoleAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'project', 'assigned_to', 'status', 'priority', 'due_date', 'is_overdue')
     list_filter = ('status', 'priority', 'due_date', 'project')
     search_fields = ('title', 'description', 'project__title', 'assigned_to__username')
@@ -84,13 +125,21 @@ class TaskAdmin(admin.ModelAdmin):
     )    
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+    ordering = ('name',)
+    readonly_fields = ('created_at',)
+
+
 @admin.register(TaskAttachment)
 class TaskAttachmentAdmin(admin.ModelAdmin):
     list_display = ('filename', 'task', 'uploaded_by', 'file_size', 'uploaded_at')
     list_filter = ('uploaded_at',)
     search_fields = ('filename', 'task__title', 'uploaded_by__username')
     ordering = ('-uploaded_at',)
-    readonly_fields = ('file_size', 'uploaded_at')
+    readonly_fields = ('content', 'file_size', 'uploaded_at')
 
 
 
@@ -0,0 +1,52 @@
+from django.db.models import Q
+
+from .models import Project, User
+from .permissions import CONTRIBUTOR_ROLES, get_project_roles, is_admin
+
+AUTOCOMPLETE_LIMIT = 10
+
+
+def _clean_prefix(prefix: str) -> str:
+    return ' '.join(prefix.split())
+
+
+def autocomplete_projects(user, prefix: str, contributing: bool = False, limit: int = AUTOCOMPLETE_LIMIT) -> list:
+    """
+    Projects whose title starts with ``prefix`` among those the user can see,
+    or only those they can add tasks to when ``contributing`` is set.
+    """
+    prefix = _clean_prefix(prefix)
+    if not prefix:
+        return []
+    projects = Project.objects.filter(title__istartswith=prefix)
+    if not is_admin(user):
+        roles = get_project_roles(user)
+        projects = projects.filter(pk__in=[
+            pk for pk, role in roles.items() if not contributing or role in CONTRIBUTOR_ROLES
+        ])
+    rows = projects.order_by('title', 'pk').values_list('pk', 'title')[:limit]
+    return [{'id': str(pk), 'text': title} for pk, title in rows]
+
+
+def autocomplete_users(user, prefix: str, project_id=None, limit: int = AUTOCOMPLETE_LIMIT) -> list:
+    """
+    Active users whose username, first or last name starts with ``prefix``.
+    With ``project_id`` only the project's active members are returned, and
+    only if the user can see that project.
+    """
+    prefix = _clean_prefix(prefix)
+    if not prefix:
+        return []
+    users = User.objects.filter(
+        Q(username__istartswith=prefix) | Q(first_name__istartswith=prefix) | Q(last_name__istartswith=prefix),
+        is_active=True,
+    )
+    if project_id is not None:
+        if not is_admin(user) and str(project_id) not in get_project_roles(user):
+            return []
+        users = users.filter(projectmember__project_id=project_id, projectmember__is_active=True)
+    rows = users.order_by('username').values_list('pk', 'username', 'first_name', 'last_name')[:limit]
+    return [
+        {'id': pk, 'text': f'{first_name} {last_name}'.strip() or username, 'username': username}
+        for pk, username, first_name, last_name in rows
+    ]
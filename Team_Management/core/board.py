@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Project, Task
+from .pagination import encode_cursor, paginate_by_cursor
+
+BOARD_PER_COLUMN = 20
+BOARD_MAX_PER_COLUMN = 100
+CARD_FIELDS = ('id', 'title', 'status', 'priority', 'due_date', 'estimated_hours', 'created_at', 'assigned_to__username')
+
+
+def _card(task) -> dict:
+    return {
+        'id': str(task.pk),
+        'title': task.title,
+        'priority': task.priority,
+        'due_date': task.due_date.isoformat(),
+        'estimated_hours': task.estimated_hours,
+        'assignee': task.assigned_to.username if task.assigned_to_id else None,
+    }
+
+
+def _column(project, status, tasks, next_cursor) -> dict:
+    return {
+        'status': status,
+        'label': dict(Task.STATUS_CHOICES)[status],
+        'total': getattr(project, Project.TASK_COUNTER_FIELDS[status]),
+        'tasks': [_card(task) for task in tasks],
+        'next_cursor': next_cursor,
+    }
+
+
+def _cards(project):
+    return Task.objects.filter(project=project).select_related('assigned_to').only(*CARD_FIELDS)
+
+
+def project_board(project, per_page: int = BOARD_PER_COLUMN) -> list:
+    """
+    Every status column of ``project``, newest tasks first: the first
+    ``per_page`` tasks of all columns come from one ROW_NUMBER() query
+    partitioned by status, the totals from the project's task counters.
+    Columns with more tasks carry a cursor for board_column().
+    """
+    ranked = _cards(project).annotate(
+        rank=Window(RowNumber(), partition_by=F('status'), order_by=(F('created_at').desc(), F('pk').desc())),
+    ).filter(rank__lte=per_page + 1).order_by('status', 'rank')
+    columns = defaultdict(list)
+    for task in ranked:
+        columns[task.status].append(task)
+
+    board = []
+    for status, label in Task.STATUS_CHOICES:
+        tasks = columns[status]
+        next_cursor = None
+        if len(tasks) > per_page:
+            tasks = tasks[:per_page]
+            next_cursor = encode_cursor(tasks[-1].created_at, tasks[-1].pk)
+        board.append(_column(project, status, tasks, next_cursor))
+    return board
+
+
+def board_column(project, status: str, cursor: str = None, per_page: int = BOARD_PER_COLUMN) -> dict:
+    """The tasks of one column after ``cursor``; raises InvalidCursor for a malformed one."""
+    page = paginate_by_cursor(_cards(project).filter(status=status), cursor, per_page)
+    return _column(project, status, page.object_list, page.next_cursor)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace: str) -> str:
+    return f'core:version:{namespace}'
+
+
+def get_version(namespace: str) -> int:
+    """
+    Return the current version number of a cache namespace. Cache keys that
+    embed it become unreachable as soon as the namespace is bumped.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted version never repeats an old one
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str) -> None:
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
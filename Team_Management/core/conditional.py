@@ -0,0 +1,86 @@
+import hashlib
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .dependencies import graph_version
+from .history import history_version
+from .models import Project
+from .permissions import get_project_roles, is_admin
+
+
+def conditional_json(version_func):
+    """
+    Conditional GET for a read-only JSON view. ``version_func(request,
+    *args, **kwargs)`` returns ``(version, last_modified)`` covering
+    everything the response depends on, ``last_modified`` being a datetime
+    or None, or returns None to always run the view (e.g. when the user
+    cannot see the object and the view answers 404). Matching
+    ``If-None-Match`` / ``If-Modified-Since`` requests get a 304 without
+    running the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            found = version_func(request, *args, **kwargs) if request.method in ('GET', 'HEAD') else None
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            version, last_modified = found
+            # The same URL returns different data to different users
+            key = f'{request.user.pk}:{request.get_full_path()}:{version}'
+            etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response.headers.setdefault('ETag', etag)
+                if timestamp is not None:
+                    response.headers.setdefault('Last-Modified', http_date(timestamp))
+            # Stored by the browser, but revalidated on every use
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def _visible_project(request, pk) -> bool:
+    return is_admin(request.user) or str(pk) in get_project_roles(request.user)
+
+
+def project_tasks_version(request, pk, **kwargs):
+    """
+    The project's last task counter write (``tasks_changed_at``), read with
+    one primary key lookup. For views computed from the task counters.
+    """
+    if not _visible_project(request, pk):
+        return None
+    changed_at = Project.objects.filter(pk=pk).values_list('tasks_changed_at', flat=True).first()
+    if changed_at is None:
+        return None
+    return changed_at.isoformat(), changed_at
+
+
+def project_history_version(request, pk, **kwargs):
+    """
+    Like project_tasks_version, plus the version of the project's daily
+    status rows (also written by rebuilds, without a task write), for
+    charts whose default range ends today.
+    """
+    found = project_tasks_version(request, pk)
+    if found is None:
+        return None
+    # No Last-Modified: the data behind a default range moves at midnight without a task write
+    return f'{found[0]}:{history_version(pk)}:{timezone.localdate()}', None
+
+
+def project_graph_version(request, pk, **kwargs):
+    """The cache version of the project's dependency graph; no database query."""
+    if not _visible_project(request, pk):
+        return None
+    return str(graph_version(pk)), None
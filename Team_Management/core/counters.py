@@ -0,0 +1,37 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .deferred import DeferredDeltas
+from .events import events_wanted, progress_event, send_events
+from .models import Project
+
+
+def _apply_project_deltas(project_id, deltas, using):
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    project = Project.objects.using(using).filter(pk=project_id)
+    project.update(tasks_changed_at=timezone.now(), **updates)
+    if not events_wanted():
+        return
+    # Applied once committed, so the stored counts can go straight to the streams
+    counters = project.values(*Project.TASK_COUNTER_FIELDS.values()).first()
+    if counters is not None:
+        send_events([progress_event(project_id, counters)], using=using)
+
+
+# Per-project task counter deltas, written once per project per transaction
+project_counters = DeferredDeltas(_apply_project_deltas)
+
+
+def record_task_move(old_project_id, old_status, new_project_id, new_status, using='default') -> None:
+    """
+    Move one task between counter buckets. Pass ``None`` for the old or new
+    side when the task is being created or deleted.
+    """
+    if (old_project_id, old_status) == (new_project_id, new_status):
+        return
+    old_field = Project.TASK_COUNTER_FIELDS.get(old_status)
+    new_field = Project.TASK_COUNTER_FIELDS.get(new_status)
+    if old_project_id and old_field:
+        project_counters.add(old_project_id, {old_field: -1}, using=using)
+    if new_project_id and new_field:
+        project_counters.add(new_project_id, {new_field: 1}, using=using)
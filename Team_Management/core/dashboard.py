@@ -0,0 +1,52 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import bump_version, get_version
+from .deferred import DeferredDeltas
+from .models import Project, ProjectMember, Task
+
+# Admins see every project, so their stats share one version that every write bumps
+ADMIN_NAMESPACE = 'dashboard'
+
+
+def _dashboard_namespace(user_id) -> str:
+    return f'dashboard:{user_id}'
+
+
+def dashboard_version(user) -> int:
+    """The version of the user's cached dashboard stats; no database query."""
+    return get_version(ADMIN_NAMESPACE if user.role == 'admin' else _dashboard_namespace(user.pk))
+
+
+def project_user_ids(project_id, using: str = DEFAULT_DB_ALIAS) -> set:
+    """The owner, the members and the assignees of a project: everyone whose dashboard counts it."""
+    owners = Project.objects.using(using).filter(pk=project_id).order_by().values_list('owner_id')
+    members = ProjectMember.objects.using(using).filter(project_id=project_id).order_by().values_list('user_id')
+    assignees = (
+        Task.objects.using(using).filter(project_id=project_id, assigned_to__isnull=False)
+        .order_by().values_list('assigned_to_id')
+    )
+    return {user_id for user_id, in owners.union(members, assignees)}
+
+
+def _expire_dashboards(key, deltas, using):
+    kind, pk = key
+    user_ids = project_user_ids(pk, using) if kind == 'project' else {pk}
+    for user_id in user_ids:
+        bump_version(_dashboard_namespace(user_id))
+    bump_version(ADMIN_NAMESPACE)
+
+
+# Dashboards to expire once the transaction commits, once per project and user
+expired_dashboards = DeferredDeltas(_expire_dashboards)
+
+
+def invalidate_dashboards(project_ids=(), user_ids=(), using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Expire the cached dashboard stats of everyone involved in ``project_ids``
+    (looked up once the write has committed) and of ``user_ids``, e.g. an
+    old assignee who no longer shows up in the project.
+    """
+    for project_id in {project_id for project_id in project_ids if project_id is not None}:
+        expired_dashboards.add(('project', project_id), {'writes': 1}, using=using)
+    for user_id in {user_id for user_id in user_ids if user_id is not None}:
+        expired_dashboards.add(('user', user_id), {'writes': 1}, using=using)
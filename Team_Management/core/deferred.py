@@ -0,0 +1,95 @@
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+
+
+class DeferredDeltas:
+    """
+    Collect numeric deltas per key and apply them once per transaction.
+
+    Deltas recorded inside an atomic block are summed per key and handed to
+    ``apply(key, deltas, using)`` from an ``on_commit`` hook, so a transaction
+    that touches the same row many times issues a single UPDATE for it.
+    Batches are tied to the savepoint they were opened in, so rolling back a
+    savepoint (or the whole transaction) drops its deltas with it. Outside of
+    an atomic block deltas are applied immediately.
+    """
+
+    def __init__(self, apply):
+        self.apply = apply
+        self._local = threading.local()
+
+    def _batches(self) -> dict:
+        if not hasattr(self._local, 'batches'):
+            self._local.batches = {}
+        return self._local.batches
+
+    def add(self, key, deltas: dict, using: str = DEFAULT_DB_ALIAS) -> None:
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        connection = connections[using]
+        if not connection.in_atomic_block:
+            self.apply(key, deltas, using)
+            return
+
+        batches = self._batches()
+        scope = (using, tuple(connection.savepoint_ids))
+        entry = batches.get(scope)
+        if entry is None or not self._is_registered(connection, entry[1]):
+            self._prune(batches)
+            pending = defaultdict(lambda: defaultdict(int))
+            callback = partial(self._flush, scope, pending)
+            batches[scope] = (pending, callback)
+            transaction.on_commit(callback, using=using)
+        pending = batches[scope][0]
+        for field, delta in deltas.items():
+            pending[key][field] += delta
+
+    def discard(self, keys, using: str = DEFAULT_DB_ALIAS) -> None:
+        """Forget pending deltas for ``keys``, e.g. after an absolute recount."""
+        keys = set(keys)
+        for (alias, _), (pending, _) in self._batches().items():
+            if alias == using:
+                for key in keys & pending.keys():
+                    del pending[key]
+
+    def _flush(self, scope, pending) -> None:
+        batches = self._batches()
+        if scope in batches and batches[scope][0] is pending:
+            del batches[scope]
+        for key, deltas in pending.items():
+            deltas = {field: delta for field, delta in deltas.items() if delta}
+            if deltas:
+                self.apply(key, deltas, scope[0])
+
+    @staticmethod
+    def _is_registered(connection, callback) -> bool:
+        return any(entry[1] is callback for entry in connection.run_on_commit)
+
+    def _prune(self, batches) -> None:
+        # Batches whose hook was discarded by a rollback will never flush
+        for scope, (_, callback) in list(batches.items()):
+            if not self._is_registered(connections[scope[0]], callback):
+                del batches[scope]
+
+
+def add_to_row(model, lookup: dict, deltas: dict, using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Add ``deltas`` to the row of ``model`` matching ``lookup``, inserting it
+    when there is none yet. For rollup tables written by DeferredDeltas.
+    """
+    row = model.objects.using(using).filter(**lookup)
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if row.update(**updates):
+        return
+    try:
+        with transaction.atomic(using=using):
+            model.objects.using(using).create(**lookup, **deltas)
+    except IntegrityError:
+        # Created by a concurrent commit in the meantime, or the parent row is gone
+        row.update(**updates)
@@ -0,0 +1,186 @@
+from collections import defaultdict, deque
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from .cache import bump_version, get_version
+from .deferred import DeferredDeltas
+from .models import Project, Task, TaskDependency
+
+GRAPH_CACHE_TIMEOUT = 60 * 60
+
+
+def _graph_namespace(project_id) -> str:
+    return f'task-graph:{project_id}'
+
+
+def graph_version(project_id) -> int:
+    return get_version(_graph_namespace(project_id))
+
+
+def _expire_graph(project_id, deltas, using):
+    bump_version(_graph_namespace(project_id))
+
+
+# Graphs to expire again once the transaction commits, once per project
+expired_graphs = DeferredDeltas(_expire_graph)
+
+
+def invalidate_project_graph(*project_ids, using: str = DEFAULT_DB_ALIAS) -> None:
+    for project_id in {project_id for project_id in project_ids if project_id is not None}:
+        bump_version(_graph_namespace(project_id))
+        # A request racing the write may re-cache the old graph; expire it again once committed
+        expired_graphs.add(project_id, {'writes': 1}, using=using)
+
+
+def load_edges(project_id, using: str = DEFAULT_DB_ALIAS) -> dict:
+    """``{task_id: [ids of the tasks it depends on]}`` for one project, in one query."""
+    edges = defaultdict(list)
+    rows = TaskDependency.objects.using(using).filter(project_id=project_id).order_by()
+    for task_id, depends_on_id in rows.values_list('task_id', 'depends_on_id'):
+        edges[task_id].append(depends_on_id)
+    return edges
+
+
+def _reaches(edges: dict, start, target) -> bool:
+    """Whether following dependencies from ``start`` leads to ``target``."""
+    seen = {start}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        for depends_on in edges.get(node, ()):
+            if depends_on not in seen:
+                seen.add(depends_on)
+                stack.append(depends_on)
+    return False
+
+
+def add_dependency(task, depends_on) -> TaskDependency:
+    """
+    Make ``task`` wait for ``depends_on``. Raises ValidationError for tasks
+    of different projects and for an edge that would close a cycle. The
+    project row is locked while checking, so two concurrent inserts cannot
+    close a cycle between them.
+    """
+    if task.pk == depends_on.pk:
+        raise ValidationError('A task cannot depend on itself.')
+    if task.project_id != depends_on.project_id:
+        raise ValidationError('Dependencies must be between tasks of the same project.')
+    with transaction.atomic():
+        list(Project.objects.select_for_update().filter(pk=task.project_id).values_list('pk'))
+        edges = load_edges(task.project_id)
+        if depends_on.pk in edges.get(task.pk, ()):
+            return TaskDependency.objects.get(task=task, depends_on=depends_on)
+        if _reaches(edges, depends_on.pk, task.pk):
+            raise ValidationError(f'"{depends_on.title}" already depends on "{task.title}".')
+        return TaskDependency.objects.create(task=task, depends_on=depends_on, project_id=task.project_id)
+
+
+def move_task_dependencies(task_ids, project_id, using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Follow tasks moved to another project: edges between two of the moved
+    tasks move with them, edges to tasks left behind are dropped.
+    """
+    task_ids = list(task_ids)
+    edges = (
+        TaskDependency.objects.using(using)
+        .filter(Q(task_id__in=task_ids) | Q(depends_on_id__in=task_ids))
+        .exclude(project_id=project_id)
+    )
+    edges.filter(task_id__in=task_ids, depends_on_id__in=task_ids).update(project_id=project_id)
+    edges.delete()
+
+
+def build_graph(tasks: list, edges: dict) -> dict:
+    """
+    Order ``tasks`` (dicts with id, status and estimated_hours, in
+    tie-break order) so every task follows the tasks it depends on, and
+    schedule their remaining estimated hours as early as the dependencies
+    allow. The critical path is the dependency chain that finishes last;
+    open tasks waiting for open dependencies are blocked. Linear in tasks
+    plus edges. Tasks caught in a cycle are appended in their given order.
+    """
+    by_id = {task['id']: task for task in tasks}
+    depends = {pk: [other for other in edges.get(pk, ()) if other in by_id] for pk in by_id}
+    dependents = defaultdict(list)
+    waiting = {}
+    for pk, others in depends.items():
+        waiting[pk] = len(others)
+        for other in others:
+            dependents[other].append(pk)
+
+    ready = deque(pk for pk in by_id if not waiting[pk])
+    order = []
+    while ready:
+        pk = ready.popleft()
+        order.append(pk)
+        for dependent in dependents[pk]:
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                ready.append(dependent)
+    ordered = set(order)
+    cyclic = [pk for pk in by_id if pk not in ordered]
+    order += cyclic
+
+    is_open = {pk: task['status'] in Task.OPEN_STATUSES for pk, task in by_id.items()}
+    start, finish, previous = {}, {}, {}
+    for pk in order:
+        before = [other for other in depends[pk] if finish.get(other)]
+        previous[pk] = max(before, key=finish.get, default=None)
+        start[pk] = finish[previous[pk]] if previous[pk] is not None else 0
+        finish[pk] = start[pk] + ((by_id[pk]['estimated_hours'] or 0) if is_open[pk] else 0)
+
+    critical_path = []
+    end = max(order, key=finish.get, default=None)
+    if end is not None and finish[end]:
+        while end is not None:
+            critical_path.append(end)
+            end = previous[end]
+        critical_path.reverse()
+    critical = set(critical_path)
+
+    nodes = []
+    for pk in order:
+        blocked_by = [other for other in depends[pk] if is_open[other]] if is_open[pk] else []
+        nodes.append({
+            **by_id[pk],
+            'depends_on': depends[pk],
+            'blocked_by': blocked_by,
+            'start': start[pk],
+            'finish': finish[pk],
+            'critical': pk in critical,
+        })
+    return {
+        'tasks': nodes,
+        'critical_path': critical_path,
+        'critical_hours': finish[critical_path[-1]] if critical_path else 0,
+        'blocked': [node['id'] for node in nodes if node['blocked_by']],
+        'cyclic': cyclic,
+    }
+
+
+def project_graph(project_id) -> dict:
+    """
+    The dependency graph of a project for a Gantt view (see build_graph),
+    computed from two queries and cached until the project's tasks or
+    dependencies change.
+    """
+    cache_key = f'{_graph_namespace(project_id)}:{graph_version(project_id)}'
+    graph = cache.get(cache_key)
+    if graph is None:
+        tasks = [
+            {**task, 'id': str(task['id']), 'due_date': task['due_date'].isoformat()}
+            for task in Task.objects.filter(project_id=project_id).order_by('due_date', 'pk')
+            .values('id', 'title', 'status', 'due_date', 'estimated_hours')
+        ]
+        edges = {
+            str(task_id): [str(other) for other in others]
+            for task_id, others in load_edges(project_id).items()
+        }
+        graph = build_graph(tasks, edges)
+        cache.set(cache_key, graph, GRAPH_CACHE_TIMEOUT)
+    return graph
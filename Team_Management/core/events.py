@@ -0,0 +1,282 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import LiveEvent, Project
+
+EVENTS_QUEUE_SIZE = 100
+EVENTS_FETCH_LIMIT = 500
+EVENTS_RETENTION = timedelta(hours=1)
+# Writers prune the outbox each time this many more rows have been inserted
+EVENTS_PRUNE_EVERY = 1000
+# Seconds a poller keeps re-reading ids it skipped, for rows whose transaction commits late
+EVENTS_LATE_COMMIT = 10
+EVENTS_MAX_GAPS = 1000
+# Seconds between comment lines that keep idle connections and proxies open
+EVENTS_KEEPALIVE = 15
+EVENTS_RETRY_MS = 3000
+
+
+def project_channel(project_id) -> str:
+    return f'project:{project_id}'
+
+
+@dataclass
+class Event:
+    channel: str
+    kind: str
+    data: dict
+    id: int = None
+
+    def encode(self) -> str:
+        """The event as a ``text/event-stream`` message."""
+        return f'id: {self.id}\nevent: {self.kind}\ndata: {json.dumps(self.data, cls=DjangoJSONEncoder)}\n\n'
+
+
+class Subscription:
+    """Events of some channels, queued for one consumer on its event loop."""
+
+    def __init__(self, bus, channels):
+        self.bus = bus
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+
+    def offer(self, event: Event) -> None:
+        # A consumer that fell behind loses its oldest events rather than growing without bound
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Event:
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process pub/sub: hands events to the subscriptions of their channel, from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channels) -> Subscription:
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[channel]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def dispatch(self, event: Event) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(event.channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)  # Its event loop is gone
+
+
+bus = EventBus()
+
+
+class LocalBackend:
+    """
+    Deliver events to the streams of this process only. Enough for a single
+    ASGI process that serves both the writes and the streams; in a process
+    without streams (e.g. WSGI) sending costs nothing.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def wants_events(self) -> bool:
+        return bus.has_subscribers()
+
+    def send(self, events, using: str = DEFAULT_DB_ALIAS) -> None:
+        for event in events:
+            event.id = next(self._ids)
+            bus.dispatch(event)
+
+    def start(self) -> None:
+        pass
+
+    def replay(self, channels, last_id) -> list:
+        return []
+
+
+class DatabaseBackend:
+    """
+    Deliver events across processes through the LiveEvent table. Writers
+    insert rows; every process serving streams polls for rows newer than
+    the last one it saw (one primary key range query per interval) while it
+    has subscribers, and dispatches them in-process. Writers prune rows
+    older than EVENTS_RETENTION every EVENTS_PRUNE_EVERY rows, so the table
+    stays small whether or not anyone listens; until then a reconnecting
+    client is replayed what it missed.
+
+    Ids are taken at INSERT but become visible at COMMIT, so a transaction
+    can commit after a higher id was already read. Pollers re-read the ids
+    they skipped for EVENTS_LATE_COMMIT seconds; rows committed later than
+    that, and late rows below a reconnecting client's Last-Event-ID, are
+    not delivered.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or settings.EVENTS_POLL_INTERVAL
+        self._task = None
+
+    def wants_events(self) -> bool:
+        return True
+
+    def send(self, events, using: str = DEFAULT_DB_ALIAS) -> None:
+        rows = LiveEvent.objects.using(using).bulk_create([
+            LiveEvent(channel=event.channel, kind=event.kind, data=event.data) for event in events
+        ])
+        # Whichever process writes the row that crosses a multiple of EVENTS_PRUNE_EVERY prunes
+        last_id = rows[-1].pk if rows else None
+        if last_id is not None and last_id // EVENTS_PRUNE_EVERY != (last_id - len(rows)) // EVENTS_PRUNE_EVERY:
+            self.prune(using)
+
+    def start(self) -> None:
+        """Poll on the running event loop unless a poller is already running."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        last_id = await sync_to_async(self.latest_id)()
+        gaps = {}  # Skipped ids, which an uncommitted transaction may still fill, and when they were seen
+        while bus.has_subscribers():
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            for event in await sync_to_async(self.fetch)(last_id, gaps=list(gaps)):
+                if event.id > last_id:
+                    gaps.update(dict.fromkeys(range(max(last_id + 1, event.id - EVENTS_MAX_GAPS), event.id), now))
+                    last_id = event.id
+                gaps.pop(event.id, None)
+                bus.dispatch(event)
+            gaps = {pk: seen for pk, seen in gaps.items() if now - seen < EVENTS_LATE_COMMIT}
+
+    @staticmethod
+    def latest_id() -> int:
+        return LiveEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    @staticmethod
+    def fetch(last_id, channels=None, gaps=()) -> list:
+        rows = LiveEvent.objects.filter(Q(pk__gt=last_id) | Q(pk__in=gaps) if gaps else Q(pk__gt=last_id))
+        if channels is not None:
+            rows = rows.filter(channel__in=channels)
+        return [
+            Event(row.channel, row.kind, row.data, row.pk)
+            for row in rows.order_by('pk')[:EVENTS_FETCH_LIMIT]
+        ]
+
+    def replay(self, channels, last_id) -> list:
+        return self.fetch(last_id, list(channels))
+
+    @staticmethod
+    def prune(using: str = DEFAULT_DB_ALIAS) -> int:
+        # The oldest rows come first in primary key order, so this stops at the first one kept
+        events = LiveEvent.objects.using(using)
+        first_kept = (
+            events.filter(created_at__gte=timezone.now() - EVENTS_RETENTION)
+            .order_by('pk').values_list('pk', flat=True).first()
+        )
+        stale = events.all() if first_kept is None else events.filter(pk__lt=first_kept)
+        return stale.delete()[0]
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path: str):
+    return import_string(path)()
+
+
+def get_backend():
+    """The backend named by ``settings.EVENTS_BACKEND``."""
+    return _load_backend(settings.EVENTS_BACKEND)
+
+
+def events_wanted() -> bool:
+    """Whether sent events can reach anyone, so writers can skip building them."""
+    return get_backend().wants_events()
+
+
+def send_events(events, using: str = DEFAULT_DB_ALIAS) -> None:
+    """Publish committed changes; callers inside a transaction defer this to on_commit."""
+    if events and events_wanted():
+        get_backend().send(events, using)
+
+
+def activity_event(activity) -> Event:
+    return Event(project_channel(activity.project_id), activity.verb, {
+        'task': activity.task_id,
+        'actor': activity.actor_id,
+        'created_at': activity.created_at,
+        **activity.data,
+    })
+
+
+def progress_event(project_id, counters: dict) -> Event:
+    """Task counts and progress of a project from its ``Project.TASK_COUNTER_FIELDS`` values."""
+    project = Project(**counters)
+    return Event(project_channel(project_id), 'progress', {
+        'progress': project.progress,
+        'tasks_by_status': {status: counters[field] for status, field in Project.TASK_COUNTER_FIELDS.items()},
+    })
+
+
+async def stream(channels, last_id=None):
+    """
+    ``text/event-stream`` chunks for ``channels``: what a reconnecting
+    client missed after ``last_id`` (when the backend keeps it), then live
+    events, with keepalive comments while idle.
+    """
+    backend = get_backend()
+    subscription = bus.subscribe(channels)
+    try:
+        backend.start()
+        yield f'retry: {EVENTS_RETRY_MS}\n\n'
+        replayed = set()
+        if last_id is not None:
+            for event in await sync_to_async(backend.replay)(subscription.channels, last_id):
+                replayed.add(event.id)
+                yield event.encode()
+        while True:
+            try:
+                event = await subscription.get(EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event.id not in replayed:
+                yield event.encode()
+    finally:
+        subscription.close()
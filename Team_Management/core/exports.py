@@ -0,0 +1,118 @@
+import csv
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Project, ProjectMember, Task, TaskComment
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+# Exported columns per kind, as values_list() lookups and the header they are written under
+EXPORT_COLUMNS = {
+    'tasks': [
+        ('id', 'id'),
+        ('project_id', 'project'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('status', 'status'),
+        ('priority', 'priority'),
+        ('due_date', 'due_date'),
+        ('estimated_hours', 'estimated_hours'),
+        ('actual_hours', 'actual_hours'),
+        ('assigned_to__username', 'assigned_to'),
+        ('created_by__username', 'created_by'),
+        ('tags', 'tags'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ],
+    'comments': [
+        ('id', 'id'),
+        ('task_id', 'task'),
+        ('author__username', 'author'),
+        ('content', 'content'),
+        ('created_at', 'created_at'),
+    ],
+    'memberships': [
+        ('project_id', 'project'),
+        ('user__username', 'user'),
+        ('role', 'role'),
+        ('is_active', 'is_active'),
+        ('joined_at', 'joined_at'),
+    ],
+}
+EXPORT_KINDS = tuple(EXPORT_COLUMNS)
+
+
+def export_queryset(kind: str, user=None, project_id=None):
+    """
+    Rows of ``kind`` in one project or all of them, limited to what ``user``
+    can see when given (management commands export everything).
+    """
+    if kind == 'tasks':
+        queryset = Task.objects.all() if user is None else Task.objects.visible_to(user)
+        project_lookup = 'project_id'
+    elif kind == 'comments':
+        queryset = TaskComment.objects.all()
+        if user is not None:
+            queryset = queryset.filter(task__in=Task.objects.visible_to(user).values('pk'))
+        project_lookup = 'task__project_id'
+    elif kind == 'memberships':
+        queryset = ProjectMember.objects.all()
+        if user is not None:
+            queryset = queryset.filter(project__in=Project.objects.visible_to(user).values('pk'))
+        project_lookup = 'project_id'
+    else:
+        raise ValueError(f'Unknown export kind: {kind}')
+    if project_id is not None:
+        queryset = queryset.filter(**{project_lookup: project_id})
+    return queryset
+
+
+def export_rows(kind: str, user=None, project_id=None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Tuples for the columns in EXPORT_COLUMNS[kind], read with a streaming
+    cursor in primary key order so memory stays flat whatever the row count.
+    """
+    lookups = [lookup for lookup, header in EXPORT_COLUMNS[kind]]
+    queryset = export_queryset(kind, user, project_id).order_by('pk').values_list(*lookups)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the generator."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ', '.join(value)
+    return value
+
+
+def iter_csv(kind: str, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for lookup, header in EXPORT_COLUMNS[kind]])
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def iter_jsonl(kind: str, rows):
+    headers = [header for lookup, header in EXPORT_COLUMNS[kind]]
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export(kind: str, export_format: str, user=None, project_id=None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Lines of the export, ready to be streamed to a response or a file."""
+    rows = export_rows(kind, user, project_id, chunk_size)
+    if export_format == 'csv':
+        return iter_csv(kind, rows)
+    if export_format == 'jsonl':
+        return iter_jsonl(kind, rows)
+    raise ValueError(f'Unknown export format: {export_format}')
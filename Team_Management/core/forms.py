@@ -1,7 +1,14 @@
+import os
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import authenticate, get_user_model
+from django.db.models import Exists, OuterRef
 from .models import Project, Task, TaskComment, TaskAttachment, ProjectMember
+from .permissions import CONTRIBUTOR_ROLES, can_manage_project, get_project_roles
+from .imports import IMPORT_FORMATS
+from .tags import normalize_tags
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 User = get_user_model()
 
@@ -17,10 +24,11 @@ class ProjectForm(forms.ModelForm):
             'start_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'end_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'budget': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Budget Amount'}),
-            'members': forms.SelectMultiple(attrs={'class': 'form-control'}),
+            'members': AutocompleteSelectMultiple('core:user_autocomplete', attrs={'class': 'form-control'}),
         }
     
     def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         # Filter members based on user role
         if 'instance' in kwargs and kwargs['instance']:
@@ -28,36 +36,48 @@ class ProjectForm(forms.ModelForm):
             if hasattr(project, 'owner'):
                 # Only show users that the project owner can add
                 self.fields['members'].queryset = User.objects.filter(is_active=True)
+            if user and not can_manage_project(user, project.pk):
+                # Membership is managed by the project's owners and managers
+                self.fields['members'].disabled = True
         else:
             self.fields['members'].queryset = User.objects.filter(is_active=True)
 
 class TaskForm(forms.ModelForm):
+    tags = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Tags (comma separated)'})
+    )
+
     class Meta:
         model = Task
         fields = ['title', 'description', 'project', 'assigned_to', 'status', 'priority', 'due_date', 'estimated_hours', 'actual_hours', 'tags']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Task Title'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Task Description'}),
-            'project': forms.Select(attrs={'class': 'form-control'}),
-            'assigned_to': forms.Select(attrs={'class': 'form-control'}),
+            'project': AutocompleteSelect(
+                'core:project_autocomplete', params={'contributing': 1}, attrs={'class': 'form-control'},
+            ),
+            'assigned_to': AutocompleteSelect('core:user_autocomplete', forward='project', attrs={'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
             'priority': forms.Select(attrs={'class': 'form-control'}),
             'due_date': forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}),
             'estimated_hours': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Estimated Hours'}),
             'actual_hours': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Actual Hours'}),
-            'tags': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Tags (comma separated)'}),
         }
     
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
+        if self.instance.tags:
+            self.initial['tags'] = ', '.join(self.instance.tags)
         
         if user:
-            # Filter projects based on user access
-            if user.role == 'admin':
-                self.fields['project'].queryset = Project.objects.all()
-            else:
-                self.fields['project'].queryset = Project.objects.filter(members=user)
+            # Tasks go into projects the user contributes to, read from the cached role map
+            if user.role != 'admin':
+                project_ids = [pk for pk, role in get_project_roles(user).items() if role in CONTRIBUTOR_ROLES]
+                if self.instance.project_id:
+                    project_ids.append(self.instance.project_id)
+                self.fields['project'].queryset = Project.objects.filter(pk__in=project_ids)
             
             # Filter assignable users based on project members
             if 'instance' in kwargs and kwargs['instance']:
@@ -68,12 +88,8 @@ class TaskForm(forms.ModelForm):
                 self.fields['assigned_to'].queryset = User.objects.filter(is_active=True)
     
     def clean_tags(self):
-        tags = self.cleaned_data.get('tags')
-        if tags:
-            # Convert comma-separated tags to list
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            return tag_list
-        return []
+        # Convert comma-separated tags to the normalized list mirrored into TaskTag
+        return normalize_tags(self.cleaned_data.get('tags'))
 
 class TaskCommentForm(forms.ModelForm):
     class Meta:
@@ -122,6 +138,24 @@ class TaskAttachmentForm(forms.ModelForm):
         
         return file
 
+class TaskImportForm(forms.Form):
+    file = forms.FileField(widget=forms.FileInput(attrs={'class': 'form-control'}))
+    format = forms.ChoiceField(
+        choices=[('', 'From file extension')] + [(name, name.upper()) for name in IMPORT_FORMATS],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        file = cleaned_data.get('file')
+        if file and not cleaned_data.get('format'):
+            extension = os.path.splitext(file.name)[1].lstrip('.').lower()
+            if extension not in IMPORT_FORMATS:
+                raise forms.ValidationError('Cannot tell the file format, please choose one.')
+            cleaned_data['format'] = extension
+        return cleaned_data
+
 class ProjectMemberForm(forms.ModelForm):
     class Meta:
         model = ProjectMember
@@ -184,12 +218,17 @@ class TaskFilterForm(forms.Form):
         super().__init__(*args, **kwargs)
         
         if user:
+            self.fields['project'].queryset = Project.objects.visible_to(user)
             if user.role == 'admin':
-                self.fields['project'].queryset = Project.objects.all()
                 self.fields['assigned_to'].queryset = User.objects.filter(is_active=True)
             else:
-                self.fields['project'].queryset = Project.objects.filter(members=user)
-                self.fields['assigned_to'].queryset = user.projects.all().distinct()
+                # Active members of any project the user can see
+                memberships = ProjectMember.objects.filter(
+                    user=OuterRef('pk'),
+                    is_active=True,
+                    project__in=Project.objects.visible_to(user).values('pk'),
+                )
+                self.fields['assigned_to'].queryset = User.objects.filter(Exists(memberships), is_active=True)
 
 class ProjectFilterForm(forms.Form):
     status = forms.ChoiceField(
@@ -0,0 +1,212 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .cache import bump_version, get_version
+from .deferred import DeferredDeltas, add_to_row
+from .models import Project, ProjectStatusDay, Task, TaskStatusChange
+
+HISTORY_BATCH_SIZE = 500
+# Longest range a chart endpoint returns, in days
+HISTORY_MAX_DAYS = 731
+# Cycle time runs from a task's first move into this status to its completion
+STARTED_STATUS = 'in_progress'
+CYCLE_TIME_BUCKETS = {
+    'day': F('day'),
+    'week': TruncWeek('day'),
+    'month': TruncMonth('day'),
+}
+
+
+def _history_namespace(project_id) -> str:
+    return f'status-history:{project_id}'
+
+
+def history_version(project_id) -> int:
+    """Bumped whenever the daily rows of the project are written; no database query."""
+    return get_version(_history_namespace(project_id))
+
+
+def _apply_status_day_deltas(project_id, deltas, using):
+    days = defaultdict(dict)
+    for (day, status, field), delta in deltas.items():
+        days[day, status][field] = delta
+    for (day, status), fields in days.items():
+        add_to_row(ProjectStatusDay, {'project_id': project_id, 'day': day, 'status': status}, fields, using)
+    bump_version(_history_namespace(project_id))
+
+
+# Per-project daily status deltas keyed by (day, status, column), written once per row per transaction
+status_days = DeferredDeltas(_apply_status_day_deltas)
+
+
+def cycle_time_starts(task_ids, using: str = DEFAULT_DB_ALIAS) -> dict:
+    """When each task was first started, from the log; tasks never started are missing."""
+    return dict(
+        TaskStatusChange.objects.using(using).filter(task_id__in=task_ids, new_status=STARTED_STATUS)
+        .order_by().values('task_id').annotate(started_at=Min('changed_at')).values_list('task_id', 'started_at')
+    )
+
+
+def log_status_changes(changes, using: str = DEFAULT_DB_ALIAS, when=None) -> None:
+    """
+    Record ``(task_id, project_id, old_status, new_status, created_at)``
+    transitions with one INSERT, and their per-day deltas. Use '' for the
+    old status of a task entering the project and the new status of one
+    leaving it. Completions add their cycle time, measured from the first
+    start or else from ``created_at`` (None if unknown).
+    """
+    changes = [change for change in changes if change[2] != change[3]]
+    if not changes:
+        return
+    when = when or timezone.now()
+    day = timezone.localdate(when)
+    TaskStatusChange.objects.using(using).bulk_create([
+        TaskStatusChange(task_id=task_id, project_id=project_id, old_status=old, new_status=new, changed_at=when)
+        for task_id, project_id, old, new, created_at in changes
+    ])
+
+    completed = [change for change in changes if change[3] == 'completed' and change[2]]
+    starts = cycle_time_starts([change[0] for change in completed], using) if completed else {}
+    deltas = defaultdict(lambda: defaultdict(int))
+    for task_id, project_id, old, new, created_at in changes:
+        if old:
+            deltas[project_id][day, old, 'left'] += 1
+        if new:
+            deltas[project_id][day, new, 'entered'] += 1
+    for task_id, project_id, old, new, created_at in completed:
+        started_at = starts.get(task_id) or created_at or when
+        deltas[project_id][day, new, 'cycle_time_count'] += 1
+        deltas[project_id][day, new, 'cycle_time_seconds'] += max(int((when - started_at).total_seconds()), 0)
+    for project_id, project_deltas in deltas.items():
+        status_days.add(project_id, project_deltas, using=using)
+
+
+def rebuild_status_days(project_ids, using: str = None) -> int:
+    """
+    Recompute the daily rows of the given projects from their status log.
+    Returns the number of rows written.
+    """
+    project_ids = list(project_ids)
+    if not project_ids:
+        return 0
+    using = using or DEFAULT_DB_ALIAS
+    log = TaskStatusChange.objects.using(using).filter(project_id__in=project_ids).order_by()
+    rows = defaultdict(lambda: defaultdict(int))
+    with transaction.atomic(using=using):
+        # The rebuild already sees every logged change; pending deltas would double count
+        status_days.discard(project_ids, using=using)
+        ProjectStatusDay.objects.using(using).filter(project_id__in=project_ids).delete()
+        for status_field, column in (('new_status', 'entered'), ('old_status', 'left')):
+            counts = (
+                log.exclude(**{status_field: ''})
+                .values_list('project_id', TruncDate('changed_at'), status_field)
+                .annotate(count=Count('pk'))
+            )
+            for project_id, day, status, count in counts:
+                rows[project_id, day, status][column] = count
+
+        started = log.filter(task_id=OuterRef('task_id'), new_status=STARTED_STATUS).order_by('changed_at')
+        completions = (
+            log.filter(new_status='completed').exclude(old_status='')
+            .annotate(started_at=Subquery(started.values('changed_at')[:1]),
+                      created_at=Subquery(Task.objects.filter(pk=OuterRef('task_id')).values('created_at')[:1]))
+            .values_list('project_id', 'changed_at', 'started_at', 'created_at')
+        )
+        for project_id, changed_at, started_at, created_at in completions.iterator():
+            started_at = started_at or created_at or changed_at
+            row = rows[project_id, timezone.localdate(changed_at), 'completed']
+            row['cycle_time_count'] += 1
+            row['cycle_time_seconds'] += max(int((changed_at - started_at).total_seconds()), 0)
+
+        created = ProjectStatusDay.objects.using(using).bulk_create([
+            ProjectStatusDay(project_id=project_id, day=day, status=status, **columns)
+            for (project_id, day, status), columns in rows.items()
+        ], batch_size=1000)
+        transaction.on_commit(
+            lambda: [bump_version(_history_namespace(project_id)) for project_id in project_ids], using=using,
+        )
+    return len(created)
+
+
+def rebuild_all_status_days(batch_size: int = HISTORY_BATCH_SIZE, on_batch=None) -> int:
+    """Rebuild every project's daily rows, ``batch_size`` projects at a time. Returns the project count."""
+    last_pk = None
+    total = 0
+    while True:
+        batch = Project.objects.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        project_ids = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not project_ids:
+            return total
+        rebuild_status_days(project_ids)
+        total += len(project_ids)
+        last_pk = project_ids[-1]
+        if on_batch:
+            on_batch(total)
+
+
+def history_range(start=None, end=None):
+    """The requested day range, defaulting to the last 30 days; None if it is invalid or too long."""
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= HISTORY_MAX_DAYS:
+        return None
+    return start, end
+
+
+def daily_status_counts(project_id, start, end) -> list:
+    """
+    ``(day, {status: tasks in it at the end of the day})`` for every day of
+    the range, from the rollup: one query for the totals before ``start``
+    and one for the rows in the range.
+    """
+    rows = ProjectStatusDay.objects.filter(project_id=project_id).order_by()
+    counts = dict.fromkeys(dict(Task.STATUS_CHOICES), 0)
+    for status, net in rows.filter(day__lt=start).values_list('status').annotate(net=Sum(F('entered') - F('left'))):
+        counts[status] = counts.get(status, 0) + net
+    changes = defaultdict(list)
+    for day, status, net in rows.filter(day__gte=start, day__lte=end).values_list(
+            'day', 'status', F('entered') - F('left')):
+        changes[day].append((status, net))
+
+    days = []
+    day = start
+    while day <= end:
+        for status, net in changes.get(day, ()):
+            counts[status] = counts.get(status, 0) + net
+        days.append((day, dict(counts)))
+        day += timedelta(days=1)
+    return days
+
+
+def burndown(project_id, start, end) -> list:
+    return [{
+        'date': day.isoformat(),
+        'remaining': sum(counts.get(status, 0) for status in Task.OPEN_STATUSES),
+        'completed': counts.get('completed', 0),
+    } for day, counts in daily_status_counts(project_id, start, end)]
+
+
+def cumulative_flow(project_id, start, end) -> list:
+    return [{'date': day.isoformat(), **counts} for day, counts in daily_status_counts(project_id, start, end)]
+
+
+def cycle_times(project_id, start, end, bucket: str = 'week') -> list:
+    """Completions and their average cycle time in hours per day, week or month."""
+    rows = (
+        ProjectStatusDay.objects.filter(project_id=project_id, status='completed', day__gte=start, day__lte=end)
+        .order_by().annotate(period=CYCLE_TIME_BUCKETS[bucket]).values('period')
+        .annotate(completed=Sum('cycle_time_count'), seconds=Sum('cycle_time_seconds'))
+        .exclude(completed=0).order_by('period')
+    )
+    return [{
+        'period': row['period'].isoformat(),
+        'completed': row['completed'],
+        'average_hours': round(row['seconds'] / row['completed'] / 3600, 1),
+    } for row in rows]
@@ -0,0 +1,258 @@
+import csv
+import json
+import time
+import uuid
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboards
+from .dependencies import invalidate_project_graph
+from .history import log_status_changes
+from .models import Project, Task, TaskComment, TaskTag, User
+from .search import index_comments, index_tasks
+from .tags import get_or_create_tags, normalize_tags
+from .workload import rebuild_workload
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+# Task columns validated with the model field's own clean(); the rest are resolved by the importer
+TASK_IMPORT_FIELDS = ('title', 'description', 'status', 'priority', 'due_date', 'estimated_hours', 'actual_hours')
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    comments: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.created + self.failed
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(file, import_format: str):
+    """
+    ``(line number, row)`` for each record of a text file in the format of
+    core.exports. Lines that are not a JSON object come back with row None.
+    """
+    if import_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    elif import_format == 'jsonl':
+        for line_no, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f'Unknown import format: {import_format}')
+
+
+class TaskImporter:
+    """
+    Load tasks, their assignees and (JSONL only) embedded comments from rows
+    shaped like the core.exports task export.
+
+    Rows are validated a batch at a time against lookup maps of users and
+    projects filled with one query per batch, inserted with bulk_create(),
+    and the project task counters and workload rollups are recomputed once
+    at the end instead of per row. Search entries are written in bulk with
+    each batch. Invalid rows are passed to ``on_error`` and skipped.
+    """
+
+    def __init__(self, default_creator=None, project_ids=None, batch_size: int = IMPORT_BATCH_SIZE,
+                 on_error=None, on_batch=None):
+        self.default_creator_id = default_creator.pk if default_creator else None
+        # Projects rows may target (str ids), or None for any existing project
+        self.project_ids = project_ids
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.on_batch = on_batch
+        self.result = ImportResult()
+        self.users = {}
+        self.projects = {}
+        self.seen_ids = set()
+        self.touched_projects = set()
+
+    def run(self, rows) -> ImportResult:
+        started = time.monotonic()
+        batch = []
+        for line_no, row in rows:
+            batch.append((line_no, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+                self.result.elapsed = time.monotonic() - started
+                if self.on_batch:
+                    self.on_batch(self.result)
+        if batch:
+            self.import_batch(batch)
+
+        if self.touched_projects:
+            Project.objects.filter(pk__in=self.touched_projects).recount_task_counters()
+            rebuild_workload(self.touched_projects)
+            invalidate_project_graph(*self.touched_projects)
+            invalidate_dashboards(self.touched_projects)
+        self.result.elapsed = time.monotonic() - started
+        return self.result
+
+    def import_batch(self, batch) -> None:
+        self.resolve_lookups(row for line_no, row in batch if row is not None)
+        existing = self.existing_task_ids(row for line_no, row in batch if row is not None)
+
+        tasks, comments = [], []
+        for line_no, row in batch:
+            if row is None:
+                self.fail(line_no, row, {'__all__': ['Not a JSON object.']})
+                continue
+            errors = {}
+            task = self.build_task(row, existing, errors)
+            task_comments = self.build_comments(task, row.get('comments') or [], errors)
+            if errors:
+                if row.get('id') and 'id' not in errors:
+                    # The id stays free for a corrected row later in the file
+                    self.seen_ids.discard(task.pk)
+                self.fail(line_no, row, errors)
+                continue
+            tasks.append(task)
+            comments.extend(task_comments)
+
+        if not tasks:
+            return
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            self.create_task_tags(tasks)
+            TaskComment.objects.bulk_create(comments)
+            index_tasks(tasks)
+            index_comments(comments)
+            log_status_changes([(task.pk, task.project_id, '', task.status, task.created_at) for task in tasks])
+        self.result.created += len(tasks)
+        self.result.comments += len(comments)
+        self.touched_projects.update(task.project_id for task in tasks)
+
+    def fail(self, line_no, row, errors) -> None:
+        self.result.failed += 1
+        if self.on_error:
+            self.on_error(line_no, row, errors)
+
+    def resolve_lookups(self, rows) -> None:
+        usernames, project_ids = set(), set()
+        for row in rows:
+            usernames.update(filter(None, (row.get('assigned_to'), row.get('created_by'))))
+            usernames.update(
+                comment.get('author') for comment in row.get('comments') or []
+                if isinstance(comment, dict) and comment.get('author')
+            )
+            project_id = self.parse_uuid(row.get('project'))
+            if project_id:
+                project_ids.add(str(project_id))
+
+        missing_users = usernames - self.users.keys()
+        if missing_users:
+            found = dict(User.objects.filter(username__in=missing_users).values_list('username', 'pk'))
+            self.users.update((username, found.get(username)) for username in missing_users)
+
+        missing_projects = project_ids - self.projects.keys()
+        if missing_projects:
+            found = {str(pk) for pk in Project.objects.filter(pk__in=missing_projects).values_list('pk', flat=True)}
+            self.projects.update((pk, pk in found) for pk in missing_projects)
+
+    def existing_task_ids(self, rows) -> set:
+        ids = {task_id for task_id in (self.parse_uuid(row.get('id')) for row in rows) if task_id}
+        if not ids:
+            return set()
+        return set(Task.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    @staticmethod
+    def parse_uuid(value):
+        try:
+            return uuid.UUID(str(value)) if value else None
+        except ValueError:
+            return None
+
+    def build_task(self, row, existing, errors):
+        task = Task()
+        for name in TASK_IMPORT_FIELDS:
+            field = Task._meta.get_field(name)
+            value = row.get(name)
+            if value in (None, '') and field.has_default():
+                value = field.get_default()
+            elif value == '' and field.null:
+                value = None
+            try:
+                value = field.clean(value, None)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+                continue
+            if name == 'due_date' and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            setattr(task, name, value)
+
+        if row.get('id'):
+            task_id = self.parse_uuid(row['id'])
+            if task_id is None:
+                errors['id'] = ['Not a valid UUID.']
+            elif task_id in existing or task_id in self.seen_ids:
+                errors['id'] = ['A task with this id already exists.']
+            else:
+                task.pk = task_id
+                self.seen_ids.add(task_id)
+
+        project_id = str(self.parse_uuid(row.get('project')))
+        if not self.projects.get(project_id):
+            errors['project'] = ['Unknown project.']
+        elif self.project_ids is not None and project_id not in self.project_ids:
+            errors['project'] = ['You cannot add tasks to this project.']
+        else:
+            task.project_id = uuid.UUID(project_id)
+
+        assignee = row.get('assigned_to')
+        if assignee:
+            task.assigned_to_id = self.users.get(assignee)
+            if task.assigned_to_id is None:
+                errors['assigned_to'] = [f'Unknown user: {assignee}']
+
+        creator = row.get('created_by')
+        task.created_by_id = self.users.get(creator) if creator else self.default_creator_id
+        if task.created_by_id is None:
+            errors['created_by'] = [f'Unknown user: {creator}' if creator else 'This field is required.']
+
+        task.tags = normalize_tags(row.get('tags'))
+        return task
+
+    def build_comments(self, task, rows, errors) -> list:
+        if not isinstance(rows, list):
+            errors['comments'] = ['Expected a list of comments.']
+            return []
+        comments = []
+        for index, comment in enumerate(rows, 1):
+            if not isinstance(comment, dict) or not comment.get('content'):
+                errors.setdefault('comments', []).append(f'Comment {index}: content is required.')
+                continue
+            author = comment.get('author')
+            author_id = self.users.get(author) if author else self.default_creator_id
+            if author_id is None:
+                errors.setdefault('comments', []).append(f'Comment {index}: unknown author {author}.')
+                continue
+            comments.append(TaskComment(task=task, author_id=author_id, content=comment['content']))
+        return comments
+
+    def create_task_tags(self, tasks) -> None:
+        tags = get_or_create_tags(name for task in tasks for name in task.tags)
+        TaskTag.objects.bulk_create([
+            TaskTag(task=task, tag=tags[name], project_id=task.project_id)
+            for task in tasks for name in task.tags
+        ])
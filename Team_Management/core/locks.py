@@ -0,0 +1,78 @@
+import os
+import socket
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import JobLock
+
+
+class LockLost(Exception):
+    """The lease expired and was taken over by another node."""
+
+
+class Lease:
+    def __init__(self, name: str, owner: str, ttl: timedelta):
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+
+    def renew(self) -> None:
+        """Extend the lease; call it between batches of a long run."""
+        renewed = JobLock.objects.filter(name=self.name, owner=self.owner).update(
+            locked_until=timezone.now() + self.ttl,
+        )
+        if not renewed:
+            raise LockLost(self.name)
+
+    def release(self, completed: bool = False) -> None:
+        now = timezone.now()
+        fields = {'owner': '', 'locked_until': now}
+        if completed:
+            fields['last_completed_at'] = now
+        JobLock.objects.filter(name=self.name, owner=self.owner).update(**fields)
+
+
+def acquire_lock(name: str, ttl: timedelta, min_interval: timedelta = None):
+    """
+    Take the lease on ``name`` with a single conditional UPDATE (or the
+    INSERT creating it), so of several nodes starting the job at once only
+    one gets it. Returns None when the lease is held, or when a run
+    completed less than ``min_interval`` ago.
+    """
+    now = timezone.now()
+    owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'[-64:]
+    free = Q(locked_until__lte=now)
+    if min_interval is not None:
+        free &= Q(last_completed_at__isnull=True) | Q(last_completed_at__lte=now - min_interval)
+    if JobLock.objects.filter(free, name=name).update(owner=owner, locked_until=now + ttl):
+        return Lease(name, owner, ttl)
+    try:
+        with transaction.atomic():
+            JobLock.objects.create(name=name, owner=owner, locked_until=now + ttl)
+    except IntegrityError:
+        return None
+    return Lease(name, owner, ttl)
+
+
+@contextmanager
+def job_lock(name: str, ttl: timedelta, min_interval: timedelta = None, record: bool = True):
+    """
+    Run the block under the lease on ``name``; yields None, without running
+    anything on the caller's behalf, when it could not be taken. A block that
+    finishes normally is recorded as the last completed run if ``record``.
+    """
+    lease = acquire_lock(name, ttl, min_interval)
+    if lease is None:
+        yield None
+        return
+    try:
+        yield lease
+    except BaseException:
+        lease.release()
+        raise
+    lease.release(completed=record)
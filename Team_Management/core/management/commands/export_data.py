@@ -0,0 +1,44 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_KINDS, iter_export
+from core.models import Project
+
+
+class Command(BaseCommand):
+    help = "Stream a project's or every project's tasks, comments or memberships as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=EXPORT_KINDS)
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--project', help='Export only this project (UUID)')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Number of rows fetched from the database cursor at a time')
+
+    def handle(self, *args, **options):
+        project_id = options['project']
+        if project_id:
+            try:
+                project_id = uuid.UUID(project_id)
+            except ValueError:
+                raise CommandError(f'Invalid project id: {project_id}')
+            if not Project.objects.filter(pk=project_id).exists():
+                raise CommandError(f'Project {project_id} does not exist')
+
+        lines = iter_export(options['kind'], options['export_format'],
+                            project_id=project_id, chunk_size=options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        if options['export_format'] == 'csv':
+            count -= 1  # header
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} {options['kind']} to {options['output']}"))
@@ -0,0 +1,60 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, TaskImporter, read_rows
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Bulk import tasks (and, from JSONL, their comments) from a CSV or JSONL file in the export format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS,
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Number of rows validated and inserted per batch')
+        parser.add_argument('--creator', help='Username recorded as creator of rows without created_by')
+        parser.add_argument('--errors', help='File receiving one JSON line per rejected row')
+
+    def handle(self, *args, **options):
+        import_format = options['import_format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError('Cannot tell the input format, pass --format')
+        creator = None
+        if options['creator']:
+            creator = User.objects.filter(username=options['creator']).first()
+            if creator is None:
+                raise CommandError(f"Unknown user: {options['creator']}")
+
+        error_file = open(options['errors'], 'w', encoding='utf-8') if options['errors'] else None
+
+        def on_error(line_no, row, errors):
+            if error_file:
+                error_file.write(json.dumps({'line': line_no, 'errors': errors, 'row': row}, default=str) + '\n')
+
+        def on_batch(result):
+            self.stdout.write(
+                f'{result.rows} rows: {result.created} imported, {result.failed} rejected '
+                f'({result.rows_per_second:.0f} rows/sec)'
+            )
+
+        importer = TaskImporter(default_creator=creator, batch_size=options['batch_size'],
+                                on_error=on_error, on_batch=on_batch)
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                result = importer.run(read_rows(file, import_format))
+        except OSError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if error_file:
+                error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} tasks and {result.comments} comments, rejected {result.failed} rows '
+            f'in {result.elapsed:.1f}s ({result.rows_per_second:.0f} rows/sec)'
+        ))
+        if result.failed and error_file:
+            self.stdout.write(f"Rejected rows were written to {options['errors']}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized per-status task counters stored on each project'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of projects recounted per query batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = None
+        total = 0
+        while True:
+            batch = Project.objects.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            project_ids = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not project_ids:
+                break
+            total += Project.objects.filter(pk__in=project_ids).recount_task_counters()
+            last_pk = project_ids[-1]
+            self.stdout.write(f'Recounted {total} projects...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt task counters for {total} projects'))
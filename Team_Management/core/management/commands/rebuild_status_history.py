@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.history import HISTORY_BATCH_SIZE, rebuild_all_status_days
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily status rollup (burndown, cumulative flow and cycle time) from the status log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=HISTORY_BATCH_SIZE,
+                            help='Number of projects rebuilt per query batch')
+
+    def handle(self, *args, **options):
+        total = rebuild_all_status_days(
+            options['batch_size'], on_batch=lambda total: self.stdout.write(f'Rebuilt {total} projects...'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the status history of {total} projects'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.workload import WORKLOAD_BATCH_SIZE, rebuild_all_workload
+
+
+class Command(BaseCommand):
+    help = 'Recompute the workload rollup (task counts and hours per project, assignee and due day)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=WORKLOAD_BATCH_SIZE,
+                            help='Number of projects rebuilt per query batch')
+
+    def handle(self, *args, **options):
+        total = rebuild_all_workload(
+            options['batch_size'], on_batch=lambda total: self.stdout.write(f'Rebuilt {total} projects...'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the workload rollup of {total} projects'))
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.locks import LockLost, job_lock
+from core.reminders import REMINDER_BATCH_SIZE, send_overdue_reminders
+
+REMINDER_LOCK = 'send_overdue_reminders'
+
+
+class Command(BaseCommand):
+    help = 'Email each assignee one reminder listing their overdue open tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REMINDER_BATCH_SIZE,
+                            help='Number of tasks read per index scan batch')
+        parser.add_argument('--min-interval', type=float, default=20,
+                            help='Hours that must pass since the last completed run (default: 20)')
+        parser.add_argument('--lock-ttl', type=int, default=600,
+                            help='Seconds the lock is held between batches before another node may take over')
+        parser.add_argument('--force', action='store_true', help='Run even if the last run was recent')
+        parser.add_argument('--dry-run', action='store_true', help='Build the reminders without sending them')
+
+    def handle(self, *args, **options):
+        min_interval = None if options['force'] else timedelta(hours=options['min_interval'])
+        with job_lock(REMINDER_LOCK, timedelta(seconds=options['lock_ttl']), min_interval,
+                      record=not options['dry_run']) as lease:
+            if lease is None:
+                self.stdout.write('Skipped: another node is running the job or it ran less than '
+                                  f"{options['min_interval']:g} hours ago")
+                return
+            try:
+                result = send_overdue_reminders(batch_size=options['batch_size'], dry_run=options['dry_run'],
+                                                on_batch=lease.renew)
+            except LockLost:
+                self.stderr.write(self.style.ERROR('Lost the job lock to another node, stopping'))
+                return
+
+        verb = 'Would send' if options['dry_run'] else 'Sent'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.sent} reminders for {result.tasks} overdue tasks '
+            f'({result.skipped} assignees without an active email address skipped)'
+        ))
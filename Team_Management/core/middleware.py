@@ -0,0 +1,28 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .activity import activity_buffer
+
+
+class ActivityMiddleware:
+    """
+    Write the activity recorded while serving a request with one bulk INSERT
+    once the response is ready, attributed to the requesting user.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with activity_buffer.hold(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # The buffer is per thread, which an event loop shares between requests; async
+        # views (the event streams) record no activity, so they are passed straight through.
+        return await self.get_response(request)
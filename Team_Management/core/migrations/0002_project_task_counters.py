@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2025-08-20 10:12
+
+from django.db import migrations, models
+
+
+def backfill_task_counters(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    Task = apps.get_model('core', 'Task')
+    fields = {
+        'todo': 'todo_task_count',
+        'in_progress': 'in_progress_task_count',
+        'review': 'review_task_count',
+        'completed': 'completed_task_count',
+        'cancelled': 'cancelled_task_count',
+    }
+    counts = {}
+    rows = Task.objects.order_by().values_list('project_id', 'status').annotate(count=models.Count('pk'))
+    for project_id, status, count in rows:
+        if status in fields:
+            counts.setdefault(project_id, {})[fields[status]] = count
+    for project_id, values in counts.items():
+        Project.objects.filter(pk=project_id).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='cancelled_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='review_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
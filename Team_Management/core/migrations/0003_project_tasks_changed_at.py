@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2025-08-21 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_project_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2025-08-26 16:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_task_tags(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    Tag = apps.get_model('core', 'Tag')
+    TaskTag = apps.get_model('core', 'TaskTag')
+    tag_ids = {}
+    batch = []
+    for task_id, project_id, tags in Task.objects.values_list('pk', 'project_id', 'tags').iterator(chunk_size=2000):
+        names = {' '.join(str(tag).split()).lower()[:50] for tag in (tags or [])} - {''}
+        for name in names:
+            if name not in tag_ids:
+                tag_ids[name] = Tag.objects.get_or_create(name=name)[0].pk
+            batch.append(TaskTag(task_id=task_id, tag_id=tag_ids[name], project_id=project_id))
+        if len(batch) >= 2000:
+            TaskTag.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TaskTag.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tag',
+                'verbose_name_plural': 'Tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='core.project')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='core.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='core.task')),
+            ],
+            options={
+                'verbose_name': 'Task Tag',
+                'verbose_name_plural': 'Task Tags',
+                'indexes': [models.Index(fields=['tag', 'task'], name='tasktag_tag_task_idx'), models.Index(fields=['project', 'tag'], name='tasktag_project_tag_idx')],
+                'unique_together': {('task', 'tag')},
+            },
+        ),
+        migrations.RunPython(backfill_task_tags, migrations.RunPython.noop),
+    ]
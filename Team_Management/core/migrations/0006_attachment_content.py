@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2025-08-28 11:52
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_task_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to=core.models.attachment_content_path)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Attachment Content',
+                'verbose_name_plural': 'Attachment Contents',
+            },
+        ),
+        migrations.AlterField(
+            model_name='taskattachment',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='task_attachments/'),
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='content',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='core.attachmentcontent'),
+        ),
+    ]
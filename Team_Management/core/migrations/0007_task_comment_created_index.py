@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2025-08-29 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_attachment_content'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(fields=['task', '-created_at', '-id'], name='taskcomment_task_created_idx'),
+        ),
+    ]
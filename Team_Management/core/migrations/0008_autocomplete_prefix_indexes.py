@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2025-08-30 09:41
+
+from django.db import migrations
+
+# Columns searched with __istartswith by core.autocomplete
+PREFIX_INDEXES = [
+    ('core_user_username_prefix_idx', 'core_user', 'username'),
+    ('core_user_first_name_prefix_idx', 'core_user', 'first_name'),
+    ('core_user_last_name_prefix_idx', 'core_user', 'last_name'),
+    ('core_project_title_prefix_idx', 'core_project', 'title'),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """
+    Case-insensitive prefix lookups need a vendor-specific index: PostgreSQL
+    compares UPPER(column::text) with LIKE, so it needs an expression index
+    with text_pattern_ops; SQLite's LIKE is case-insensitive and only uses an
+    index with NOCASE collation. Other backends keep scanning.
+    """
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    for name, table, column in PREFIX_INDEXES:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE INDEX {quote(name)} ON {quote(table)} (UPPER({quote(column)}::text) text_pattern_ops)'
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'CREATE INDEX {quote(name)} ON {quote(table)} ({quote(column)} COLLATE NOCASE)')
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    for name, table, column in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_task_comment_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.5 on 2025-08-31 10:12
+
+import itertools
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE core_searchentry_fts USING fts5("
+    "title, body, content='core_searchentry', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER core_searchentry_au AFTER UPDATE OF title, body ON core_searchentry BEGIN "
+    "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO core_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+POSTGRES_TSVECTOR = [
+    "ALTER TABLE core_searchentry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED",
+    "CREATE INDEX core_searchentry_vector_idx ON core_searchentry USING GIN (search_vector)",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    """
+    The full-text index is maintained by the database so that every write to
+    core_searchentry, bulk or not, keeps it current. Other backends have no
+    index and core.search falls back to icontains.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = SQLITE_FTS if vendor == 'sqlite' else POSTGRES_TSVECTOR if vendor == 'postgresql' else []
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for trigger in ('core_searchentry_ai', 'core_searchentry_ad', 'core_searchentry_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        schema_editor.execute('DROP TABLE IF EXISTS core_searchentry_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS core_searchentry_vector_idx')
+        schema_editor.execute('ALTER TABLE core_searchentry DROP COLUMN IF EXISTS search_vector')
+
+
+def backfill_search_entries(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    Task = apps.get_model('core', 'Task')
+    TaskComment = apps.get_model('core', 'TaskComment')
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    db = schema_editor.connection.alias
+
+    projects = Project.objects.using(db).values_list('pk', 'title', 'description')
+    tasks = Task.objects.using(db).values_list('pk', 'project_id', 'assigned_to_id', 'title', 'description')
+    comments = TaskComment.objects.using(db).values_list(
+        'pk', 'task_id', 'task__project_id', 'task__assigned_to_id', 'content',
+    )
+    entries = itertools.chain(
+        (
+            SearchEntry(kind='project', object_id=str(pk), project_id=pk, title=title, body=description)
+            for pk, title, description in projects.iterator(chunk_size=2000)
+        ),
+        (
+            SearchEntry(kind='task', object_id=str(pk), project_id=project_id, task_id=pk,
+                        assignee_id=assigned_to_id, title=title, body=description)
+            for pk, project_id, assigned_to_id, title, description in tasks.iterator(chunk_size=2000)
+        ),
+        (
+            SearchEntry(kind='comment', object_id=str(pk), project_id=project_id, task_id=task_id,
+                        assignee_id=assigned_to_id, body=content)
+            for pk, task_id, project_id, assigned_to_id, content in comments.iterator(chunk_size=2000)
+        ),
+    )
+    while batch := list(itertools.islice(entries, 2000)):
+        SearchEntry.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('task', 'Task'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.CharField(max_length=36)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.task')),
+            ],
+            options={
+                'verbose_name': 'Search Entry',
+                'verbose_name_plural': 'Search Entries',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2025-09-02 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLock',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('owner', models.CharField(blank=True, max_length=64)),
+                ('locked_until', models.DateTimeField()),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Job Lock',
+                'verbose_name_plural': 'Job Locks',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['todo', 'in_progress', 'review'])), fields=['due_date', 'id'], name='task_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2025-09-03 09:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+OPEN_STATUSES = ['todo', 'in_progress', 'review']
+
+
+def backfill_workload_rollup(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    WorkloadRollup = apps.get_model('core', 'WorkloadRollup')
+    db = schema_editor.connection.alias
+    is_open = Q(status__in=OPEN_STATUSES)
+    rows = (
+        Task.objects.using(db).order_by()
+        .values('project_id', 'assigned_to_id', due_day=TruncDate('due_date'))
+        .annotate(
+            tasks=Count('pk'),
+            open_tasks=Count('pk', filter=is_open),
+            estimated=Coalesce(Sum('estimated_hours'), 0),
+            actual=Coalesce(Sum('actual_hours'), 0),
+            open_estimated=Coalesce(Sum('estimated_hours', filter=is_open), 0),
+        )
+    )
+    WorkloadRollup.objects.using(db).bulk_create([
+        WorkloadRollup(
+            project_id=row['project_id'], assignee_id=row['assigned_to_id'], due_day=row['due_day'],
+            task_count=row['tasks'], open_task_count=row['open_tasks'], estimated_hours=row['estimated'],
+            actual_hours=row['actual'], open_estimated_hours=row['open_estimated'],
+        ) for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_overdue_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkloadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_day', models.DateField()),
+                ('task_count', models.IntegerField(default=0)),
+                ('open_task_count', models.IntegerField(default=0)),
+                ('estimated_hours', models.IntegerField(default=0)),
+                ('actual_hours', models.IntegerField(default=0)),
+                ('open_estimated_hours', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+            ],
+            options={
+                'verbose_name': 'Workload Rollup',
+                'verbose_name_plural': 'Workload Rollups',
+                'indexes': [models.Index(fields=['assignee', 'due_day'], name='workload_assignee_day_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('assignee__isnull', False)), fields=('project', 'assignee', 'due_day'), name='workload_bucket_unique'), models.UniqueConstraint(condition=models.Q(('assignee__isnull', True)), fields=('project', 'due_day'), name='workload_unassigned_bucket_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_workload_rollup, migrations.RunPython.noop),
+    ]
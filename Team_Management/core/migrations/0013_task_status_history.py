@@ -0,0 +1,80 @@
+# Generated by Django 5.2.5 on 2025-09-04 10:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_status_history(apps, schema_editor):
+    """Log every existing task as entering its current status when it was created."""
+    Task = apps.get_model('core', 'Task')
+    TaskStatusChange = apps.get_model('core', 'TaskStatusChange')
+    ProjectStatusDay = apps.get_model('core', 'ProjectStatusDay')
+    db = schema_editor.connection.alias
+    tasks = Task.objects.using(db).order_by().values_list('pk', 'project_id', 'status', 'created_at')
+    batch = []
+    for task_id, project_id, status, created_at in tasks.iterator(chunk_size=2000):
+        batch.append(TaskStatusChange(
+            task_id=task_id, project_id=project_id, old_status='', new_status=status, changed_at=created_at,
+        ))
+        if len(batch) == 2000:
+            TaskStatusChange.objects.using(db).bulk_create(batch)
+            batch = []
+    TaskStatusChange.objects.using(db).bulk_create(batch)
+
+    rows = (
+        Task.objects.using(db).order_by()
+        .values_list('project_id', TruncDate('created_at'), 'status')
+        .annotate(count=Count('pk'))
+    )
+    ProjectStatusDay.objects.using(db).bulk_create([
+        ProjectStatusDay(project_id=project_id, day=day, status=status, entered=count)
+        for project_id, day, status, count in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_workload_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('entered', models.IntegerField(default=0)),
+                ('left', models.IntegerField(default=0)),
+                ('cycle_time_count', models.IntegerField(default=0)),
+                ('cycle_time_seconds', models.BigIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+            ],
+            options={
+                'verbose_name': 'Project Status Day',
+                'verbose_name_plural': 'Project Status Days',
+                'unique_together': {('project', 'day', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(blank=True, max_length=20)),
+                ('new_status', models.CharField(blank=True, max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+                ('task', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.task')),
+            ],
+            options={
+                'verbose_name': 'Task Status Change',
+                'verbose_name_plural': 'Task Status Changes',
+                'indexes': [models.Index(fields=['task', 'changed_at'], name='statuschange_task_idx'), models.Index(fields=['project', 'changed_at'], name='statuschange_project_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_status_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2025-09-05 11:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_task_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('depends_on', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependents', to='core.task')),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='task_dependencies', to='core.project')),
+                ('task', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='core.task')),
+            ],
+            options={
+                'verbose_name': 'Task Dependency',
+                'verbose_name_plural': 'Task Dependencies',
+                'indexes': [models.Index(fields=['project'], name='taskdependency_project_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('task', models.F('depends_on')), _negated=True), name='taskdependency_not_self')],
+                'unique_together': {('task', 'depends_on')},
+            },
+        ),
+    ]
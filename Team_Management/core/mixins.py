@@ -0,0 +1,31 @@
+from .permissions import MANAGER_ROLES, get_project_role, is_admin
+
+
+class ProjectObjectMixin:
+    """
+    Single-object views over a project or something inside one. The object is
+    fetched once per request from the user's visible_to() queryset and tagged
+    with ``viewer_role`` from the user's cached project role map (see
+    core.permissions), so test_func() and the handler share one query.
+    """
+    # Field on the model holding the project id: 'pk' for Project, 'project_id' for Task
+    project_field = 'pk'
+    manager_roles = MANAGER_ROLES
+
+    def get_queryset(self):
+        return self.model.objects.visible_to(self.request.user)
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+            self._object.viewer_role = get_project_role(self.request.user, getattr(self._object, self.project_field))
+        return self._object
+
+    @property
+    def is_admin(self) -> bool:
+        return is_admin(self.request.user)
+
+    def is_project_manager(self, obj) -> bool:
+        return obj.viewer_role in self.manager_roles
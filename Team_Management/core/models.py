@@ -1,10 +1,13 @@
-from os import name
-from django.db import models
+import os
+from django.db import models, router, transaction
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 import uuid
 
+from .uploads import file_sha256
+
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -33,6 +36,67 @@ class User(AbstractUser):
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}".strip() or self.username
 
+class ProjectQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """
+        Projects the user owns or is an active member of. Membership is an
+        EXISTS subquery, so rows are never duplicated by the M2M join.
+        """
+        queryset = self.select_related('owner')
+        if user.role == 'admin':
+            return queryset
+        membership = ProjectMember.objects.filter(project=models.OuterRef('pk'), user=user, is_active=True)
+        return queryset.filter(models.Q(models.Exists(membership)) | models.Q(owner=user))
+
+    def recount_task_counters(self) -> int:
+        """
+        Recompute the denormalized per-status task counters of the selected
+        projects with a single GROUP BY over their tasks.
+        """
+        from .counters import project_counters
+        from .events import progress_event, send_events
+
+        project_ids = list(self.values_list('pk', flat=True))
+        if not project_ids:
+            return 0
+        # The recount already sees every task write made so far; pending deltas would double count
+        project_counters.discard(project_ids, using=self.db)
+        counts = {pk: dict.fromkeys(Project.TASK_COUNTER_FIELDS.values(), 0) for pk in project_ids}
+        rows = (
+            Task.objects.using(self.db).filter(project_id__in=project_ids)
+            .order_by()
+            .values_list('project_id', 'status')
+            .annotate(count=models.Count('pk'))
+        )
+        for project_id, status, count in rows:
+            field = Project.TASK_COUNTER_FIELDS.get(status)
+            if field:
+                counts[project_id][field] = count
+        now = timezone.now()
+        for project_id, fields in counts.items():
+            Project.objects.using(self.db).filter(pk=project_id).update(tasks_changed_at=now, **fields)
+        events = [progress_event(project_id, fields) for project_id, fields in counts.items()]
+        transaction.on_commit(lambda: send_events(events, using=self.db), using=self.db)
+        return len(project_ids)
+
+    def update(self, **kwargs):
+        """Expire the role maps and dashboards of the old and new owners when a bulk update changes ``owner``."""
+        if not {'owner', 'owner_id'} & kwargs.keys():
+            return super().update(**kwargs)
+        from .dashboard import invalidate_dashboards
+        from .permissions import invalidate_project_roles
+
+        with transaction.atomic(using=self.db):
+            owner_ids = set(self.order_by().values_list('owner_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+        owner = kwargs.get('owner', kwargs.get('owner_id'))
+        owner_ids.add(owner.pk if isinstance(owner, User) else owner)
+        invalidate_project_roles(*owner_ids, using=self.db)
+        invalidate_dashboards(user_ids=owner_ids, using=self.db)
+        return rows
+
+
 class Project(models.Model):   # managing projects
     
     status_choices = [
@@ -62,29 +126,110 @@ class Project(models.Model):   # managing projects
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_projects')
     members = models.ManyToManyField(User, through='ProjectMember', related_name='projects')
 
+    # Denormalized task counters, one per Task status (see TASK_COUNTER_FIELDS)
+    todo_task_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_task_count = models.PositiveIntegerField(default=0, editable=False)
+    review_task_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_task_count = models.PositiveIntegerField(default=0, editable=False)
+    cancelled_task_count = models.PositiveIntegerField(default=0, editable=False)
+    tasks_changed_at = models.DateTimeField(blank=True, null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    TASK_COUNTER_FIELDS = {
+        'todo': 'todo_task_count',
+        'in_progress': 'in_progress_task_count',
+        'review': 'review_task_count',
+        'completed': 'completed_task_count',
+        'cancelled': 'cancelled_task_count',
+    }
+
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Project'
         verbose_name_plural = 'Projects'
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='project_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='project_created_idx'),
+        ]
     
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored owner so signals can expire both owners' role maps
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_owner_id = instance.__dict__.get('owner_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Task counters are written by task changes only; a stale instance must not overwrite them
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            task_fields = {*self.TASK_COUNTER_FIELDS.values(), 'tasks_changed_at'}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in task_fields
+            ]
+        super().save(*args, **kwargs)
+        self._loaded_owner_id = self.owner_id
+
+    @property
+    def task_count(self) -> int:
+        return sum(getattr(self, field) for field in self.TASK_COUNTER_FIELDS.values())
+
     @property
-    def progress(self) -> float:    #Calculate project progress based on completed tasks
-        total_tasks = self.tasks.count()
+    def progress(self) -> float:    #Calculate project progress from the stored task counters
+        total_tasks = self.task_count
         if total_tasks == 0:
             return 0
-        completed_tasks = self.tasks.filter(status='completed').count()
-        return round((completed_tasks / total_tasks) * 100, 2)
+        return round((self.completed_task_count / total_tasks) * 100, 2)
 
     @property
     def is_overdue(self) -> bool:
         return timezone.now().date() > self.end_date and self.status != 'completed'
 
+class ProjectMemberQuerySet(models.QuerySet):
+    """
+    Bulk writes skip the model signals that expire cached role maps (see
+    core.permissions) and dashboard stats (see core.dashboard), so these
+    expire them for every affected user.
+    """
+
+    def _user_ids(self) -> set:
+        return set(self.order_by().values_list('user_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        from .dashboard import invalidate_dashboards
+        from .permissions import invalidate_project_roles
+
+        with transaction.atomic(using=self.db):
+            user_ids = self._user_ids()
+            rows = super().update(**kwargs)
+        user = kwargs.get('user', kwargs.get('user_id'))
+        if user is not None:
+            user_ids.add(user.pk if isinstance(user, User) else user)
+        invalidate_project_roles(*user_ids, using=self.db)
+        invalidate_dashboards(user_ids=user_ids, using=self.db)
+        return rows
+
+    def delete(self):
+        from .dashboard import invalidate_dashboards
+        from .permissions import invalidate_project_roles
+
+        user_ids = self._user_ids()
+        result = super().delete()
+        invalidate_project_roles(*user_ids, using=self.db)
+        invalidate_dashboards(user_ids=user_ids, using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class ProjectMember(models.Model):
     # Through model for Project-Member relationship with additional fields
     ROLE_CHOICES = [
@@ -102,14 +247,182 @@ class ProjectMember(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectMemberQuerySet.as_manager()
+
     class Meta:
         unique_together = ['project', 'user']
         verbose_name = 'Project Member'
         verbose_name_plural = 'Project Members'
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='projectmember_user_active_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} - {self.project.title} ({self.get_role_display()})"
 
+# Task attributes rolled up into WorkloadRollup (see core.workload)
+WORKLOAD_FIELDS = ('project_id', 'assigned_to_id', 'due_date', 'status', 'estimated_hours', 'actual_hours')
+# Task attributes copied into its SearchEntry (see core.search)
+SEARCH_VALUES = ('title', 'description', 'project_id', 'assigned_to_id')
+
+
+class TaskQuerySet(models.QuerySet):
+    # Fields that decide a task's WorkloadRollup bucket and totals
+    ROLLUP_FIELDS = {
+        'project', 'project_id', 'assigned_to', 'assigned_to_id', 'due_date', 'status',
+        'estimated_hours', 'actual_hours',
+    }
+    # Columns copied into SearchEntry (see core.search)
+    SEARCH_FIELDS = {'title', 'description', 'project', 'project_id', 'assigned_to', 'assigned_to_id'}
+    # Columns the cached dependency graph shows (see core.dependencies)
+    GRAPH_FIELDS = {'title', 'status', 'due_date', 'estimated_hours', 'project', 'project_id'}
+    # Columns mirrored into TaskTag (see core.tags)
+    TAG_FIELDS = {'tags', 'project', 'project_id'}
+
+    def visible_to(self, user):
+        """
+        Tasks in projects the user is an active member of, plus tasks
+        assigned to them, without joining through the membership table.
+        """
+        queryset = self.select_related('project', 'assigned_to')
+        if user.role == 'admin':
+            return queryset
+        membership = ProjectMember.objects.filter(project=models.OuterRef('project_id'), user=user, is_active=True)
+        return queryset.filter(models.Q(models.Exists(membership)) | models.Q(assigned_to=user))
+
+    def update(self, **kwargs):
+        """
+        Keep the project task counters and workload rollups in sync when a
+        bulk update touches ``status``, moves tasks to another project or
+        changes what they add to a workload, the search index when it
+        touches indexed or visibility fields, the TaskTag mirror when it
+        touches tags or the project, and the dependency graphs of the
+        projects involved.
+        """
+        recount = bool({'status', 'project', 'project_id'} & kwargs.keys())
+        rollup = bool(self.ROLLUP_FIELDS & kwargs.keys())
+        reindex = bool(self.SEARCH_FIELDS & kwargs.keys())
+        retag = bool(self.TAG_FIELDS & kwargs.keys())
+        regraph = bool(self.GRAPH_FIELDS & kwargs.keys())
+        if not recount and not rollup and not reindex and not retag and not regraph:
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            if reindex or retag:
+                # Matched before the UPDATE, which may change what the filters match
+                task_ids = list(self.order_by().values_list('pk', flat=True))
+            if recount:
+                moved = list(self.order_by().values_list('pk', 'project_id', 'status', 'created_at'))
+                project_ids = {project_id for pk, project_id, status, created_at in moved}
+            elif rollup or regraph:
+                project_ids = set(self.order_by().values_list('project_id', flat=True).distinct())
+            assignee_ids = set()
+            if {'assigned_to', 'assigned_to_id'} & kwargs.keys():
+                # Old assignees outside the project no longer show up among its users
+                assignee_ids = set(self.order_by().values_list('assigned_to_id', flat=True).distinct())
+                assignee = kwargs.get('assigned_to', kwargs.get('assigned_to_id'))
+                assignee_ids.add(assignee.pk if isinstance(assignee, User) else assignee)
+            rows = super().update(**kwargs)
+            if recount or rollup or regraph:
+                target = kwargs.get('project', kwargs.get('project_id'))
+                if isinstance(target, Project):
+                    target = target.pk
+                if target is not None:
+                    target = Project._meta.pk.to_python(target)
+                    project_ids.add(target)
+            if recount:
+                Project.objects.filter(pk__in=project_ids).recount_task_counters()
+                self._log_status_changes(moved, target, kwargs.get('status'))
+                if target is not None:
+                    from .dependencies import move_task_dependencies
+                    move_task_dependencies([row[0] for row in moved], target, using=self.db)
+            if rollup:
+                from .dashboard import invalidate_dashboards
+                from .workload import rebuild_workload
+                rebuild_workload(project_ids, using=self.db)
+                # The rollup fields are the ones the dashboard stats count by
+                invalidate_dashboards(project_ids, assignee_ids, using=self.db)
+            if reindex:
+                from .search import reindex_tasks
+                reindex_tasks(task_ids, using=self.db)
+            if retag:
+                from .tags import retag_tasks
+                retag_tasks(task_ids, using=self.db)
+            if regraph:
+                from .dependencies import invalidate_project_graph
+                invalidate_project_graph(*project_ids, using=self.db)
+        return rows
+
+    def _log_status_changes(self, moved, target_project_id, new_status) -> None:
+        """Log the transitions of an update() from the rows it matched."""
+        from .history import log_status_changes
+
+        if new_status is not None and not isinstance(new_status, str):
+            return  # An expression; the new statuses are unknown
+        changes = []
+        for pk, project_id, status, created_at in moved:
+            to_project_id = target_project_id or project_id
+            to_status = new_status or status
+            if to_project_id == project_id:
+                changes.append((pk, project_id, status, to_status, created_at))
+            else:
+                changes += [(pk, project_id, status, '', created_at), (pk, to_project_id, '', to_status, created_at)]
+        log_status_changes(changes, using=self.db)
+
+    def set_statuses(self, changes: dict) -> int:
+        """
+        Apply ``{task_pk: status}`` to tasks of this queryset with one UPDATE
+        per target status. Counters and workload rollups are moved from the
+        locked prior statuses rather than recounted, and each change is
+        logged and recorded as activity. Raises ``Task.DoesNotExist`` without writing
+        anything if some of the tasks are not part of this queryset.
+        """
+        from .activity import record_activity
+        from .counters import record_task_move
+        from .dashboard import invalidate_dashboards
+        from .dependencies import invalidate_project_graph
+        from .history import log_status_changes
+        from .workload import record_task_workload
+
+        status_index = WORKLOAD_FIELDS.index('status')
+        with transaction.atomic(using=self.db):
+            current = {
+                str(pk): (pk, title, created_at, workload)
+                for pk, title, created_at, *workload in self.filter(pk__in=list(changes))
+                .select_for_update().order_by().values_list('pk', 'title', 'created_at', *WORKLOAD_FIELDS)
+            }
+            missing = {str(pk) for pk in changes} - current.keys()
+            if missing:
+                raise Task.DoesNotExist(f"Tasks not found: {', '.join(sorted(missing))}")
+
+            by_status = {}
+            transitions = []
+            for key, new_status in changes.items():
+                pk, title, created_at, workload = current[str(key)]
+                project_id, old_status = workload[0], workload[status_index]
+                if old_status != new_status:
+                    by_status.setdefault(new_status, []).append(pk)
+                    transitions.append((pk, project_id, old_status, new_status, created_at))
+                    record_task_move(project_id, old_status, project_id, new_status, using=self.db)
+                    new_workload = list(workload)
+                    new_workload[status_index] = new_status
+                    record_task_workload(tuple(workload), tuple(new_workload), using=self.db)
+                    record_activity('status_changed', project_id, pk, using=self.db,
+                                    title=title, old_status=old_status, status=new_status)
+
+            now = timezone.now()
+            updated = 0
+            for new_status, pks in by_status.items():
+                updated += super(TaskQuerySet, Task.objects.using(self.db).filter(pk__in=pks)).update(
+                    status=new_status, updated_at=now,
+                )
+            log_status_changes(transitions, using=self.db, when=now)
+            project_ids = {change[1] for change in transitions}
+            invalidate_project_graph(*project_ids, using=self.db)
+            invalidate_dashboards(project_ids, using=self.db)
+        return updated
+
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ('todo', 'To Do'),
@@ -141,22 +454,166 @@ class Task(models.Model):
     tags = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
     
+    OPEN_STATUSES = ['todo', 'in_progress', 'review']
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
+        indexes = [
+            models.Index(fields=['project', 'status', '-created_at', '-id'], name='task_project_status_idx'),
+            models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(
+                fields=['due_date', 'id'], name='task_open_due_idx',
+                condition=models.Q(status__in=['todo', 'in_progress', 'review']),
+            ),
+            models.Index(fields=['-created_at', '-id'], name='task_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} - {self.project.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored project/status so signals can adjust counters
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_tags = instance.__dict__.get('tags')
+        instance._loaded_assigned_to_id = instance.__dict__.get('assigned_to_id')
+        instance._loaded_workload = instance.workload_values() if set(WORKLOAD_FIELDS) <= instance.__dict__.keys() else None
+        instance._loaded_search = instance.search_values() if set(SEARCH_VALUES) <= instance.__dict__.keys() else None
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have compared against the old values; the saved row is the new baseline
+        self._loaded_project_id = self.project_id
+        self._loaded_status = self.status
+        self._loaded_tags = self.tags
+        self._loaded_assigned_to_id = self.assigned_to_id
+        self._loaded_workload = self.workload_values()
+        self._loaded_search = self.search_values()
+
+    def workload_values(self) -> tuple:
+        return tuple(getattr(self, name) for name in WORKLOAD_FIELDS)
+
+    def search_values(self) -> tuple:
+        return tuple(getattr(self, name) for name in SEARCH_VALUES)
+
     @property  
     def is_overdue(self) -> bool: #check if task is overdue
         return timezone.now() > self.due_date and self.status not in ['completed', 'cancelled']
 
+class Tag(models.Model):
+    # Normalized tag names, see core.tags.normalize_tags
+    name = models.CharField(max_length=50, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Tag'
+        verbose_name_plural = 'Tags'
+
+    def __str__(self) -> str:
+        return self.name
+
+class TaskTag(models.Model):
+    # Indexed mirror of Task.tags; project is denormalized for per-project tag clouds
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='task_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='task_tags')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_tags')
+
+    class Meta:
+        unique_together = ['task', 'tag']
+        verbose_name = 'Task Tag'
+        verbose_name_plural = 'Task Tags'
+        indexes = [
+            models.Index(fields=['tag', 'task'], name='tasktag_tag_task_idx'),
+            models.Index(fields=['project', 'tag'], name='tasktag_project_tag_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.tag.name} - {self.task.title}"
+
+class TaskDependency(models.Model):
+    # ``task`` cannot start before ``depends_on`` is done; both are in ``project`` (see core.dependencies)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependencies', db_index=False)
+    depends_on = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependents')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='task_dependencies', db_index=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['task', 'depends_on']
+        verbose_name = 'Task Dependency'
+        verbose_name_plural = 'Task Dependencies'
+        constraints = [
+            models.CheckConstraint(condition=~models.Q(task=models.F('depends_on')), name='taskdependency_not_self'),
+        ]
+        indexes = [
+            models.Index(fields=['project'], name='taskdependency_project_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task_id} -> {self.depends_on_id}"
+
+def attachment_content_path(instance, filename) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    return f"task_attachments/{instance.sha256[:2]}/{instance.sha256}{extension}"
+
+class AttachmentContentManager(models.Manager):
+
+    def store(self, file, sha256):
+        """
+        Return the content row for ``sha256`` with one more reference,
+        writing the file to storage only if this digest is new.
+        """
+        with transaction.atomic(using=self.db):
+            self.get_or_create(sha256=sha256, defaults={'size': file.size})
+            content = self.select_for_update().get(sha256=sha256)
+            if not content.file:
+                content.file.save(os.path.basename(file.name), file, save=False)
+            content.ref_count += 1
+            content.save(update_fields=['file', 'ref_count'])
+        return content
+
+    def release(self, pk) -> None:
+        """Drop one reference and delete the stored file with the last one."""
+        with transaction.atomic(using=self.db):
+            content = self.select_for_update().filter(pk=pk).first()
+            if content is None:
+                return
+            if content.ref_count > 1:
+                self.filter(pk=pk).update(ref_count=models.F('ref_count') - 1)
+                return
+            content.delete()
+            transaction.on_commit(lambda: content.file.delete(save=False), using=self.db)
+
+class AttachmentContent(models.Model):
+    # Deduplicated attachment bytes, addressed by SHA-256 and shared by reference
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=attachment_content_path, max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AttachmentContentManager()
+
+    class Meta:
+        verbose_name = 'Attachment Content'
+        verbose_name_plural = 'Attachment Contents'
+
+    def __str__(self) -> str:
+        return self.sha256
+
 class TaskAttachment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='task_attachments/')
+    file = models.FileField(upload_to='task_attachments/', max_length=255)
+    content = models.ForeignKey(AttachmentContent, on_delete=models.PROTECT, null=True, blank=True, related_name='attachments')
     filename = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField()
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -169,6 +626,20 @@ class TaskAttachment(models.Model):
     def __str__(self) -> str:
         return f"{self.filename} - {self.task.title}"
 
+    def save(self, *args, **kwargs):
+        # New uploads go to content-addressed storage, with metadata filled before the INSERT
+        if self._state.adding and self.file and not self.file._committed:
+            upload = self.file.file
+            self.filename = self.filename or os.path.basename(upload.name)
+            self.file_size = upload.size
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(TaskAttachment)):
+                self.content = AttachmentContent.objects.store(upload, file_sha256(upload))
+                self.file.name = self.content.file.name
+                self.file._committed = True
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
 
 class TaskComment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments')
@@ -181,11 +652,211 @@ class TaskComment(models.Model):
         ordering = ['created_at']
         verbose_name = 'Task Comment'
         verbose_name_plural = 'Task Comments'
+        indexes = [
+            models.Index(fields=['task', '-created_at', '-id'], name='taskcomment_task_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.author.username} - {self.task.title}"
 
 
+class SearchEntry(models.Model):
+    """
+    Searchable text of one project, task or comment, written from signals
+    (see core.search). The full-text index itself is kept in sync by the
+    database (migration 0009): an external-content FTS5 table fed by
+    triggers on SQLite, a generated tsvector column with a GIN index on
+    PostgreSQL. SQLite drops the triggers whenever Django rebuilds this
+    table, so schema changes here must recreate them.
+    """
+    KIND_CHOICES = [
+        ('project', 'Project'),
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=36)
+    # Visibility: project members see every entry, assignees the entries of their task
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    assignee = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        verbose_name = 'Search Entry'
+        verbose_name_plural = 'Search Entries'
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.object_id}"
+
+
+class Activity(models.Model):
+    """
+    Append-only record of something that happened in a project, written in
+    bulk by core.activity. Rows are inserted after the fact, so the foreign
+    keys carry no database constraint and the task may be gone by the time
+    the feed is read; what the feed shows is copied into ``data``.
+    """
+    VERB_CHOICES = [
+        ('status_changed', 'Changed the status of a task'),
+        ('commented', 'Commented on a task'),
+        ('attachment_added', 'Attached a file to a task'),
+        ('member_added', 'Added a member'),
+        ('member_removed', 'Removed a member'),
+    ]
+
+    # Looked up only through the (scope, created_at) indexes below
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='activities',
+                                db_constraint=False, db_index=False)
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, null=True, blank=True, related_name='+',
+                             db_constraint=False, db_index=False)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                              db_constraint=False, db_index=False)
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES)
+    data = models.JSONField(default=dict, blank=True)
+    # Set when the event is recorded, not when the buffer is flushed
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['project', '-created_at', '-id'], name='activity_project_created_idx'),
+            models.Index(fields=['actor', '-created_at', '-id'], name='activity_actor_created_idx'),
+        ]
+        verbose_name = 'Activity'
+        verbose_name_plural = 'Activities'
+
+    def __str__(self) -> str:
+        return f"{self.get_verb_display()} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class LiveEvent(models.Model):
+    """
+    Outbox of live update events for core.events.DatabaseBackend: stream
+    processes poll it by primary key, writers prune it after a short
+    retention.
+    """
+    channel = models.CharField(max_length=64)
+    kind = models.CharField(max_length=30)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['channel', 'id'], name='liveevent_channel_idx'),
+        ]
+        verbose_name = 'Live Event'
+        verbose_name_plural = 'Live Events'
+
+    def __str__(self) -> str:
+        return f"{self.channel} {self.kind}"
+
+
+class TaskStatusChange(models.Model):
+    """
+    Append-only log of task status transitions per project (see
+    core.history). A task entering a project, by creation or a move, has an
+    empty ``old_status``; leaving it, by deletion or a move, an empty
+    ``new_status``. Rows outlive their task.
+    """
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False,
+                             db_index=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', db_index=False)
+    old_status = models.CharField(max_length=20, blank=True)
+    new_status = models.CharField(max_length=20, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'changed_at'], name='statuschange_task_idx'),
+            models.Index(fields=['project', 'changed_at'], name='statuschange_project_idx'),
+        ]
+        verbose_name = 'Task Status Change'
+        verbose_name_plural = 'Task Status Changes'
+
+    def __str__(self) -> str:
+        return f"{self.task_id}: {self.old_status or '-'} -> {self.new_status or '-'}"
+
+
+class ProjectStatusDay(models.Model):
+    """
+    Tasks that entered and left each status of a project per day, kept up
+    to date from the status log. The running sum of ``entered - left`` is
+    the number of tasks in the status at the end of a day. Completions also
+    add their cycle time (first start to completion) to the day.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    entered = models.IntegerField(default=0)
+    left = models.IntegerField(default=0)
+    cycle_time_count = models.IntegerField(default=0)
+    cycle_time_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['project', 'day', 'status']
+        verbose_name = 'Project Status Day'
+        verbose_name_plural = 'Project Status Days'
+
+    def __str__(self) -> str:
+        return f"{self.project_id} {self.day} {self.status}"
+
+
+class WorkloadRollup(models.Model):
+    """
+    Task totals per project, assignee and due day, kept up to date by
+    core.workload so workload reports never scan the task table. Overdue
+    work is the open work of the buckets before today.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    assignee = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    due_day = models.DateField()
+    task_count = models.IntegerField(default=0)
+    open_task_count = models.IntegerField(default=0)
+    estimated_hours = models.IntegerField(default=0)
+    actual_hours = models.IntegerField(default=0)
+    open_estimated_hours = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'assignee', 'due_day'], name='workload_bucket_unique',
+                                    condition=models.Q(assignee__isnull=False)),
+            models.UniqueConstraint(fields=['project', 'due_day'], name='workload_unassigned_bucket_unique',
+                                    condition=models.Q(assignee__isnull=True)),
+        ]
+        indexes = [
+            models.Index(fields=['assignee', 'due_day'], name='workload_assignee_day_idx'),
+        ]
+        verbose_name = 'Workload Rollup'
+        verbose_name_plural = 'Workload Rollups'
+
+    def __str__(self) -> str:
+        return f"{self.project_id} {self.assignee_id} {self.due_day}"
+
+
+class JobLock(models.Model):
+    """
+    Lease held by one node running a scheduled job (see core.locks). A lease
+    whose ``locked_until`` has passed is free to take over, so a crashed run
+    cannot block the job for longer than its lease.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    owner = models.CharField(max_length=64, blank=True)
+    locked_until = models.DateTimeField()
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Job Lock'
+        verbose_name_plural = 'Job Locks'
+
+    def __str__(self) -> str:
+        return self.name
+
+
 class Team(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -0,0 +1,94 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk) -> str:
+    """Opaque token for the position after the row (created_at, pk)."""
+    payload = json.dumps([created_at.isoformat(), str(pk)]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, pk = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursor(token)
+    created_at = parse_datetime(created_at) if isinstance(created_at, str) else None
+    if created_at is None or not isinstance(pk, (str, int)) or isinstance(pk, bool):
+        raise InvalidCursor(token)
+    return created_at, pk
+
+
+@dataclass
+class CursorPage:
+    object_list: list
+    next_cursor: str = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate_by_cursor(queryset, cursor, per_page: int) -> CursorPage:
+    """
+    Newest-first keyset page over (created_at, pk). The cursor is turned into
+    a range predicate, so every page costs the same index seek and no
+    COUNT(*) is issued.
+    """
+    queryset = queryset.order_by('-created_at', '-pk')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        try:
+            pk = queryset.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise InvalidCursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    rows = list(queryset[:per_page + 1])
+    if len(rows) <= per_page:
+        return CursorPage(rows)
+    rows = rows[:per_page]
+    return CursorPage(rows, encode_cursor(rows[-1].created_at, rows[-1].pk))
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination for a ListView: any request carrying the
+    ``cursor`` query parameter (empty for the first page) is paged by cursor
+    instead of OFFSET, and no total count is computed.
+    """
+    cursor_query_param = 'cursor'
+
+    def uses_cursor(self) -> bool:
+        return self.cursor_query_param in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.uses_cursor():
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            page = paginate_by_cursor(queryset, self.request.GET.get(self.cursor_query_param), page_size)
+        except InvalidCursor:
+            raise Http404('Invalid cursor.')
+        return (None, page, page.object_list, False)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cursor_mode'] = self.uses_cursor()
+        return context
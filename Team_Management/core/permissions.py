@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+
+from .cache import bump_version, get_version
+from .models import Project, ProjectMember
+
+ROLE_CACHE_TIMEOUT = 60 * 60
+MANAGER_ROLES = ('owner', 'manager')
+CONTRIBUTOR_ROLES = ('owner', 'manager', 'member')
+
+
+def _roles_namespace(user_id) -> str:
+    return f'project-roles:{user_id}'
+
+
+def get_project_roles(user) -> dict:
+    """
+    ``{project_id (str): role}`` for every project the user owns or is an
+    active member of. Memoized on the user object for the rest of the
+    request and cached across requests until invalidate_project_roles().
+    """
+    roles = getattr(user, '_project_roles', None)
+    if roles is not None:
+        return roles
+
+    cache_key = f'{_roles_namespace(user.pk)}:{get_version(_roles_namespace(user.pk))}'
+    roles = cache.get(cache_key)
+    if roles is None:
+        membership = ProjectMember.objects.filter(project=OuterRef('pk'), user=user, is_active=True)
+        rows = (
+            Project.objects.filter(Q(owner=user) | Q(Exists(membership)))
+            .annotate(role=Subquery(membership.values('role')[:1]))
+            .order_by()
+            .values_list('pk', 'owner_id', 'role')
+        )
+        roles = {str(pk): 'owner' if owner_id == user.pk else role for pk, owner_id, role in rows}
+        cache.set(cache_key, roles, ROLE_CACHE_TIMEOUT)
+    user._project_roles = roles
+    return roles
+
+
+def get_project_role(user, project_id):
+    return get_project_roles(user).get(str(project_id))
+
+
+def invalidate_project_roles(*user_ids, using=None) -> None:
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+
+    def bump():
+        for user_id in user_ids:
+            bump_version(_roles_namespace(user_id))
+
+    bump()
+    # A request racing the write may re-cache the old roles; expire them again once committed
+    transaction.on_commit(bump, using=using)
+
+
+def is_admin(user) -> bool:
+    return user.role == 'admin'
+
+
+def can_manage_project(user, project_id) -> bool:
+    return is_admin(user) or get_project_role(user, project_id) in MANAGER_ROLES
+
+
+def can_add_tasks(user, project_id) -> bool:
+    return is_admin(user) or get_project_role(user, project_id) in CONTRIBUTOR_ROLES
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Task, User
+
+REMINDER_BATCH_SIZE = 1000
+# Assignees whose reminders are built and sent together, over one mail connection
+REMINDER_USER_BATCH_SIZE = 100
+# Most overdue tasks listed per reminder; the rest are only counted
+REMINDER_TASK_LIMIT = 20
+
+
+@dataclass
+class ReminderResult:
+    tasks: int = 0
+    assignees: int = 0
+    sent: int = 0
+    skipped: int = 0
+
+
+def scan_overdue_tasks(now, batch_size: int = REMINDER_BATCH_SIZE, on_batch=None) -> dict:
+    """
+    ``{assignee_id: [overdue count, ids of the most overdue tasks]}`` for
+    open tasks due before ``now``. Tasks are read in keyset batches along
+    the partial (due_date, id) index of open tasks, so memory holds one
+    batch plus at most REMINDER_TASK_LIMIT ids per assignee.
+    """
+    overdue = Task.objects.filter(status__in=Task.OPEN_STATUSES, due_date__lt=now).order_by('due_date', 'pk')
+    hits = {}
+    last = None
+    while True:
+        batch = overdue
+        if last is not None:
+            batch = batch.filter(Q(due_date__gt=last[0]) | Q(due_date=last[0], pk__gt=last[1]))
+        rows = list(batch.values_list('due_date', 'pk', 'assigned_to_id')[:batch_size])
+        for due_date, pk, assignee_id in rows:
+            if assignee_id is None:
+                continue
+            entry = hits.setdefault(assignee_id, [0, []])
+            entry[0] += 1
+            if len(entry[1]) < REMINDER_TASK_LIMIT:
+                entry[1].append(pk)
+        if on_batch:
+            on_batch()
+        if len(rows) < batch_size:
+            return hits
+        last = rows[-1][:2]
+
+
+def build_reminder(user, count: int, tasks) -> EmailMessage:
+    site_url = settings.SITE_URL.rstrip('/')
+    body = render_to_string('core/emails/overdue_reminder.txt', {
+        'user': user,
+        'count': count,
+        'more': count - len(tasks),
+        'tasks': [(task, site_url + reverse('core:task_detail', kwargs={'pk': task.pk})) for task in tasks],
+    })
+    subject = f"You have {count} overdue task{'s' if count != 1 else ''}"
+    return EmailMessage(subject, body, to=[user.email])
+
+
+def send_overdue_reminders(now=None, batch_size: int = REMINDER_BATCH_SIZE, dry_run: bool = False,
+                           on_batch=None) -> ReminderResult:
+    """
+    Email every active assignee with an email address one reminder listing
+    their overdue tasks. ``on_batch`` is called after each batch, e.g. to
+    renew a job lease.
+    """
+    now = now or timezone.now()
+    hits = scan_overdue_tasks(now, batch_size, on_batch)
+    result = ReminderResult(tasks=sum(count for count, task_ids in hits.values()), assignees=len(hits))
+
+    assignee_ids = sorted(hits)
+    for start in range(0, len(assignee_ids), REMINDER_USER_BATCH_SIZE):
+        chunk = assignee_ids[start:start + REMINDER_USER_BATCH_SIZE]
+        users = list(User.objects.filter(pk__in=chunk, is_active=True).exclude(email=''))
+        task_ids = [task_id for user in users for task_id in hits[user.pk][1]]
+        tasks = Task.objects.filter(pk__in=task_ids).select_related('project').only(
+            'title', 'due_date', 'status', 'project__title',
+        ).in_bulk()
+        messages = [
+            build_reminder(user, hits[user.pk][0], [tasks[task_id] for task_id in hits[user.pk][1] if task_id in tasks])
+            for user in users
+        ]
+        if messages and not dry_run:
+            get_connection().send_messages(messages)
+        result.sent += len(messages)
+        result.skipped += len(chunk) - len(users)
+        if on_batch:
+            on_batch()
+    return result
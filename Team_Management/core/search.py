@@ -0,0 +1,184 @@
+import re
+from dataclasses import dataclass
+
+from django.db import connections, router, transaction
+from django.db.models import OuterRef, Q, Subquery, prefetch_related_objects
+from django.urls import reverse
+
+from .models import Project, SearchEntry, Task, TaskComment
+from .permissions import get_project_roles, is_admin
+
+SEARCH_PER_PAGE = 20
+# Ranked results are paged by OFFSET, which gets slower the deeper it goes; past this, refine the query
+SEARCH_MAX_PAGE = 50
+SEARCH_MAX_TERMS = 10
+SEARCH_KINDS = tuple(kind for kind, label in SearchEntry.KIND_CHOICES)
+ENTRY_FIELDS = ['project', 'task', 'assignee', 'title', 'body', 'updated_at']
+
+
+def _upsert(entries, using=None) -> None:
+    if entries:
+        SearchEntry.objects.using(using).bulk_create(
+            entries, update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=ENTRY_FIELDS,
+        )
+
+
+def index_projects(projects, using=None) -> None:
+    _upsert([
+        SearchEntry(kind='project', object_id=str(project.pk), project_id=project.pk,
+                    title=project.title, body=project.description)
+        for project in projects
+    ], using)
+
+
+def index_tasks(tasks, using=None) -> None:
+    _upsert([
+        SearchEntry(kind='task', object_id=str(task.pk), project_id=task.project_id, task_id=task.pk,
+                    assignee_id=task.assigned_to_id, title=task.title, body=task.description)
+        for task in tasks
+    ], using)
+
+
+def index_comments(comments, using=None) -> None:
+    """Index comments; their task (for project and assignee) must be loaded or cached."""
+    _upsert([
+        SearchEntry(kind='comment', object_id=str(comment.pk), project_id=comment.task.project_id,
+                    task_id=comment.task_id, assignee_id=comment.task.assigned_to_id,
+                    body=comment.content)
+        for comment in comments
+    ], using)
+
+
+def move_task_comments(task_ids, using=None) -> None:
+    """Copy the current project and assignee of the tasks onto their comment entries."""
+    task = Task.objects.using(using).filter(pk=OuterRef('task_id'))
+    SearchEntry.objects.using(using).filter(kind='comment', task_id__in=task_ids).update(
+        project_id=Subquery(task.values('project_id')[:1]),
+        assignee_id=Subquery(task.values('assigned_to_id')[:1]),
+    )
+
+
+def reindex_tasks(task_ids, using=None) -> None:
+    """Refresh the entries of tasks changed behind the ORM's back, e.g. by QuerySet.update()."""
+    index_tasks(Task.objects.using(using).filter(pk__in=task_ids).order_by(), using)
+    move_task_comments(task_ids, using)
+
+
+def delete_entry(kind: str, object_id, using=None) -> None:
+    SearchEntry.objects.using(using).filter(kind=kind, object_id=str(object_id)).delete()
+
+
+def entry_url(entry: SearchEntry) -> str:
+    if entry.kind == 'project':
+        return reverse('core:project_detail', kwargs={'pk': entry.project_id})
+    url = reverse('core:task_detail', kwargs={'pk': entry.task_id})
+    return f'{url}#comment-{entry.object_id}' if entry.kind == 'comment' else url
+
+
+def match_expression(text: str, vendor: str):
+    """
+    The user's words as a full-text query for the backend: every word must
+    match, and the last one may be a prefix on SQLite so results follow
+    typing. None when there is nothing to search for.
+    """
+    terms = re.findall(r'\w+', text)[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    if vendor == 'sqlite':
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+    return ' '.join(terms)
+
+
+@dataclass
+class SearchPage:
+    results: list
+    number: int
+    has_next: bool
+
+
+def _visibility_sql(user, connection):
+    """WHERE fragment limiting entries to the projects and tasks the user can see."""
+    if is_admin(user):
+        return '1 = 1', []
+    project_field = SearchEntry._meta.get_field('project')
+    project_ids = [project_field.get_db_prep_value(pk, connection) for pk in get_project_roles(user)]
+    if not project_ids:
+        return 'e.assignee_id = %s', [user.pk]
+    placeholders = ', '.join(['%s'] * len(project_ids))
+    return f'(e.project_id IN ({placeholders}) OR e.assignee_id = %s)', [*project_ids, user.pk]
+
+
+def search(user, text: str, kinds=None, page: int = 1, per_page: int = SEARCH_PER_PAGE) -> SearchPage:
+    """
+    Ranked full-text search over the entries the user can see. Uses FTS5
+    with bm25() on SQLite and ts_rank() over the GIN-indexed tsvector on
+    PostgreSQL; other backends fall back to an unranked icontains scan.
+    """
+    page = max(1, min(page, SEARCH_MAX_PAGE))
+    using = router.db_for_read(SearchEntry)
+    connection = connections[using]
+    query = match_expression(text, connection.vendor)
+    if query is None:
+        return SearchPage([], page, False)
+    offset = (page - 1) * per_page
+
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        entries = SearchEntry.objects.using(using).filter(Q(title__icontains=text) | Q(body__icontains=text))
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+        if not is_admin(user):
+            entries = entries.filter(Q(project_id__in=list(get_project_roles(user))) | Q(assignee=user))
+        rows = list(entries.select_related('project', 'task').order_by('-updated_at')[offset:offset + per_page + 1])
+        return SearchPage(rows[:per_page], page, len(rows) > per_page)
+
+    visibility, params = _visibility_sql(user, connection)
+    kind_sql = ''
+    if kinds:
+        kind_sql = f" AND e.kind IN ({', '.join(['%s'] * len(kinds))})"
+        params += list(kinds)
+    if connection.vendor == 'sqlite':
+        sql = (
+            'SELECT e.*, bm25(core_searchentry_fts, 10.0, 1.0) AS rank '
+            'FROM core_searchentry_fts JOIN core_searchentry e ON e.id = core_searchentry_fts.rowid '
+            f'WHERE core_searchentry_fts MATCH %s AND {visibility}{kind_sql} '
+            'ORDER BY rank, e.id LIMIT %s OFFSET %s'
+        )
+    else:
+        sql = (
+            'SELECT e.*, ts_rank(e.search_vector, query) AS rank '
+            "FROM core_searchentry e, websearch_to_tsquery('english', %s) query "
+            f'WHERE e.search_vector @@ query AND {visibility}{kind_sql} '
+            'ORDER BY rank DESC, e.id LIMIT %s OFFSET %s'
+        )
+    rows = list(SearchEntry.objects.db_manager(using).raw(sql, [query, *params, per_page + 1, offset]))
+    results = rows[:per_page]
+    prefetch_related_objects(results, 'project', 'task')
+    return SearchPage(results, page, len(rows) > per_page)
+
+
+def rebuild_search_index(batch_size: int = 1000, using=None) -> int:
+    """
+    Re-index every project, task and comment from scratch in one
+    transaction, so searches keep seeing the old entries until it commits.
+    Returns the entry count.
+    """
+    total = 0
+    with transaction.atomic(using=using):
+        SearchEntry.objects.using(using).all().delete()
+        for queryset, index in (
+            (Project.objects.using(using).order_by('pk'), index_projects),
+            (Task.objects.using(using).order_by('pk'), index_tasks),
+            (TaskComment.objects.using(using).select_related('task').order_by('pk'), index_comments),
+        ):
+            batch = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    index(batch, using)
+                    total += len(batch)
+                    batch = []
+            index(batch, using)
+            total += len(batch)
+    return total
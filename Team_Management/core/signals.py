@@ -1,7 +1,17 @@
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import User, Project, ProjectMember, Task, TaskAttachment
+from .activity import record_activity
+from .counters import record_task_move
+from .dashboard import invalidate_dashboards
+from .dependencies import invalidate_project_graph, move_task_dependencies
+from .history import log_status_changes
+from .models import User, Project, ProjectMember, Task, TaskAttachment, TaskComment, TaskDependency, TaskQuerySet, AttachmentContent, WorkloadRollup
+from .permissions import invalidate_project_roles
+from .search import delete_entry, index_comments, index_projects, index_tasks, move_task_comments
+from .tags import sync_task_tags
+from .workload import rebuild_workload, record_task_workload
 
 @receiver(post_save, sender=Project)
 def create_project_owner_member(sender, instance, created, **kwargs):
@@ -16,35 +26,328 @@ def create_project_owner_member(sender, instance, created, **kwargs):
         )
 
 @receiver(post_save, sender=Task)
-def update_project_progress(sender, instance, **kwargs):
+def update_project_progress(sender, instance, created, update_fields=None, using='default', **kwargs):
     """
-    Update project progress when task status changes
+    Move the task between its project's per-status counters. Only the counter
+    columns that change are written, once per project per transaction.
     """
-    # This will trigger the progress property calculation
-    instance.project.save()
+    if created:
+        record_task_move(None, None, instance.project_id, instance.status, using=using)
+    elif update_fields is None or {'status', 'project', 'project_id'} & set(update_fields):
+        old_project_id = getattr(instance, '_loaded_project_id', None)
+        old_status = getattr(instance, '_loaded_status', None)
+        if old_project_id is None or old_status is None:
+            # Loaded without project/status (e.g. .only()), so the old bucket is unknown
+            Project.objects.using(using).filter(pk=instance.project_id).recount_task_counters()
+        else:
+            record_task_move(old_project_id, old_status, instance.project_id, instance.status, using=using)
 
-@receiver(post_save, sender=TaskAttachment)
-def update_task_attachment_info(sender, instance, created, **kwargs):
+@receiver(post_save, sender=Task)
+def update_task_tags(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mirror Task.tags into the indexed TaskTag table
+    """
+    if created:
+        changed = bool(instance.tags)
+    elif update_fields is not None and not {'tags', 'project', 'project_id'} & set(update_fields):
+        changed = False
+    else:
+        changed = (
+            instance.tags != getattr(instance, '_loaded_tags', None)
+            or instance.project_id != getattr(instance, '_loaded_project_id', None)
+        )
+    if changed:
+        sync_task_tags(instance)
+
+@receiver(post_delete, sender=Task)
+def release_project_task_counter(sender, instance, using='default', **kwargs):
+    """
+    Drop a deleted task from its project's counters
+    """
+    record_task_move(
+        getattr(instance, '_loaded_project_id', None) or instance.project_id,
+        getattr(instance, '_loaded_status', None) or instance.__dict__.get('status'),
+        None, None, using=using,
+    )
+
+@receiver(post_save, sender=Task)
+def log_task_status_change(sender, instance, created, update_fields=None, using='default', **kwargs):
+    """
+    Log the task entering its project, changing status or moving to another
+    project
+    """
+    created_at = instance.__dict__.get('created_at')
+    if created:
+        log_status_changes([(instance.pk, instance.project_id, '', instance.status, created_at)], using=using)
+        return
+    if update_fields is not None and not {'status', 'project', 'project_id'} & set(update_fields):
+        return
+    old_project_id = getattr(instance, '_loaded_project_id', None)
+    old_status = getattr(instance, '_loaded_status', None)
+    if old_project_id is None or old_status is None:
+        return  # Loaded without project/status, so there is no known transition
+    if old_project_id == instance.project_id:
+        changes = [(instance.pk, instance.project_id, old_status, instance.status, created_at)]
+    else:
+        changes = [
+            (instance.pk, old_project_id, old_status, '', created_at),
+            (instance.pk, instance.project_id, '', instance.status, created_at),
+        ]
+    log_status_changes(changes, using=using)
+
+@receiver(post_delete, sender=Task)
+def log_task_removal(sender, instance, origin=None, using='default', **kwargs):
+    """
+    Log a deleted task leaving its project; history goes with a deleted project
+    """
+    if getattr(origin, 'model', type(origin)) is Project:
+        return
+    status = getattr(instance, '_loaded_status', None) or instance.__dict__.get('status')
+    if status:
+        log_status_changes([(instance.pk, instance.project_id, status, '', None)], using=using)
+
+@receiver(post_save, sender=Task)
+def update_workload_rollup(sender, instance, created, update_fields=None, using='default', **kwargs):
+    """
+    Move the task's hours and counts between workload buckets, once per
+    bucket per transaction
+    """
+    if created:
+        record_task_workload(None, instance.workload_values(), using=using)
+    elif update_fields is None or TaskQuerySet.ROLLUP_FIELDS & set(update_fields):
+        old = getattr(instance, '_loaded_workload', None)
+        if old is None:
+            # Loaded with deferred fields, so the old bucket is unknown
+            rebuild_workload({instance.project_id}, using=using)
+        else:
+            record_task_workload(old, instance.workload_values(), using=using)
+
+@receiver(post_delete, sender=Task)
+def release_task_workload(sender, instance, origin=None, using='default', **kwargs):
+    """
+    Take a deleted task out of the rollup; tasks deleted with their project
+    go with its rollup rows
+    """
+    if getattr(origin, 'model', type(origin)) is Project:
+        return
+    old = getattr(instance, '_loaded_workload', None)
+    if old is None:
+        transaction.on_commit(lambda: rebuild_workload({instance.project_id}, using=using), using=using)
+    else:
+        record_task_workload(old, None, using=using)
+
+@receiver(post_save, sender=Task)
+def update_task_graph(sender, instance, created, update_fields=None, using='default', **kwargs):
+    """
+    Expire the cached dependency graph of the task's project, and take the
+    task's dependencies along when it moves to another project
+    """
+    if not created and update_fields is not None and not TaskQuerySet.GRAPH_FIELDS & set(update_fields):
+        return
+    old_project_id = getattr(instance, '_loaded_project_id', None)
+    if old_project_id is not None and old_project_id != instance.project_id:
+        move_task_dependencies([instance.pk], instance.project_id, using=using)
+    invalidate_project_graph(old_project_id, instance.project_id, using=using)
+
+@receiver(post_delete, sender=Task)
+def release_task_graph(sender, instance, origin=None, using='default', **kwargs):
+    """
+    Expire the cached dependency graph of a deleted task's project
+    """
+    if getattr(origin, 'model', type(origin)) is not Project:
+        invalidate_project_graph(instance.project_id, using=using)
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def invalidate_dependency_graph(sender, instance, using='default', **kwargs):
+    """
+    Expire the cached dependency graph when an edge is added or removed
+    """
+    invalidate_project_graph(instance.project_id, using=using)
+
+@receiver(pre_delete, sender=User)
+def release_user_workload(sender, instance, using='default', **kwargs):
     """
-    Update file information when attachment is created
+    The user's tasks become unassigned without model signals, so their
+    projects' rollups are rebuilt once the deletion is committed
     """
-    if created and instance.file:
-        # Update filename and file size
-        instance.filename = instance.file.name.split('/')[-1]
-        instance.file_size = instance.file.size
-        instance.save(update_fields=['filename', 'file_size'])
+    project_ids = set(
+        WorkloadRollup.objects.using(using).filter(assignee=instance).values_list('project_id', flat=True)
+    )
+    if project_ids:
+        transaction.on_commit(lambda: rebuild_workload(project_ids, using=using), using=using)
 
 @receiver(post_delete, sender=TaskAttachment)
 def delete_task_attachment_file(sender, instance, **kwargs):
     """
-    Delete the actual file when attachment is deleted
+    Release the shared content when an attachment is deleted; the file goes
+    away with its last reference
     """
-    if instance.file:
+    if instance.content_id:
+        AttachmentContent.objects.release(instance.content_id)
+    elif instance.file:
+        # Attachments stored before content addressing own their file
         try:
             instance.file.delete(save=False)
-        except:
+        except OSError:
             pass  # File might already be deleted
 
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_dashboards(sender, instance, using='default', **kwargs):
+    """
+    Expire the dashboard stats of the users of the task's old and new
+    project and of its old and new assignee
+    """
+    invalidate_dashboards(
+        [instance.project_id, getattr(instance, '_loaded_project_id', None)],
+        [instance.assigned_to_id, getattr(instance, '_loaded_assigned_to_id', None)],
+        using=using,
+    )
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_dashboards(sender, instance, using='default', **kwargs):
+    """
+    Expire the dashboard stats of the project's users and of its old and
+    new owner; members of a deleted project are handled by their cascaded
+    ProjectMember deletes
+    """
+    invalidate_dashboards(
+        [instance.pk], [instance.owner_id, getattr(instance, '_loaded_owner_id', None)], using=using,
+    )
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def invalidate_member_dashboard(sender, instance, using='default', **kwargs):
+    """
+    Expire the dashboard stats of the member
+    """
+    invalidate_dashboards(user_ids=[instance.user_id], using=using)
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def invalidate_member_project_roles(sender, instance, using='default', **kwargs):
+    """
+    Expire the cached project role map of the member
+    """
+    invalidate_project_roles(instance.user_id, using=using)
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_members_project_roles(sender, instance, action, reverse, pk_set, using='default', **kwargs):
+    """
+    Project.members.add()/remove()/set() write ProjectMember rows without
+    model signals
+    """
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_project_roles(instance.pk, using=using)
+    elif action == 'pre_clear':
+        invalidate_project_roles(*instance.members.values_list('pk', flat=True), using=using)
+    elif action in ('post_add', 'post_remove'):
+        invalidate_project_roles(*pk_set, using=using)
+
+@receiver(post_save, sender=Project)
+def invalidate_owner_project_roles(sender, instance, created, using='default', **kwargs):
+    """
+    Expire the role maps of the old and new owner when ownership changes
+    """
+    old_owner_id = getattr(instance, '_loaded_owner_id', None)
+    if created or old_owner_id != instance.owner_id:
+        invalidate_project_roles(old_owner_id, instance.owner_id, using=using)
+
+@receiver(post_delete, sender=Project)
+def release_owner_project_roles(sender, instance, using='default', **kwargs):
+    """
+    Drop a deleted project from its owner's role map; members are handled by
+    their cascaded ProjectMember deletes
+    """
+    invalidate_project_roles(instance.owner_id, using=using)
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, created, update_fields=None, using='default', **kwargs):
+    """
+    Keep the project's search entry current; deletes cascade to the entries
+    """
+    if created or update_fields is None or {'title', 'description'} & set(update_fields):
+        index_projects([instance], using=using)
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, update_fields=None, using='default', **kwargs):
+    """
+    Keep the task's search entry current, and move its comments' entries along
+    when the task changes project or assignee (both decide who may see them)
+    """
+    if not created and update_fields is not None and not TaskQuerySet.SEARCH_FIELDS & set(update_fields):
+        return
+    if not created and instance.search_values() == getattr(instance, '_loaded_search', None):
+        return  # Saved without changing what the entry holds
+    index_tasks([instance], using=using)
+    if not created and (
+        instance.project_id != getattr(instance, '_loaded_project_id', None)
+        or instance.assigned_to_id != getattr(instance, '_loaded_assigned_to_id', None)
+    ):
+        move_task_comments([instance.pk], using=using)
+
+@receiver(post_save, sender=TaskComment)
+def index_comment(sender, instance, using='default', **kwargs):
+    index_comments([instance], using=using)
+
+@receiver(post_delete, sender=TaskComment)
+def unindex_comment(sender, instance, origin=None, using='default', **kwargs):
+    """
+    Drop a deleted comment's search entry. Comments deleted along with their
+    task or project lose it through the entry's own cascade instead.
+    """
+    if getattr(origin, 'model', type(origin)) is TaskComment:
+        delete_entry('comment', instance.pk, using=using)
+
+@receiver(post_save, sender=Task)
+def record_task_status_change(sender, instance, created, update_fields=None, using='default', **kwargs):
+    old_status = getattr(instance, '_loaded_status', None)
+    if created or old_status is None or old_status == instance.status:
+        return
+    if update_fields is None or 'status' in update_fields:
+        record_activity('status_changed', instance.project_id, instance.pk, using=using,
+                        title=instance.title, old_status=old_status, status=instance.status)
+
+@receiver(post_save, sender=TaskComment)
+def record_comment(sender, instance, created, using='default', **kwargs):
+    if created:
+        record_activity('commented', instance.task.project_id, instance.task_id, instance.author_id, using=using,
+                        title=instance.task.title, comment=instance.pk, excerpt=instance.content[:100])
+
+@receiver(post_save, sender=TaskAttachment)
+def record_attachment(sender, instance, created, using='default', **kwargs):
+    if created:
+        record_activity('attachment_added', instance.task.project_id, instance.task_id, instance.uploaded_by_id,
+                        using=using, title=instance.task.title, filename=instance.filename)
+
+@receiver(post_save, sender=ProjectMember)
+def record_member_added(sender, instance, created, using='default', **kwargs):
+    if created:
+        record_activity('member_added', instance.project_id, using=using, user=instance.user_id, role=instance.role)
+
+@receiver(post_delete, sender=ProjectMember)
+def record_member_removed(sender, instance, origin=None, using='default', **kwargs):
+    """
+    Members leaving with their project or user account are not activity
+    """
+    if getattr(origin, 'model', type(origin)) is ProjectMember:
+        record_activity('member_removed', instance.project_id, using=using, user=instance.user_id)
+
+@receiver(m2m_changed, sender=Project.members.through)
+def record_members_added(sender, instance, action, reverse, pk_set, using='default', **kwargs):
+    """
+    Project.members.add() and User.projects.add() insert ProjectMember rows
+    without model signals; removals go through a queryset delete() and so
+    reach record_member_removed
+    """
+    if action == 'post_add':
+        for pk in pk_set:
+            project_id, user_id = (pk, instance.pk) if reverse else (instance.pk, pk)
+            record_activity('member_added', project_id, using=using, user=user_id, role='member')
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     """
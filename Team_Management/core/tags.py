@@ -0,0 +1,115 @@
+from collections import defaultdict
+
+from django.db.models import Count, Exists, OuterRef
+
+from .models import Project, Tag, Task, TaskTag
+
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tags(value) -> list:
+    """
+    Turn a comma-separated string or a list into unique, lower-cased tag
+    names, keeping their first-seen order.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    names = []
+    for item in value:
+        name = ' '.join(str(item).split()).lower()[:TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(names, using=None) -> dict:
+    """Map each name to its Tag, creating missing ones in one INSERT."""
+    names = set(names)
+    if not names:
+        return {}
+    tags = {tag.name: tag for tag in Tag.objects.using(using).filter(name__in=names)}
+    missing = names - tags.keys()
+    if missing:
+        Tag.objects.using(using).bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update((tag.name, tag) for tag in Tag.objects.using(using).filter(name__in=missing))
+    return tags
+
+
+def sync_task_tags(task) -> None:
+    """Bring the TaskTag rows of ``task`` in line with ``task.tags``."""
+    names = set(normalize_tags(task.tags))
+    existing = dict(TaskTag.objects.filter(task=task).values_list('tag__name', 'project_id'))
+
+    removed = existing.keys() - names
+    if removed:
+        TaskTag.objects.filter(task=task, tag__name__in=removed).delete()
+    if any(project_id != task.project_id for name, project_id in existing.items() if name in names):
+        TaskTag.objects.filter(task=task).update(project_id=task.project_id)
+
+    added = names - existing.keys()
+    if added:
+        tags = get_or_create_tags(added)
+        TaskTag.objects.bulk_create(
+            [TaskTag(task=task, tag=tags[name], project_id=task.project_id) for name in added],
+            ignore_conflicts=True,
+        )
+
+
+def retag_tasks(task_ids, using=None) -> None:
+    """
+    Bring the TaskTag rows of tasks changed behind the ORM's back (e.g. by
+    QuerySet.update()) in line with their tags and project, with a fixed
+    number of queries however many tasks there are.
+    """
+    rows = Task.objects.using(using).filter(pk__in=task_ids).values_list('pk', 'project_id', 'tags')
+    tasks = {pk: (project_id, set(normalize_tags(tags))) for pk, project_id, tags in rows}
+    rows = TaskTag.objects.using(using).filter(task_id__in=tasks.keys())
+    removed, moved, existing = [], defaultdict(list), set()
+    for pk, task_id, name, project_id in rows.values_list('pk', 'task_id', 'tag__name', 'project_id'):
+        task_project_id, names = tasks[task_id]
+        if name not in names:
+            removed.append(pk)
+            continue
+        existing.add((task_id, name))
+        if project_id != task_project_id:
+            moved[task_project_id].append(pk)
+    if removed:
+        TaskTag.objects.using(using).filter(pk__in=removed).delete()
+    for project_id, pks in moved.items():
+        TaskTag.objects.using(using).filter(pk__in=pks).update(project_id=project_id)
+
+    added = [
+        (pk, project_id, name)
+        for pk, (project_id, names) in tasks.items() for name in names if (pk, name) not in existing
+    ]
+    if added:
+        tags = get_or_create_tags((name for pk, project_id, name in added), using)
+        TaskTag.objects.using(using).bulk_create(
+            [TaskTag(task_id=pk, tag=tags[name], project_id=project_id) for pk, project_id, name in added],
+            ignore_conflicts=True,
+        )
+
+
+def project_tag_cloud(project) -> list:
+    """Tag names used in a project with their task counts, most used first."""
+    rows = (
+        TaskTag.objects.filter(project=project)
+        .values('tag__name')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'tag__name')
+    )
+    return [{'name': row['tag__name'], 'count': row['count']} for row in rows]
+
+
+def autocomplete_tags(user, prefix: str, limit: int = 10) -> list:
+    """Tag names starting with ``prefix`` that are used in projects the user can see."""
+    prefix = ' '.join(prefix.split()).lower()
+    if not prefix:
+        return []
+    tags = Tag.objects.filter(name__startswith=prefix)
+    if user.role != 'admin':
+        visible = Project.objects.visible_to(user).values('pk')
+        tags = tags.filter(Exists(TaskTag.objects.filter(tag=OuterRef('pk'), project__in=visible)))
+    return list(tags.order_by('name').values_list('name', flat=True)[:limit])
@@ -1,3 +1,1568 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .forms import TaskForm
+from .models import User, Activity, LiveEvent, Project, ProjectMember, ProjectStatusDay, SearchEntry, Task, TaskDependency, TaskStatusChange, TaskTag, TaskAttachment, TaskComment, AttachmentContent, WorkloadRollup
+from .permissions import get_project_role, get_project_roles
+from .activity import activity_buffer, record_activity
+from .board import project_board
+from .dependencies import add_dependency, project_graph
+from .events import EVENTS_PRUNE_EVERY, DatabaseBackend, Event, LocalBackend, bus, get_backend, project_channel
+from .exports import iter_export
+from .history import burndown, cumulative_flow, cycle_times, daily_status_counts, log_status_changes, rebuild_status_days
+from .locks import acquire_lock
+from .pagination import encode_cursor
+from .reminders import scan_overdue_tasks
+from .workload import rebuild_workload, workload_report
+from .search import search
+from .views import ACTIVITY_PER_PAGE, COMMENTS_PER_PAGE
+
+
+class CoreTestMixin:
+    def make_project(self, owner, **kwargs):
+        today = timezone.now().date()
+        defaults = {
+            'title': 'Test Project',
+            'description': 'Test Description',
+            'start_date': today,
+            'end_date': today + timedelta(days=30),
+            'owner': owner,
+        }
+        defaults.update(kwargs)
+        return Project.objects.create(**defaults)
+
+    def make_task(self, project, **kwargs):
+        defaults = {
+            'title': 'Test Task',
+            'description': 'Test Description',
+            'due_date': timezone.now() + timedelta(days=7),
+            'project': project,
+            'created_by': project.owner,
+        }
+        defaults.update(kwargs)
+        with self.captureOnCommitCallbacks(execute=True):
+            return Task.objects.create(**defaults)
+
+
+class ProjectTaskCounterTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.project = self.make_project(self.owner)
+
+    def test_counters_follow_create_update_and_delete(self):
+        task = self.make_task(self.project)
+        self.make_task(self.project, status='completed')
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 1)
+        self.assertEqual(self.project.completed_task_count, 1)
+        self.assertEqual(self.project.progress, 50.0)
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 0)
+        self.assertEqual(self.project.completed_task_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 1)
+        self.assertEqual(self.project.completed_task_count, 1)
+
+    def test_queryset_update_moves_counters_between_projects(self):
+        other = self.make_project(self.owner, title='Other')
+        self.make_task(self.project)
+        self.make_task(self.project)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(project=self.project).update(project=other, status='review')
+
+        self.project.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.project.task_count, 0)
+        self.assertEqual(other.review_task_count, 2)
+
+    def test_progress_reads_no_queries(self):
+        self.make_task(self.project, status='completed')
+        project = Project.objects.get(pk=self.project.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(project.progress, 100.0)
+
+    def test_stale_project_save_keeps_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.make_task(self.project)
+        stale.title = 'Renamed'
+        stale.save()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 1)
+
+    def test_counter_writes_are_coalesced_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for status in ('todo', 'todo', 'completed'):
+                Task.objects.create(
+                    title='Bulk', description='', due_date=timezone.now(), status=status,
+                    project=self.project, created_by=self.owner,
+                )
+        self.assertEqual(len(callbacks), 4)  # the counters, workload rollup, status days, then graph expiry
+        with self.assertNumQueries(1):  # one UPDATE; nobody listens, so no progress event is read back
+            callbacks[0]()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 2)
+        self.assertEqual(self.project.completed_task_count, 1)
+        self.assertIsNotNone(self.project.tasks_changed_at)
+
+    def test_rolled_back_savepoint_drops_its_deltas(self):
+        fields = {'description': '', 'due_date': timezone.now(), 'project': self.project, 'created_by': self.owner}
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='Kept', **fields)
+            try:
+                with transaction.atomic():
+                    Task.objects.create(title='Rolled back', status='review', **fields)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 1)
+        self.assertEqual(self.project.review_task_count, 0)
+
+    def test_rebuild_command_repairs_counters(self):
+        self.make_task(self.project)
+        Project.objects.filter(pk=self.project.pk).update(todo_task_count=7)
+        call_command('rebuild_project_counters', batch_size=1, stdout=StringIO())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 1)
+
+
+class DashboardStatsTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        # Run the dashboard expiry the setup registers, so later writes open a batch of their own
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project = self.make_project(self.owner)
+            ProjectMember.objects.create(project=self.project, user=self.member)
+
+    def test_assigned_member_tasks_are_counted_once(self):
+        self.make_task(self.project, assigned_to=self.member)
+        self.make_task(self.project, status='completed')
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_projects'], 1)
+        self.assertEqual(response.context['total_tasks'], 2)
+        self.assertEqual(response.context['completed_tasks'], 1)
+
+    def test_stats_are_cached_until_a_task_write(self):
+        self.client.force_login(self.member)
+        self.client.get(reverse('core:dashboard'))
+        with self.assertNumQueries(4):  # session, user, recent tasks, recent projects
+            self.client.get(reverse('core:dashboard'))
+
+        self.make_task(self.project)
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.context['total_tasks'], 1)
+
+    def test_writes_expire_only_the_users_involved(self):
+        outsider = User.objects.create_user(username='outsider', password='testpass')
+        with self.captureOnCommitCallbacks(execute=True):
+            other = self.make_project(outsider, title='Other')
+        self.client.force_login(self.member)
+        self.client.get(reverse('core:dashboard'))
+
+        self.make_task(other)
+        with self.assertNumQueries(4):  # still cached: the member is not involved in the other project
+            self.client.get(reverse('core:dashboard'))
+
+        task = self.make_task(other, assigned_to=self.member)
+        self.assertEqual(self.client.get(reverse('core:dashboard')).context['total_tasks'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk=task.pk).update(assigned_to=outsider)
+        self.assertEqual(self.client.get(reverse('core:dashboard')).context['total_tasks'], 0)
+
+
+class VisibilityTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.member)
+
+    def test_visible_tasks_are_not_duplicated_by_membership(self):
+        ProjectMember.objects.create(project=self.project, user=self.outsider)
+        self.make_task(self.project, assigned_to=self.member)
+        self.assertEqual(Task.objects.visible_to(self.member).count(), 1)
+        self.assertEqual(len(Task.objects.visible_to(self.member)), 1)
+
+    def test_inactive_membership_hides_project(self):
+        ProjectMember.objects.filter(user=self.member).update(is_active=False)
+        self.assertFalse(Project.objects.visible_to(self.member).exists())
+        self.assertTrue(Project.objects.visible_to(self.owner).exists())
+
+    def test_assignee_sees_task_outside_their_projects(self):
+        task = self.make_task(self.project, assigned_to=self.outsider)
+        self.assertEqual(list(Task.objects.visible_to(self.outsider)), [task])
+        self.assertFalse(Project.objects.visible_to(self.outsider).exists())
+
+    def test_detail_views_hide_invisible_objects(self):
+        task = self.make_task(self.project)
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(reverse('core:project_detail', args=[self.project.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('core:task_detail', args=[task.pk])).status_code, 404)
+
+    def test_members_can_open_detail_views(self):
+        task = self.make_task(self.project)
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(reverse('core:project_detail', args=[self.project.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('core:task_detail', args=[task.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('core:task_list')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('core:project_list')).status_code, 200)
+
+
+class CursorPaginationTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.project = self.make_project(self.owner)
+        for i in range(20):
+            self.make_task(self.project, title=f'Task {i}', priority='high' if i % 2 else 'low')
+        self.client.force_login(self.owner)
+
+    def test_cursor_pages_cover_filtered_tasks_once(self):
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(reverse('core:task_list'), {'cursor': cursor, 'priority': 'high'})
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.context['paginator'])
+            seen.extend(task.pk for task in response.context['tasks'])
+            page = response.context['page_obj']
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(seen), 10)
+        self.assertEqual(set(seen), set(Task.objects.filter(priority='high').values_list('pk', flat=True)))
+
+    def test_offset_pagination_applies_filters_before_paging(self):
+        response = self.client.get(reverse('core:task_list'), {'priority': 'low'})
+        self.assertEqual(response.context['paginator'].count, 10)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('core:project_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_pk_is_404(self):
+        # Well-formed tokens whose pk is not a task id must not reach the database
+        created_at = timezone.now().isoformat()
+        for pk in ('x', '12', ['a'], None):
+            payload = json.dumps([created_at, pk]).encode()
+            tampered = base64.urlsafe_b64encode(payload).decode().rstrip('=')
+            response = self.client.get(reverse('core:task_list'), {'cursor': tampered})
+            self.assertEqual(response.status_code, 404)
+
+
+class IndexUsageTests(CoreTestMixin, TestCase):
+    """EXPLAIN the hot dashboard/list queries and check they hit the composite indexes."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.make_task(self.project, assigned_to=self.owner)
+        self.client.force_login(self.owner)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tiny test tables would otherwise always be sequentially scanned
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def explain(self, sql: str) -> str:
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in index_names), plan)
+
+    def assertViewUsesIndex(self, url, params, index_name):
+        """EXPLAIN the SQL the view actually ran."""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        plans = [self.explain(query['sql']) for query in queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(any(index_name in plan for plan in plans), '\n\n'.join(plans))
+
+    def test_dashboard_counts_overdue_tasks_by_the_open_tasks_index(self):
+        # SQLite cannot match the partial index's status list against the bound parameters
+        # the ORM sends, so it reads the full (status, due_date) index instead
+        index_name = 'task_status_due_idx' if connection.vendor == 'sqlite' else 'task_open_due_idx'
+        self.assertViewUsesIndex(reverse('core:dashboard'), {}, index_name)
+
+    def test_task_list_filters_by_the_project_status_index(self):
+        params = {'project': str(self.project.pk), 'status': 'todo'}
+        self.assertViewUsesIndex(reverse('core:task_list'), params, 'task_project_status_idx')
+        self.assertViewUsesIndex(reverse('core:task_list'), {**params, 'cursor': ''}, 'task_project_status_idx')
+
+    def test_project_board_filter(self):
+        queryset = Task.objects.filter(project=self.project, status='todo').order_by()
+        self.assertUsesIndex(queryset, 'task_project_status_idx')
+
+    def test_assignee_open_tasks(self):
+        queryset = Task.objects.filter(assigned_to=self.owner, status='todo', due_date__lt=timezone.now()).order_by('due_date')
+        self.assertUsesIndex(queryset, 'task_assignee_status_due_idx')
+
+    def test_overdue_scan(self):
+        queryset = Task.objects.filter(status__in=Task.OPEN_STATUSES, due_date__lt=timezone.now()).order_by('due_date')
+        self.assertUsesIndex(queryset, 'task_open_due_idx', 'task_status_due_idx')
+
+    def test_project_list_status_filter(self):
+        queryset = Project.objects.visible_to(self.owner).filter(status='active').order_by('-created_at')
+        self.assertUsesIndex(queryset, 'project_status_created_idx')
+
+    def test_membership_lookup(self):
+        queryset = ProjectMember.objects.filter(user=self.owner, is_active=True)
+        self.assertUsesIndex(queryset, 'projectmember_user_active_idx')
+
+    def test_user_prefix_search(self):
+        queryset = User.objects.filter(username__istartswith='own').order_by()
+        self.assertUsesIndex(queryset, 'core_user_username_prefix_idx')
+
+    def test_project_title_prefix_search(self):
+        queryset = Project.objects.filter(title__istartswith='tes').order_by()
+        self.assertUsesIndex(queryset, 'core_project_title_prefix_idx')
+
+
+class BulkStatusUpdateTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.tasks = [self.make_task(self.project) for _ in range(50)]
+        self.url = reverse('core:task_status_bulk_update')
+
+    def post(self, changes):
+        return self.client.post(self.url, json.dumps({'changes': changes}), content_type='application/json')
+
+    def test_bulk_update_uses_grouped_queries(self):
+        self.client.force_login(self.owner)
+        changes = [{'id': str(task.pk), 'status': 'completed' if i % 2 else 'review'}
+                   for i, task in enumerate(self.tasks)]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            # session, user, savepoint pair, locking SELECT, 2 UPDATEs, status log INSERT, cycle-time starts
+            with self.assertNumQueries(9):
+                response = self.post(changes)
+        self.assertEqual(response.json(), {'success': True, 'updated': 50})
+        self.assertEqual(len(callbacks), 6)  # counters, workload rollup, status days, graph and dashboard expiry, activity
+        self.assertEqual(Activity.objects.filter(project=self.project, verb='status_changed').count(), 50)
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.todo_task_count, 0)
+        self.assertEqual(self.project.review_task_count, 25)
+        self.assertEqual(self.project.completed_task_count, 25)
+
+    def test_invisible_task_rejects_whole_batch(self):
+        other = self.make_project(self.outsider)
+        foreign = self.make_task(other)
+        self.client.force_login(self.outsider)
+        response = self.post([{'id': str(foreign.pk), 'status': 'completed'},
+                              {'id': str(self.tasks[0].pk), 'status': 'completed'}])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Task.objects.filter(status='completed').count(), 0)
+
+    def test_invalid_status_is_rejected(self):
+        self.client.force_login(self.owner)
+        response = self.post([{'id': str(self.tasks[0].pk), 'status': 'bogus'}])
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskTagTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.client.force_login(self.owner)
+
+    def test_tags_are_normalized_and_mirrored(self):
+        task = self.make_task(self.project, tags=['Bug', ' frontend ', 'bug'])
+        self.assertEqual(
+            sorted(TaskTag.objects.filter(task=task).values_list('tag__name', flat=True)),
+            ['bug', 'frontend'],
+        )
+        task.tags = ['frontend', 'ux']
+        task.save()
+        self.assertEqual(
+            sorted(TaskTag.objects.filter(task=task).values_list('tag__name', flat=True)),
+            ['frontend', 'ux'],
+        )
+
+    def test_tag_filter_and_cloud(self):
+        self.make_task(self.project, tags=['bug'])
+        self.make_task(self.project, tags=['bug', 'ux'])
+        self.make_task(self.project)
+
+        response = self.client.get(reverse('core:task_list'), {'tag': 'BUG'})
+        self.assertEqual(response.context['paginator'].count, 2)
+
+        response = self.client.get(reverse('core:project_tag_cloud', args=[self.project.pk]))
+        self.assertEqual(response.json()['tags'], [{'name': 'bug', 'count': 2}, {'name': 'ux', 'count': 1}])
+
+        response = self.client.get(reverse('core:tag_autocomplete'), {'q': 'b'})
+        self.assertEqual(response.json()['results'], ['bug'])
+
+    def test_bulk_tag_update_resyncs_the_mirror(self):
+        first = self.make_task(self.project, tags=['bug', 'ux'])
+        second = self.make_task(self.project)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk__in=[first.pk, second.pk]).update(tags=['Bug', 'api'])
+
+        response = self.client.get(reverse('core:project_tag_cloud', args=[self.project.pk]))
+        self.assertEqual(response.json()['tags'], [{'name': 'api', 'count': 2}, {'name': 'bug', 'count': 2}])
+
+    def test_bulk_project_move_follows_the_tags(self):
+        other = self.make_project(self.owner, title='Other')
+        task = self.make_task(self.project, tags=['bug'])
+        self.make_task(self.project, tags=['bug', 'ux'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk=task.pk).update(project=other)
+
+        cloud = self.client.get(reverse('core:project_tag_cloud', args=[self.project.pk])).json()['tags']
+        self.assertEqual(cloud, [{'name': 'bug', 'count': 1}, {'name': 'ux', 'count': 1}])
+        cloud = self.client.get(reverse('core:project_tag_cloud', args=[other.pk])).json()['tags']
+        self.assertEqual(cloud, [{'name': 'bug', 'count': 1}])
+
+    def test_form_accepts_comma_separated_tags(self):
+        form = TaskForm(data={
+            'title': 'Tagged', 'description': 'x', 'project': self.project.pk, 'status': 'todo',
+            'priority': 'medium', 'due_date': '2030-01-01T10:00', 'tags': 'API, api, Backend',
+        }, user=self.owner)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['tags'], ['api', 'backend'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AttachmentContentTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.task = self.make_task(self.project)
+        self.other_task = self.make_task(self.project)
+
+    def attach(self, task, content=b'%PDF same bytes', name='spec.pdf'):
+        return TaskAttachment.objects.create(
+            task=task, uploaded_by=self.owner, file=SimpleUploadedFile(name, content),
+        )
+
+    def test_identical_uploads_share_one_stored_file(self):
+        first = self.attach(self.task)
+        second = self.attach(self.other_task, name='copy.pdf')
+        self.assertEqual(AttachmentContent.objects.count(), 1)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual((second.filename, second.file_size), ('copy.pdf', 15))
+        self.assertEqual(AttachmentContent.objects.get().ref_count, 2)
+
+        storage = first.file.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(second.file.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(second.file.name))
+        self.assertFalse(AttachmentContent.objects.exists())
+
+    def test_upload_is_hashed_while_streaming(self):
+        self.client.force_login(self.owner)
+        upload = SimpleUploadedFile('notes.txt', b'hello', content_type='text/plain')
+        self.client.post(reverse('core:add_attachment', args=[self.task.pk]), {'file': upload})
+        attachment = TaskAttachment.objects.get()
+        self.assertEqual(attachment.content.sha256, hashlib.sha256(b'hello').hexdigest())
+        self.assertEqual((attachment.filename, attachment.file_size), ('notes.txt', 5))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ProtectedMediaTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.attachment = TaskAttachment.objects.create(
+            task=self.make_task(self.project), uploaded_by=self.owner,
+            file=SimpleUploadedFile('plan.pdf', b'%PDF plan'),
+        )
+        self.url = reverse('core:attachment_download', args=[self.attachment.pk])
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=True)
+    def test_members_get_an_accel_redirect(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.attachment.file.name)
+        self.assertIn('plan.pdf', response['Content-Disposition'])
+        self.assertEqual(response.content, b'')
+
+    def test_without_nginx_the_file_is_streamed(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF plan')
+
+    def test_outsiders_are_refused(self):
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class SingleFetchViewTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.manager = User.objects.create_user(username='manager', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.project = self.make_project(self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.manager, role='manager')
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        self.task = self.make_task(self.project)
+
+    def test_project_roles_come_from_the_role_cache(self):
+        get_project_roles(User.objects.get(pk=self.manager.pk))
+        self.client.force_login(self.manager)
+        url = reverse('core:project_update', args=[self.project.pk])
+        with self.assertNumQueries(5):  # session, user, project, initial members, member choices
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_task_views_fetch_the_task_once(self):
+        get_project_roles(User.objects.get(pk=self.owner.pk))
+        self.client.force_login(self.owner)
+        with self.assertNumQueries(5):  # session, user, task, comment and attachment counts
+            self.assertEqual(self.client.get(reverse('core:task_delete', args=[self.task.pk])).status_code, 200)
+
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(reverse('core:task_delete', args=[self.task.pk])).status_code, 403)
+
+    def test_task_delete_redirects_to_project(self):
+        self.client.force_login(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('core:task_delete', args=[self.task.pk]))
+        self.assertRedirects(response, reverse('core:project_detail', args=[self.project.pk]))
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 0)
+
+
+class ProjectRoleCacheTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.project = self.make_project(self.owner)
+
+    def fresh(self, user):
+        # A new instance per "request", so only the shared cache can help
+        return User.objects.get(pk=user.pk)
+
+    def test_roles_are_cached_across_requests(self):
+        ProjectMember.objects.create(project=self.project, user=self.member, role='manager')
+        self.assertEqual(get_project_roles(self.fresh(self.member)), {str(self.project.pk): 'manager'})
+        member = self.fresh(self.member)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_project_role(member, self.project.pk), 'manager')
+            self.assertEqual(get_project_role(member, self.project.pk), 'manager')
+
+    def test_membership_writes_expire_the_roles(self):
+        membership = ProjectMember.objects.create(project=self.project, user=self.member)
+        self.assertEqual(get_project_role(self.fresh(self.member), self.project.pk), 'member')
+
+        membership.is_active = False
+        membership.save()
+        self.assertIsNone(get_project_role(self.fresh(self.member), self.project.pk))
+
+        membership.delete()
+        self.assertIsNone(get_project_role(self.fresh(self.member), self.project.pk))
+
+        self.project.members.add(self.member, through_defaults={'role': 'viewer'})
+        self.assertEqual(get_project_role(self.fresh(self.member), self.project.pk), 'viewer')
+
+    def test_owner_change_expires_both_owners(self):
+        self.assertEqual(get_project_role(self.fresh(self.owner), self.project.pk), 'owner')
+        self.assertIsNone(get_project_role(self.fresh(self.member), self.project.pk))
+
+        project = Project.objects.get(pk=self.project.pk)
+        project.owner = self.member
+        project.save()
+        self.assertEqual(get_project_role(self.fresh(self.member), self.project.pk), 'owner')
+        # The old owner keeps the membership row created with the project
+        self.assertEqual(get_project_role(self.fresh(self.owner), self.project.pk), 'owner')
+
+        ProjectMember.objects.filter(user=self.owner).delete()
+        self.assertIsNone(get_project_role(self.fresh(self.owner), self.project.pk))
+
+    def test_bulk_membership_writes_expire_the_roles(self):
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        task = self.make_task(self.project, assigned_to=self.member)
+        other = self.make_task(self.project)
+        self.assertEqual(get_project_role(self.fresh(self.member), self.project.pk), 'member')
+
+        ProjectMember.objects.filter(user=self.member).update(is_active=False)
+        self.assertIsNone(get_project_role(self.fresh(self.member), self.project.pk))
+        # The assigned task stays visible, but planning it needs a contributor role
+        self.client.force_login(self.member)
+        response = self.client.post(reverse('core:task_dependency_add', args=[task.pk]),
+                                    {'depends_on': str(other.pk)}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        ProjectMember.objects.filter(user=self.member).update(is_active=True)
+        self.assertEqual(get_project_role(self.fresh(self.member), self.project.pk), 'member')
+        ProjectMember.objects.filter(user=self.member).delete()
+        self.assertIsNone(get_project_role(self.fresh(self.member), self.project.pk))
+
+    def test_bulk_owner_change_expires_both_owners(self):
+        ProjectMember.objects.filter(user=self.owner).delete()
+        self.assertEqual(get_project_role(self.fresh(self.owner), self.project.pk), 'owner')
+        self.assertIsNone(get_project_role(self.fresh(self.member), self.project.pk))
+
+        Project.objects.filter(pk=self.project.pk).update(owner=self.member)
+        self.assertEqual(get_project_role(self.fresh(self.member), self.project.pk), 'owner')
+        self.assertIsNone(get_project_role(self.fresh(self.owner), self.project.pk))
+
+    def test_task_form_offers_contributor_projects_only(self):
+        viewed = self.make_project(self.owner, title='Viewed')
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        ProjectMember.objects.create(project=viewed, user=self.member, role='viewer')
+        form = TaskForm(user=self.fresh(self.member))
+        self.assertEqual(list(form.fields['project'].queryset), [self.project])
+
+
+class TaskCommentPaginationTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.task = self.make_task(self.project)
+        start = timezone.now() - timedelta(days=1)
+        comments = TaskComment.objects.bulk_create(
+            TaskComment(task=self.task, author=self.owner, content=f'Comment {i}')
+            for i in range(COMMENTS_PER_PAGE * 2 + 5)
+        )
+        for i, comment in enumerate(comments):
+            TaskComment.objects.filter(pk=comment.pk).update(created_at=start + timedelta(minutes=i))
+        self.client.force_login(self.owner)
+
+    def test_detail_renders_newest_comments_in_constant_queries(self):
+        url = reverse('core:task_detail', args=[self.task.pk])
+        self.client.get(url)
+        with self.assertNumQueries(8):  # session, user, task, comments, comment count, creator, attachments, related tasks
+            response = self.client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[-1].content, f'Comment {COMMENTS_PER_PAGE * 2 + 4}')
+        self.assertEqual(response.context['comment_count'], COMMENTS_PER_PAGE * 2 + 5)
+        self.assertIsNotNone(response.context['comments_next_cursor'])
+
+    def test_older_comments_are_paged_by_cursor(self):
+        url = reverse('core:task_comments', args=[self.task.pk])
+        cursor, seen = '', []
+        while cursor is not None:
+            data = self.client.get(url, {'cursor': cursor, 'format': 'json'}).json()
+            seen = [comment['content'] for comment in data['comments']] + seen
+            cursor = data['next_cursor']
+        self.assertEqual(seen, [f'Comment {i}' for i in range(COMMENTS_PER_PAGE * 2 + 5)])
+
+    def test_fragment_carries_the_next_cursor(self):
+        response = self.client.get(reverse('core:task_comments', args=[self.task.pk]))
+        self.assertContains(response, 'comment-item', count=COMMENTS_PER_PAGE)
+        self.assertTrue(response['X-Next-Cursor'])
+        self.assertEqual(self.client.get(response.request['PATH_INFO'], {'cursor': 'bogus'}).status_code, 400)
+        tampered = encode_cursor(timezone.now(), 'x')
+        self.assertEqual(self.client.get(response.request['PATH_INFO'], {'cursor': tampered}).status_code, 400)
+
+    def test_outsiders_cannot_page_comments(self):
+        outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(reverse('core:task_comments', args=[self.task.pk])).status_code, 404)
+
+    def test_add_comment_redirects_to_task(self):
+        response = self.client.post(reverse('core:add_comment', args=[self.task.pk]), {'content': 'Newest'})
+        self.assertRedirects(response, reverse('core:task_detail', args=[self.task.pk]))
+        self.assertEqual(self.task.comments.count(), COMMENTS_PER_PAGE * 2 + 6)
+
+
+class AutocompleteTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass', first_name='Olivia')
+        self.member = User.objects.create_user(username='member', password='testpass', last_name='Oakes')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner, title='Orbit')
+        self.hidden = self.make_project(self.outsider, title='Orchard')
+        ProjectMember.objects.create(project=self.project, user=self.member, role='viewer')
+        self.client.force_login(self.member)
+
+    def results(self, name, **params):
+        return self.client.get(reverse(name), params).json()['results']
+
+    def test_projects_are_scoped_by_visibility(self):
+        self.assertEqual([r['text'] for r in self.results('core:project_autocomplete', q='or')], ['Orbit'])
+        self.assertEqual(self.results('core:project_autocomplete', q='or', contributing=1), [])
+        self.assertEqual(self.results('core:project_autocomplete', q=''), [])
+
+    def test_users_match_username_and_names(self):
+        names = [r['username'] for r in self.results('core:user_autocomplete', q='o')]
+        self.assertEqual(names, ['member', 'outsider', 'owner'])
+        self.assertEqual([r['username'] for r in self.results('core:user_autocomplete', q='oak')], ['member'])
+
+    def test_users_can_be_limited_to_a_visible_project(self):
+        members = self.results('core:user_autocomplete', q='ow', project=self.project.pk)
+        self.assertEqual([r['username'] for r in members], ['owner'])
+        self.assertEqual([r['text'] for r in self.results('core:user_autocomplete', q='o', project=self.project.pk)],
+                         ['Oakes', 'Olivia'])
+        self.assertEqual(self.results('core:user_autocomplete', q='o', project=self.hidden.pk), [])
+        self.assertEqual(self.results('core:user_autocomplete', q='o', project='bogus'), [])
+
+    def test_form_widgets_render_only_selected_options(self):
+        task = self.make_task(self.project, assigned_to=self.member)
+        html = str(TaskForm(instance=task, user=self.owner)['assigned_to'])
+        self.assertIn('data-autocomplete-url="%s"' % reverse('core:user_autocomplete'), html)
+        self.assertIn('data-autocomplete-forward="project"', html)
+        self.assertEqual(html.count('<option'), 2)  # empty label and the assignee
+        self.assertNotIn('outsider', html)
+
+    def test_form_validates_submitted_ids_only(self):
+        data = {
+            'title': 'Task', 'description': 'Description', 'project': self.project.pk,
+            'assigned_to': self.outsider.pk, 'status': 'todo', 'priority': 'medium',
+            'due_date': (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M'),
+        }
+        with self.assertNumQueries(5):  # role map, submitted project and assignee, their model FK checks
+            self.assertTrue(TaskForm(data, user=self.owner).is_valid())
+        self.assertFalse(TaskForm(dict(data, project=self.hidden.pk), user=self.owner).is_valid())
+
+    def test_form_pages_render_autocomplete_widgets(self):
+        for name in ('core:task_create', 'core:project_create'):
+            response = self.client.get(reverse(name))
+            self.assertContains(response, 'data-autocomplete-url')
+            self.assertNotContains(response, 'outsider')
+
+
+class ExportTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.other = self.make_project(self.member, title='Other')
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        self.task = self.make_task(self.project, assigned_to=self.member, tags=['backend', 'api'])
+        self.make_task(self.other, title='Hidden')
+        TaskComment.objects.create(task=self.task, author=self.member, content='Line one\nline two')
+
+    def stream(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_task_export_is_streamed_and_scoped(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('core:export_data', args=['tasks']))
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.stream(response))))
+        self.assertEqual([row['title'] for row in rows], ['Test Task'])
+        self.assertEqual(rows[0]['assigned_to'], 'member')
+        self.assertEqual(rows[0]['tags'], 'backend, api')
+
+    def test_jsonl_comment_export_of_one_project(self):
+        self.client.force_login(self.member)
+        response = self.client.get(
+            reverse('core:export_data', args=['comments']), {'format': 'jsonl', 'project': self.project.pk},
+        )
+        lines = [json.loads(line) for line in self.stream(response).splitlines()]
+        self.assertEqual(lines, [{
+            'id': self.task.comments.get().pk, 'task': str(self.task.pk), 'author': 'member',
+            'content': 'Line one\nline two', 'created_at': lines[0]['created_at'],
+        }])
+
+    def test_invisible_project_and_unknown_kind_are_refused(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(reverse('core:export_data', args=['tasks']), {'project': self.other.pk}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('core:export_data', args=['users'])).status_code, 404)
+
+    def test_command_exports_everything(self):
+        with tempfile.NamedTemporaryFile(mode='r', suffix='.csv') as output:
+            call_command('export_data', 'tasks', output=output.name, chunk_size=1, stderr=StringIO())
+            rows = list(csv.DictReader(output))
+        self.assertEqual(sorted(row['title'] for row in rows), ['Hidden', 'Test Task'])
+
+        stdout = StringIO()
+        call_command('export_data', 'memberships', export_format='jsonl', project=str(self.project.pk), stdout=stdout)
+        users = sorted(json.loads(line)['user'] for line in stdout.getvalue().splitlines())
+        self.assertEqual(users, ['member', 'owner'])
+
+
+class TaskImportTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.other = self.make_project(self.member, title='Other')
+        self.due = (timezone.now() + timedelta(days=3)).strftime('%Y-%m-%d %H:%M')
+
+    def write_rows(self, rows, suffix):
+        file = tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False, encoding='utf-8', newline='')
+        with file:
+            if suffix == '.csv':
+                writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                file.writelines(json.dumps(row) + '\n' for row in rows)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def task_row(self, **kwargs):
+        row = {
+            'project': str(self.project.pk), 'title': 'Imported', 'description': 'From CSV',
+            'status': 'todo', 'priority': 'high', 'due_date': self.due,
+            'assigned_to': 'member', 'created_by': 'owner', 'tags': 'migration, board',
+        }
+        row.update(kwargs)
+        return row
+
+    def test_csv_import_inserts_in_bulk_and_recounts_once(self):
+        rows = [self.task_row(status='completed' if i % 2 else 'todo') for i in range(10)]
+        rows.append(self.task_row(status='bogus', assigned_to='nobody'))
+        path = self.write_rows(rows, '.csv')
+        errors = path + '.errors'
+        self.addCleanup(lambda: os.path.exists(errors) and os.remove(errors))
+
+        stdout = StringIO()
+        call_command('import_tasks', path, batch_size=4, errors=errors, stdout=stdout)
+        self.assertIn('Imported 10 tasks', stdout.getvalue())
+        self.assertIn('rows/sec', stdout.getvalue())
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_task_count, self.project.completed_task_count), (5, 5))
+        self.assertEqual(TaskTag.objects.filter(project=self.project).count(), 20)
+        self.assertEqual(Task.objects.filter(assigned_to=self.member).count(), 10)
+        with open(errors) as error_file:
+            rejected = [json.loads(line) for line in error_file]
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(rejected[0]['line'], 12)
+        self.assertEqual(set(rejected[0]['errors']), {'status', 'assigned_to'})
+
+    def test_batches_use_constant_queries(self):
+        path = self.write_rows([self.task_row() for i in range(50)], '.jsonl')
+        # users and projects once, then per batch a savepoint around the task, tag, TaskTag and search
+        # writes, and at the end the counter recount and the workload rebuild
+        with self.assertNumQueries(26):
+            call_command('import_tasks', path, batch_size=25, stdout=StringIO())
+        self.assertEqual(Task.objects.count(), 50)
+
+    def test_jsonl_round_trip_with_comments(self):
+        task = self.make_task(self.project, title='Exported', assigned_to=self.member)
+        TaskComment.objects.create(task=task, author=self.member, content='Keep me')
+        exported = json.loads(''.join(iter_export('tasks', 'jsonl')))
+        exported['comments'] = [{'author': 'member', 'content': 'Keep me'}]
+        task_id = task.pk
+        task.delete()
+        path = self.write_rows([exported, exported], '.jsonl')
+        stdout = StringIO()
+        call_command('import_tasks', path, stdout=stdout)
+        self.assertIn('rejected 1 rows', stdout.getvalue())  # the repeated id
+
+        imported = Task.objects.get(pk=task_id)
+        self.assertEqual(imported.assigned_to, self.member)
+        self.assertEqual(list(imported.comments.values_list('content', flat=True)), ['Keep me'])
+        self.assertEqual(SearchEntry.objects.filter(task_id=task_id).count(), 2)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 1)
+
+    def test_upload_is_limited_to_contributor_projects(self):
+        self.client.force_login(self.owner)
+        path = self.write_rows([self.task_row(), self.task_row(project=str(self.other.pk))], '.csv')
+        with open(path, 'rb') as upload:
+            response = self.client.post(reverse('core:task_import'), {'file': upload})
+        data = response.json()
+        self.assertEqual((data['created'], data['failed']), (1, 1))
+        self.assertEqual(data['errors'][0]['errors'], {'project': ['You cannot add tasks to this project.']})
+
+
+class SearchTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner, title='Payments', description='Billing platform')
+        self.project.members.add(self.member)
+        self.other = self.make_project(self.outsider, title='Marketing')
+
+    def found(self, user, text, kinds=None):
+        return [(entry.kind, entry.object_id) for entry in search(user, text, kinds).results]
+
+    def test_saves_that_keep_the_indexed_fields_skip_the_entry(self):
+        task = Task.objects.get(pk=self.make_task(self.project, title='Invoices').pk)
+        with CaptureQueriesContext(connection) as queries:
+            task.status = 'in_progress'
+            task.save()
+        self.assertFalse(any('core_searchentry' in query['sql'] for query in queries))
+
+        task.title = 'Refunds'
+        task.save()
+        self.assertEqual(self.found(self.owner, 'refunds'), [('task', str(task.pk))])
+
+    def test_ranks_title_matches_first_and_matches_prefixes(self):
+        body_match = self.make_task(self.project, title='Cleanup', description='Refund the invoice')
+        title_match = self.make_task(self.project, title='Invoice export', description='CSV')
+        self.assertEqual(self.found(self.member, 'invoic'), [
+            ('task', str(title_match.pk)), ('task', str(body_match.pk)),
+        ])
+        self.assertEqual(self.found(self.member, 'billing'), [('project', str(self.project.pk))])
+
+    def test_results_are_limited_to_visible_projects_and_assigned_tasks(self):
+        hidden = self.make_task(self.other, title='Launch campaign')
+        assigned = self.make_task(self.other, title='Launch video', assigned_to=self.member)
+        comment = TaskComment.objects.create(task=hidden, author=self.outsider, content='Launch date moved')
+        self.assertEqual(self.found(self.member, 'launch'), [('task', str(assigned.pk))])
+        self.assertEqual(len(self.found(self.outsider, 'launch')), 3)
+        self.assertEqual(self.found(self.outsider, 'launch', ['comment']), [('comment', str(comment.pk))])
+
+    def test_entries_follow_saves_updates_and_deletes(self):
+        task = self.make_task(self.other, title='Draft')
+        comment = TaskComment.objects.create(task=task, author=self.outsider, content='Needs a review')
+        self.assertEqual(self.found(self.member, 'review'), [])
+
+        # Assigning the task lets the assignee find its comments too
+        task.assigned_to = self.member
+        task.save()
+        self.assertEqual(self.found(self.member, 'review'), [('comment', str(comment.pk))])
+
+        Task.objects.filter(pk=task.pk).update(title='Final copy')
+        self.assertEqual(self.found(self.member, 'final'), [('task', str(task.pk))])
+        self.assertEqual(self.found(self.member, 'draft'), [])
+
+        comment.delete()
+        self.assertEqual(self.found(self.member, 'review'), [])
+        task.delete()
+        self.assertEqual(self.found(self.outsider, 'final'), [])
+
+    def test_search_view_and_rebuild_command(self):
+        task = self.make_task(self.project, title='Quarterly report')
+        SearchEntry.objects.all().delete()
+        stdout = StringIO()
+        call_command('rebuild_search_index', stdout=stdout)
+        self.assertIn('Indexed 3 entries', stdout.getvalue())
+
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('core:search'), {'q': 'quarterly', 'format': 'json'})
+        data = response.json()
+        self.assertEqual([result['id'] for result in data['results']], [str(task.pk)])
+        self.assertEqual(data['results'][0]['url'], reverse('core:task_detail', kwargs={'pk': task.pk}))
+        self.assertFalse(data['has_next'])
+        response = self.client.get(reverse('core:search'), {'q': 'quarterly'})
+        self.assertContains(response, 'Quarterly report')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ActivityTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.task = self.make_task(self.project, title='Ship it')
+
+    def verbs(self, **filters):
+        return list(Activity.objects.filter(**filters).order_by('id').values_list('verb', flat=True))
+
+    def test_buffered_rows_are_written_with_one_insert_and_dropped_on_rollback(self):
+        with self.assertNumQueries(1):  # the activity rows; nobody listens, so no live events
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    record_activity('commented', self.project.pk, self.task.pk, self.owner.pk, excerpt=str(i))
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    record_activity('member_added', self.project.pk, user=self.member.pk)
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.verbs(), ['commented'] * 5)
+
+    def test_held_activity_is_attributed_to_the_request_user(self):
+        request = type('Request', (), {'user': self.member})()
+        with self.captureOnCommitCallbacks(execute=True):
+            with activity_buffer.hold(request):
+                self.task.status = 'in_progress'
+                self.task.save()
+        activity = Activity.objects.get()
+        self.assertEqual((activity.verb, activity.actor, activity.task_id), ('status_changed', self.member, self.task.pk))
+        self.assertEqual(activity.data, {'title': 'Ship it', 'old_status': 'todo', 'status': 'in_progress'})
+
+    def test_signals_record_comments_attachments_and_membership(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.member)
+            TaskComment.objects.create(task=self.task, author=self.member, content='Looks good')
+            TaskAttachment.objects.create(task=self.task, uploaded_by=self.member,
+                                          file=SimpleUploadedFile('notes.txt', b'notes'))
+            ProjectMember.objects.filter(project=self.project, user=self.member).delete()
+        self.assertEqual(self.verbs(actor=self.member), ['commented', 'attachment_added'])
+        self.assertEqual(self.verbs(verb__startswith='member', data__user=self.member.pk),
+                         ['member_added', 'member_removed'])
+
+        # Memberships deleted with their project are not recorded as removals
+        other = self.make_project(self.owner, title='Other')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertFalse(Activity.objects.filter(project_id=other.pk).exists())
+
+    def test_project_and_user_feeds_page_by_cursor(self):
+        other = self.make_project(self.outsider, title='Other')
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(ACTIVITY_PER_PAGE + 5):
+                record_activity('commented', self.project.pk, self.task.pk, self.owner.pk, excerpt=str(i))
+            record_activity('commented', other.pk, actor_id=self.owner.pk, excerpt='elsewhere')
+
+        self.client.force_login(self.owner)
+        url = reverse('core:project_activity', kwargs={'pk': self.project.pk})
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['activities']), ACTIVITY_PER_PAGE)
+        self.assertEqual(first['activities'][0]['actor'], 'owner')
+        second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        self.assertEqual([a['data']['excerpt'] for a in second['activities']][-2:], ['1', '0'])
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(self.client.get(url, {'cursor': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor(timezone.now(), 'x')}).status_code, 400)
+
+        # The owner's work in a project the viewer cannot see stays hidden
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        feed = self.client.get(reverse('core:user_activity', kwargs={'pk': self.owner.pk})).json()
+        self.assertEqual([a['data']['excerpt'] for a in feed['activities']], ['elsewhere'])
+
+
+class OverdueReminderTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass', email='owner@example.com')
+        self.member = User.objects.create_user(username='member', password='testpass', email='member@example.com',
+                                               first_name='Mia')
+        self.project = self.make_project(self.owner, title='Website')
+        for days in (3, 1, 2):
+            self.make_task(self.project, title=f'Late by {days}', assigned_to=self.member,
+                           due_date=timezone.now() - timedelta(days=days))
+        self.make_task(self.project, title='Owner late', assigned_to=self.owner,
+                       due_date=timezone.now() - timedelta(hours=1))
+        self.make_task(self.project, title='Unassigned', due_date=timezone.now() - timedelta(days=1))
+        self.make_task(self.project, title='Done', assigned_to=self.member, status='completed',
+                       due_date=timezone.now() - timedelta(days=1))
+        self.make_task(self.project, title='Upcoming', assigned_to=self.member)
+
+    def test_scan_reads_fixed_size_batches_along_the_due_index(self):
+        with self.assertNumQueries(3):
+            hits = scan_overdue_tasks(timezone.now(), batch_size=2)
+        self.assertEqual({user_id: count for user_id, (count, task_ids) in hits.items()},
+                         {self.member.pk: 3, self.owner.pk: 1})
+        titles = [Task.objects.get(pk=pk).title for pk in hits[self.member.pk][1]]
+        self.assertEqual(titles, ['Late by 3', 'Late by 2', 'Late by 1'])
+
+    def test_sends_one_reminder_per_assignee_per_run(self):
+        stdout = StringIO()
+        call_command('send_overdue_reminders', batch_size=2, stdout=stdout)
+        self.assertIn('Sent 2 reminders for 4 overdue tasks', stdout.getvalue())
+        reminders = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(reminders), {'member@example.com', 'owner@example.com'})
+        body = reminders['member@example.com'].body
+        self.assertEqual(reminders['member@example.com'].subject, 'You have 3 overdue tasks')
+        self.assertIn('Hi Mia', body)
+        self.assertLess(body.index('Late by 3'), body.index('Late by 1'))
+        self.assertNotIn('Done', body)
+
+        # A second node (or cron firing again) within the interval does nothing
+        call_command('send_overdue_reminders', stdout=stdout)
+        self.assertIn('Skipped', stdout.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_run_is_skipped_while_another_node_holds_the_lock(self):
+        lease = acquire_lock('send_overdue_reminders', timedelta(minutes=10))
+        stdout = StringIO()
+        call_command('send_overdue_reminders', force=True, stdout=stdout)
+        self.assertIn('Skipped', stdout.getvalue())
+        self.assertEqual(mail.outbox, [])
+
+        lease.release()
+        call_command('send_overdue_reminders', force=True, stdout=stdout)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class WorkloadRollupTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.member = User.objects.create_user(username='member', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.project.members.add(self.member)
+
+    def create_task(self, days, **kwargs):
+        return Task.objects.create(
+            title='Work', description='', due_date=timezone.now() + timedelta(days=days),
+            project=self.project, created_by=self.owner, **kwargs,
+        )
+
+    def rollup(self):
+        return sorted(
+            WorkloadRollup.objects.exclude(task_count=0).values_list(
+                'project_id', 'assignee_id', 'due_day', 'task_count', 'open_task_count',
+                'estimated_hours', 'actual_hours', 'open_estimated_hours',
+            ),
+            key=str,
+        )
+
+    def test_incremental_updates_match_a_rebuild(self):
+        other = self.make_project(self.owner, title='Other')
+        with self.captureOnCommitCallbacks(execute=True):
+            late = self.create_task(-2, assigned_to=self.member, estimated_hours=5)
+            moved = self.create_task(3, assigned_to=self.member, estimated_hours=8, actual_hours=2)
+            self.create_task(3, estimated_hours=1)
+            doomed = self.create_task(1, assigned_to=self.owner, estimated_hours=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.assigned_to = self.owner
+            moved.due_date += timedelta(days=7)
+            moved.save()
+            late.actual_hours = 6
+            late.save(update_fields=['actual_hours'])
+            Task.objects.filter(pk=late.pk).set_statuses({late.pk: 'completed'})
+            Task.objects.filter(pk=moved.pk).update(project=other)
+            Task.objects.get(pk=doomed.pk).delete()
+        incremental = self.rollup()
+        rebuild_workload([self.project.pk, other.pk])
+        self.assertEqual(incremental, self.rollup())
+        self.assertEqual(WorkloadRollup.objects.filter(assignee=self.member).get().actual_hours, 6)
+
+    def test_report_reads_the_rollup_grouped_and_bucketed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_task(-3, assigned_to=self.member, estimated_hours=4, actual_hours=6)
+            self.create_task(10, assigned_to=self.member, estimated_hours=2)
+            self.create_task(10, assigned_to=self.owner, status='completed', estimated_hours=3, actual_hours=3)
+
+        with self.assertNumQueries(2):  # the rollup aggregate and the user names
+            rows = {row['name']: row for row in workload_report(group_by='assignee')}
+        self.assertEqual(rows['member']['tasks'], 2)
+        self.assertEqual(rows['member']['overdue_tasks'], 1)
+        self.assertEqual(rows['member']['open_estimated'], 6)
+        self.assertEqual(rows['member']['estimate_accuracy'], 1.0)
+        self.assertEqual(rows['owner']['open_tasks'], 0)
+        self.assertEqual(len(workload_report(group_by='assignee', bucket='day')), 3)
+
+        self.client.force_login(self.owner)
+        url = reverse('core:workload_report')
+        data = self.client.get(url, {'group': 'project', 'bucket': 'month'}).json()
+        self.assertEqual({row['name'] for row in data['results']}, {'Test Project'})
+        self.assertEqual(self.client.get(url, {'group': 'team'}).status_code, 400)
+
+        # Plain members manage nothing, so they get no rows
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(url).json()['results'], [])
+        self.assertEqual(self.client.get(url, {'project': str(self.project.pk)}).status_code, 404)
+
+    def test_deleting_an_assignee_moves_their_tasks_to_the_unassigned_bucket(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_task(2, assigned_to=self.member, estimated_hours=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.delete()
+        rollup = WorkloadRollup.objects.get()
+        self.assertIsNone(rollup.assignee_id)
+        self.assertEqual(rollup.open_estimated_hours, 5)
+
+    def test_rebuild_command(self):
+        self.make_task(self.project, assigned_to=self.member, estimated_hours=2)
+        WorkloadRollup.objects.all().delete()
+        stdout = StringIO()
+        call_command('rebuild_workload', stdout=stdout)
+        self.assertIn('of 1 projects', stdout.getvalue())
+        self.assertEqual(WorkloadRollup.objects.get().open_estimated_hours, 2)
+
+
+class TaskStatusHistoryTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+
+    def create_task(self, **kwargs):
+        return Task.objects.create(
+            title='Work', description='', due_date=timezone.now() + timedelta(days=7),
+            project=self.project, created_by=self.owner, **kwargs,
+        )
+
+    def status_days(self):
+        return sorted(ProjectStatusDay.objects.values_list(
+            'project_id', 'day', 'status', 'entered', 'left', 'cycle_time_count',
+        ), key=str)
+
+    def test_transitions_are_logged_and_rolled_up_like_a_rebuild(self):
+        other = self.make_project(self.owner, title='Other')
+        with self.captureOnCommitCallbacks(execute=True):
+            saved = self.create_task()
+            bulk = self.create_task()
+            moved = self.create_task(status='in_progress')
+            doomed = self.create_task()
+        with self.captureOnCommitCallbacks(execute=True):
+            saved.status = 'in_progress'
+            saved.save()
+            saved.title = 'Renamed'
+            saved.save(update_fields=['title'])
+            Task.objects.filter(pk=bulk.pk).set_statuses({bulk.pk: 'completed'})
+            Task.objects.filter(pk=moved.pk).update(project=other)
+            Task.objects.get(pk=doomed.pk).delete()
+
+        self.assertEqual(
+            list(TaskStatusChange.objects.filter(task_id=saved.pk).order_by('pk').values_list('old_status', 'new_status')),
+            [('', 'todo'), ('todo', 'in_progress')],
+        )
+        self.assertEqual(
+            list(TaskStatusChange.objects.filter(task_id=moved.pk).order_by('pk').values_list('project_id', 'old_status', 'new_status')),
+            [(self.project.pk, '', 'in_progress'), (self.project.pk, 'in_progress', ''), (other.pk, '', 'in_progress')],
+        )
+        self.assertTrue(TaskStatusChange.objects.filter(task_id=doomed.pk, old_status='todo', new_status='').exists())
+
+        incremental = self.status_days()
+        rebuild_status_days([self.project.pk, other.pk])
+        self.assertEqual(incremental, self.status_days())
+
+    def test_burndown_and_cumulative_flow_read_the_daily_rows(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks = [self.create_task() for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks[0].status = 'completed'
+            tasks[0].save()
+
+        with self.assertNumQueries(2):  # the totals before the range and the rows in it
+            days = daily_status_counts(self.project.pk, today - timedelta(days=2), today)
+        self.assertEqual(len(days), 3)
+        self.assertEqual(days[0][1]['todo'], 0)
+        self.assertEqual(days[-1][1], {'todo': 2, 'in_progress': 0, 'review': 0, 'completed': 1, 'cancelled': 0})
+
+        chart = burndown(self.project.pk, today - timedelta(days=1), today)
+        self.assertEqual(chart[-1], {'date': today.isoformat(), 'remaining': 2, 'completed': 1})
+        self.assertEqual(cumulative_flow(self.project.pk, today, today)[0]['completed'], 1)
+
+    def test_cycle_time_runs_from_the_first_start(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.create_task()
+            log_status_changes([(task.pk, self.project.pk, 'todo', 'in_progress', task.created_at)],
+                               when=timezone.now() - timedelta(hours=48))
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(pk=task.pk).set_statuses({task.pk: 'completed'})
+
+        today = timezone.localdate()
+        rows = cycle_times(self.project.pk, today, today, 'day')
+        self.assertEqual([(row['completed'], row['average_hours']) for row in rows], [(1, 48.0)])
+
+    def test_chart_endpoints(self):
+        self.make_task(self.project)
+        url = reverse('core:project_burndown', args=[self.project.pk])
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(self.owner)
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['results']), 30)
+        self.assertEqual(data['results'][-1]['remaining'], 1)
+        self.assertEqual(self.client.get(url, {'start': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2020-01-01', 'end': '2025-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2025-02-01', 'end': '2025-01-01'}).status_code, 400)
+
+        cfd = self.client.get(reverse('core:project_cumulative_flow', args=[self.project.pk])).json()
+        self.assertEqual(cfd['results'][-1]['todo'], 1)
+        cycle_url = reverse('core:project_cycle_time', args=[self.project.pk])
+        self.assertEqual(self.client.get(cycle_url, {'bucket': 'month'}).json()['bucket'], 'month')
+        self.assertEqual(self.client.get(cycle_url, {'bucket': 'year'}).status_code, 400)
+
+    def test_rebuild_command(self):
+        self.make_task(self.project)
+        ProjectStatusDay.objects.all().delete()
+        stdout = StringIO()
+        call_command('rebuild_status_history', stdout=stdout)
+        self.assertIn('of 1 projects', stdout.getvalue())
+        self.assertEqual(ProjectStatusDay.objects.get().entered, 1)
+
+
+class TaskDependencyTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+
+    def chain(self, *hours):
+        tasks = [self.make_task(self.project, title=f'Step {i}', estimated_hours=h) for i, h in enumerate(hours)]
+        for before, after in zip(tasks, tasks[1:]):
+            add_dependency(after, before)
+        return tasks
+
+    def test_cycles_and_cross_project_edges_are_rejected(self):
+        first, second, third = self.chain(1, 1, 1)
+        with self.assertRaises(ValidationError):
+            add_dependency(first, third)
+        with self.assertRaises(ValidationError):
+            add_dependency(first, first)
+        with self.assertRaises(ValidationError):
+            add_dependency(first, self.make_task(self.make_project(self.owner, title='Other')))
+        add_dependency(third, first)
+        self.assertEqual(TaskDependency.objects.filter(project=self.project).count(), 3)
+
+    def test_graph_orders_tasks_and_finds_critical_path_and_blockers(self):
+        design = self.make_task(self.project, title='Design', estimated_hours=4)
+        api = self.make_task(self.project, title='API', estimated_hours=2)
+        ui = self.make_task(self.project, title='UI', estimated_hours=5)
+        release = self.make_task(self.project, title='Release', estimated_hours=1)
+        self.make_task(self.project, title='Done', estimated_hours=3, status='completed')
+        for task, depends_on in ((api, design), (ui, design), (release, api), (release, ui)):
+            add_dependency(task, depends_on)
+
+        with self.assertNumQueries(2):  # the tasks and the edges
+            graph = project_graph(self.project.pk)
+        with self.assertNumQueries(0):
+            project_graph(self.project.pk)
+        order = [node['id'] for node in graph['tasks']]
+        self.assertLess(order.index(str(design.pk)), order.index(str(api.pk)))
+        self.assertLess(order.index(str(ui.pk)), order.index(str(release.pk)))
+        self.assertEqual(graph['critical_path'], [str(design.pk), str(ui.pk), str(release.pk)])
+        self.assertEqual(graph['critical_hours'], 10)
+        self.assertEqual(set(graph['blocked']), {str(api.pk), str(ui.pk), str(release.pk)})
+
+        Task.objects.filter(pk=design.pk).set_statuses({design.pk: 'completed'})
+        graph = project_graph(self.project.pk)
+        self.assertEqual(graph['blocked'], [str(release.pk)])
+        self.assertEqual(graph['critical_path'], [str(ui.pk), str(release.pk)])
+
+    def test_moved_tasks_take_their_dependencies_along(self):
+        first, second, third = self.chain(1, 1, 1)
+        other = self.make_project(self.owner, title='Other')
+        project_graph(other.pk)
+        Task.objects.filter(pk__in=[first.pk, second.pk]).update(project=other)
+        self.assertEqual(
+            list(TaskDependency.objects.values_list('project_id', 'task_id', 'depends_on_id')),
+            [(other.pk, second.pk, first.pk)],
+        )
+        self.assertEqual(len(project_graph(other.pk)['tasks']), 2)
+        self.assertEqual(project_graph(self.project.pk)['blocked'], [])
+
+    def test_endpoints(self):
+        first, second = self.chain(2, 3)
+        url = reverse('core:project_dependency_graph', args=[self.project.pk])
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        add_url = reverse('core:task_dependency_add', args=[first.pk])
+        self.assertEqual(self.client.post(add_url, {}, content_type='application/json').status_code, 404)
+
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(url).json()['critical_hours'], 5)
+        response = self.client.post(add_url, {'depends_on': str(second.pk)}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('depends on', response.json()['error'])
+
+        remove_url = reverse('core:task_dependency_remove', args=[second.pk, first.pk])
+        self.assertTrue(self.client.post(remove_url).json()['success'])
+        response = self.client.post(add_url, {'depends_on': str(second.pk)}, content_type='application/json')
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.client.get(url).json()['critical_path'], [str(second.pk), str(first.pk)])
+
+
+class BoardTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(28):
+                Task.objects.create(
+                    title=f'Card {i}', description='', due_date=timezone.now(), project=self.project,
+                    created_by=self.owner, status='todo' if i < 25 else 'in_progress', assigned_to=self.owner,
+                )
+        self.project.refresh_from_db()
+        self.url = reverse('core:project_board', args=[self.project.pk])
+
+    def test_all_columns_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            board = {column['status']: column for column in project_board(self.project)}
+        self.assertEqual(list(board), [status for status, label in Task.STATUS_CHOICES])
+        self.assertEqual((board['todo']['total'], len(board['todo']['tasks'])), (25, 20))
+        self.assertEqual(board['todo']['tasks'][0]['title'], 'Card 24')
+        self.assertEqual(board['todo']['tasks'][0]['assignee'], 'owner')
+        self.assertIsNotNone(board['todo']['next_cursor'])
+        self.assertEqual([task['title'] for task in board['in_progress']['tasks']], ['Card 27', 'Card 26', 'Card 25'])
+        self.assertIsNone(board['in_progress']['next_cursor'])
+        self.assertEqual(board['completed']['tasks'], [])
+
+    def test_columns_load_more_by_cursor(self):
+        self.client.force_login(self.owner)
+        first = self.client.get(self.url).json()['columns'][0]
+        more = self.client.get(self.url, {'status': 'todo', 'cursor': first['next_cursor']}).json()['columns'][0]
+        self.assertEqual(len(more['tasks']), 5)
+        self.assertIsNone(more['next_cursor'])
+        seen = {task['id'] for task in first['tasks']} | {task['id'] for task in more['tasks']}
+        self.assertEqual(len(seen), 25)
+
+        self.assertEqual(self.client.get(self.url, {'status': 'todo', 'cursor': 'bogus'}).status_code, 400)
+        tampered = encode_cursor(timezone.now(), 'x')
+        self.assertEqual(self.client.get(self.url, {'status': 'todo', 'cursor': tampered}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'status': 'done'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'per_page': '500'}).status_code, 400)
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class LiveEventTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.task = self.make_task(self.project)
+
+    @override_settings(EVENTS_BACKEND='core.events.DatabaseBackend')
+    def test_committed_changes_are_stored_for_pollers(self):
+        last_id = DatabaseBackend.latest_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = 'completed'
+            self.task.save()
+        events = DatabaseBackend.fetch(last_id, [project_channel(self.project.pk)])
+        self.assertEqual([event.kind for event in events], ['progress', 'status_changed'])
+        self.assertEqual(events[0].data['progress'], 100.0)
+        self.assertEqual(events[1].data['task'], str(self.task.pk))
+        self.assertEqual(events[1].data['status'], 'completed')
+
+        stored = LiveEvent.objects.count()
+        LiveEvent.objects.update(created_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(DatabaseBackend.prune(), stored)
+        self.assertFalse(LiveEvent.objects.exists())
+
+    def test_writers_prune_without_subscribers(self):
+        self.assertFalse(bus.has_subscribers())
+        # Fill the outbox with stale rows up to just before the next pruning point
+        missing = EVENTS_PRUNE_EVERY - DatabaseBackend.latest_id() % EVENTS_PRUNE_EVERY - 1
+        LiveEvent.objects.bulk_create([LiveEvent(channel='project:x', kind='progress') for _ in range(missing)])
+        LiveEvent.objects.update(created_at=timezone.now() - timedelta(days=1))
+
+        backend = DatabaseBackend()
+        with self.assertNumQueries(3):  # the INSERT, the first row kept, the DELETE
+            backend.send([Event('project:x', 'progress', {}), Event('project:x', 'progress', {})])
+        self.assertEqual(LiveEvent.objects.count(), 2)
+        with self.assertNumQueries(1):
+            backend.send([Event('project:x', 'progress', {})])
+
+    def test_bus_delivers_to_subscribers_of_the_channel(self):
+        async def receive():
+            subscription = bus.subscribe(['project:a'])
+            try:
+                LocalBackend().send([Event('project:b', 'ignored', {}), Event('project:a', 'commented', {'x': 1})])
+                return await subscription.get(1)
+            finally:
+                subscription.close()
+
+        event = asyncio.run(receive())
+        self.assertEqual((event.kind, event.id), ('commented', 2))
+        self.assertIn('event: commented\ndata: {"x": 1}', event.encode())
+        self.assertFalse(bus.has_subscribers())
+
+    def test_streams_need_the_asgi_application(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(reverse('core:user_events')).status_code, 501)
+
+    @staticmethod
+    def insert_with_gap():
+        rows = LiveEvent.objects.bulk_create([
+            LiveEvent(channel='project:x', kind='late'), LiveEvent(channel='project:x', kind='early'),
+        ])
+        LiveEvent.objects.filter(pk=rows[0].pk).delete()
+        return rows
+
+    @override_settings(EVENTS_BACKEND='core.events.DatabaseBackend')
+    async def test_poller_delivers_rows_that_commit_late(self):
+        subscription = bus.subscribe(['project:x'])
+        backend = DatabaseBackend(interval=0.01)
+        try:
+            backend.start()
+            await asyncio.sleep(0.05)
+            # The first row is not committed yet when the poller reads past it
+            rows = await sync_to_async(self.insert_with_gap)()
+            self.assertEqual((await subscription.get(1)).kind, 'early')
+            await LiveEvent.objects.acreate(pk=rows[0].pk, channel='project:x', kind='late')
+            self.assertEqual((await subscription.get(1)).id, rows[0].pk)
+        finally:
+            subscription.close()
+            backend._task.cancel()
+
+    @override_settings(EVENTS_BACKEND='core.events.LocalBackend')
+    async def test_project_stream(self):
+        url = reverse('core:project_events', args=[self.project.pk])
+        await self.async_client.aforce_login(self.outsider)
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        get_backend().send([Event(project_channel(self.project.pk), 'progress', {'progress': 50})])
+        self.assertIn(b'event: progress', await asyncio.wait_for(anext(chunks), 1))
+        await chunks.aclose()
+
+
+class ConditionalGetTests(CoreTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='testpass')
+        self.outsider = User.objects.create_user(username='outsider', password='testpass')
+        self.project = self.make_project(self.owner)
+        self.task = self.make_task(self.project)
+        self.url = reverse('core:project_progress_data', args=[self.project.pk])
+
+    def test_unchanged_progress_is_answered_with_304(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.json(), {'progress': 0, 'tasks_by_status': [{'status': 'todo', 'count': 1}]})
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(3):  # session, user, the project's tasks_changed_at
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.make_task(self.project, status='completed')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['progress'], 50.0)
+
+        # Without access the view runs and answers 404, whatever the client sends
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_history_charts_revalidate_after_a_rebuild(self):
+        url = reverse('core:project_burndown', args=[self.project.pk])
+        self.client.force_login(self.owner)
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A rebuild rewrites the daily rows without touching the task counters
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_status_days([self.project.pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_dependency_graph_revalidates_against_its_cache_version(self):
+        other = self.make_task(self.project)
+        url = reverse('core:project_dependency_graph', args=[self.project.pk])
+        self.client.force_login(self.owner)
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        add_dependency(other, self.task)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
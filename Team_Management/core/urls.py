@@ -12,6 +12,7 @@ urlpatterns = [
     
     # Dashboard
     path('', views.dashboard, name='dashboard'),
+    path('search/', views.search_view, name='search'),
     
     # Project URLs
     path('projects/', views.ProjectListView.as_view(), name='project_list'),
@@ -29,15 +30,40 @@ urlpatterns = [
     
     # Task Actions
     path('tasks/<uuid:pk>/comment/', views.add_comment, name='add_comment'),
+    path('tasks/<uuid:pk>/comments/', views.task_comments, name='task_comments'),
     path('tasks/<uuid:pk>/attachment/', views.add_attachment, name='add_attachment'),
     path('tasks/<uuid:pk>/status/', views.task_status_update, name='task_status_update'),
+    path('tasks/<uuid:pk>/dependencies/', views.task_dependency_add, name='task_dependency_add'),
+    path('tasks/<uuid:pk>/dependencies/<uuid:depends_on>/delete/', views.task_dependency_remove,
+         name='task_dependency_remove'),
+    path('tasks/status/bulk/', views.task_status_bulk_update, name='task_status_bulk_update'),
+    path('tasks/import/', views.task_import, name='task_import'),
+    path('attachments/<int:pk>/download/', views.attachment_download, name='attachment_download'),
+    path('export/<str:kind>/', views.export_data, name='export_data'),
     
     # API Endpoints
     path('api/project/<uuid:pk>/progress/', views.project_progress_data, name='project_progress_data'),
+    path('api/project/<uuid:pk>/tags/', views.project_tag_cloud_data, name='project_tag_cloud'),
+    path('api/project/<uuid:pk>/activity/', views.project_activity, name='project_activity'),
+    path('api/project/<uuid:pk>/burndown/', views.project_burndown, name='project_burndown'),
+    path('api/project/<uuid:pk>/cfd/', views.project_cumulative_flow, name='project_cumulative_flow'),
+    path('api/project/<uuid:pk>/cycle-time/', views.project_cycle_time, name='project_cycle_time'),
+    path('api/project/<uuid:pk>/board/', views.project_board_data, name='project_board'),
+    path('api/project/<uuid:pk>/dependencies/', views.project_dependency_graph, name='project_dependency_graph'),
+    path('api/users/<int:pk>/activity/', views.user_activity, name='user_activity'),
+    path('api/reports/workload/', views.workload_report_data, name='workload_report'),
+    path('api/tags/autocomplete/', views.tag_autocomplete, name='tag_autocomplete'),
+    path('api/projects/autocomplete/', views.project_autocomplete, name='project_autocomplete'),
+    path('api/users/autocomplete/', views.user_autocomplete, name='user_autocomplete'),
+    
+    # Live updates (Server-Sent Events); served by the ASGI application only, see nginx.conf
+    path('events/project/<uuid:pk>/', views.project_events, name='project_events'),
+    path('events/me/', views.user_events, name='user_events'),
     
     # User Management
     path('users/', views.user_list, name='user_list'),
     path('users/<int:pk>/', views.user_detail, name='user_detail'),
+    path('users/<int:pk>/avatar/', views.user_avatar, name='user_avatar'),
 ]
 
 
@@ -1,67 +1,114 @@
 
 from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
 from django.contrib.auth.views import LogoutView
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy, reverse
-from django.db.models import Q, Count, Avg
+from django.db.models import Q, Count, Avg, Exists, OuterRef
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponseRedirect
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.contrib.auth import get_user_model
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from urllib.parse import quote
+import io
 import json
-
-from .models import Project, Task, Team, User, ProjectMember, TaskComment, TaskAttachment, TeamMember
-from .forms import ProjectForm, TaskForm, TaskCommentForm, TaskAttachmentForm, ProjectMemberForm, UserSearchForm, TaskFilterForm, ProjectFilterForm, CustomUserCreationForm, CustomAuthenticationForm, UserProfileForm
+import mimetypes
+import os
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+from .models import Activity, Project, Task, Team, User, ProjectMember, SearchEntry, TaskComment, TaskAttachment, TeamMember, TaskTag
+from .autocomplete import autocomplete_projects, autocomplete_users
+from .board import BOARD_MAX_PER_COLUMN, BOARD_PER_COLUMN, board_column, project_board
+from .dashboard import dashboard_version
+from .conditional import conditional_json, project_graph_version, project_history_version, project_tasks_version
+from .exports import EXPORT_FORMATS, EXPORT_KINDS, iter_export
+from .imports import TaskImporter, read_rows
+from .mixins import ProjectObjectMixin
+from .permissions import CONTRIBUTOR_ROLES, MANAGER_ROLES, get_project_role, get_project_roles, is_admin
+from .pagination import CursorPaginationMixin, InvalidCursor, paginate_by_cursor
+from .search import SEARCH_KINDS, entry_url, search
+from .tags import autocomplete_tags, normalize_tags, project_tag_cloud
+from .workload import REPORT_BUCKETS, REPORT_GROUPS, workload_report
+from .events import project_channel, stream
+from .dependencies import add_dependency, project_graph
+from .history import CYCLE_TIME_BUCKETS, burndown, cumulative_flow, cycle_times, history_range
+from .forms import ProjectForm, TaskForm, TaskCommentForm, TaskAttachmentForm, TaskImportForm, ProjectMemberForm, UserSearchForm, TaskFilterForm, ProjectFilterForm, CustomUserCreationForm, CustomAuthenticationForm, UserProfileForm
 
 
 
 User = get_user_model()
 
+DASHBOARD_STATS_TIMEOUT = 300  # overdue counts age with the clock, so don't cache forever
+
+
+def get_dashboard_stats(user, projects, tasks) -> dict:
+    """
+    Counters for the dashboard, computed with one conditional aggregate per
+    table plus an indexed overdue count, and cached per user until a write
+    to one of their projects bumps their version (see core.dashboard).
+    """
+    cache_key = f'dashboard:stats:{user.pk}:{dashboard_version(user)}'
+    stats = cache.get(cache_key)
+    if stats is not None:
+        return stats
+
+    stats = projects.aggregate(
+        total_projects=Count('pk'),
+        active_projects=Count('pk', filter=Q(status='active')),
+        completed_projects=Count('pk', filter=Q(status='completed')),
+    )
+    task_stats = tasks.aggregate(
+        total_tasks=Count('pk'),
+        **{status: Count('pk', filter=Q(status=status)) for status, _ in Task.STATUS_CHOICES}
+    )
+    stats['total_tasks'] = task_stats['total_tasks']
+    stats['completed_tasks'] = task_stats['completed']
+    # Counted apart so the partial index of open tasks (task_open_due_idx) serves it
+    stats['overdue_tasks'] = tasks.filter(due_date__lt=timezone.now(), status__in=Task.OPEN_STATUSES).count()
+    stats['tasks_by_status'] = [
+        {'status': status, 'count': task_stats[status]}
+        for status, _ in Task.STATUS_CHOICES if task_stats[status]
+    ]
+    cache.set(cache_key, stats, DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
 @login_required
 def dashboard(request) -> render:
     user = request.user
 
-    if user.role == 'admin':
-        projects = Project.objects.all()
-        tasks = Task.objects.all()
-    else:
-        projects = Project.objects.filter(members=user)
-        tasks = Task.objects.filter(
-            Q(project__members=user) | Q(assigned_to=user)
-        )  
- # Statistics
-    total_projects     = projects.count()
-    active_projects    = projects.filter(status='active').count()      
-    completed_projects = projects.filter(status='completed').count()
-    total_tasks        = tasks.count()
-    completed_tasks = tasks.filter(status='completed').count()
-    overdue_tasks = tasks.filter(
-        due_date__lt=timezone.now(),
-        status__in=['todo', 'in_progress', 'review']
-    ).count()    
+    projects = Project.objects.visible_to(user)
+    tasks = Task.objects.visible_to(user)
+    stats = get_dashboard_stats(user, projects, tasks)
+
   # Recent activities
     recent_tasks = tasks.order_by('-created_at')[:5]
     recent_projects = projects.order_by('-created_at')[:5]
     
-    # Tasks by status
-    tasks_by_status = tasks.values('status').annotate(count=Count('id'))
-    
     context = {
-        'total_projects': total_projects,
-        'active_projects': active_projects,
-        'completed_projects': completed_projects,
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'overdue_tasks': overdue_tasks,
+        'total_projects': stats['total_projects'],
+        'active_projects': stats['active_projects'],
+        'completed_projects': stats['completed_projects'],
+        'total_tasks': stats['total_tasks'],
+        'completed_tasks': stats['completed_tasks'],
+        'overdue_tasks': stats['overdue_tasks'],
         'recent_tasks': recent_tasks,
         'recent_projects': recent_projects,
-        'tasks_by_status': tasks_by_status,
+        'tasks_by_status': json.dumps(stats['tasks_by_status']),
     }
     
     return render(request, 'core/dashboard.html', context)
@@ -69,60 +116,52 @@ def dashboard(request) -> render:
 
 
 # Project Views
-class ProjectListView(LoginRequiredMixin, ListView):
+class ProjectListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Project
     template_name = 'core/project_list.html'
     context_object_name = 'projects'
     paginate_by = 10
     
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Project.objects.all()
-        return Project.objects.filter(members=user)
+        queryset = Project.objects.visible_to(self.request.user)
+
+        # Apply filters before pagination so pages and counts match them
+        status = self.request.GET.get('status', '')
+        priority = self.request.GET.get('priority', '')
+        if status:
+            queryset = queryset.filter(status=status)
+        if priority:
+            queryset = queryset.filter(priority=priority)
+        return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['status_filter'] = self.request.GET.get('status', '')
         context['priority_filter'] = self.request.GET.get('priority', '')
-        
-        # Apply filters
-        queryset = context['projects']
-        if context['status_filter']:
-            queryset = queryset.filter(status=context['status_filter'])
-        if context['priority_filter']:
-            queryset = queryset.filter(priority=context['priority_filter'])
-        
-        context['projects'] = queryset
         return context
  
 
-class ProjectDetailView(LoginRequiredMixin, DetailView):
+class ProjectDetailView(LoginRequiredMixin, ProjectObjectMixin, DetailView):
     model = Project
     template_name = 'core/project_detail.html'
     context_object_name = 'project'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        project = self.get_object()
-        
-        # Check if user has access to this project
-        if not self.request.user.role == 'admin' and self.request.user not in project.members.all():
-            messages.error(self.request, "You don't have access to this project.")
-            return redirect('project_list')
+        project = self.object
         
         # Get project tasks
-        tasks = project.tasks.all()
+        tasks = project.tasks.select_related('assigned_to')
         context['tasks'] = tasks
-        context['task_count'] = tasks.count()
-        context['completed_tasks'] = tasks.filter(status='completed').count()
+        context['task_count'] = project.task_count
+        context['completed_tasks'] = project.completed_task_count
         context['overdue_tasks'] = tasks.filter(
             due_date__lt=timezone.now(),
-            status__in=['todo', 'in_progress', 'review']
+            status__in=Task.OPEN_STATUSES
         ).count()
         
         # Get project members
-        context['members'] = project.projectmember_set.all()
+        context['members'] = project.projectmember_set.select_related('user')
         
         return context
 
@@ -131,7 +170,12 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
     model = Project
     form_class = ProjectForm
     template_name = 'core/project_form.html'
-    success_url = reverse_lazy('project_list')
+    success_url = reverse_lazy('core:project_list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
     
     def form_valid(self, form):
         form.instance.owner = self.request.user
@@ -140,95 +184,105 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
         return response
 
 
-class ProjectUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class ProjectUpdateView(LoginRequiredMixin, ProjectObjectMixin, UserPassesTestMixin, UpdateView):
     model = Project
     form_class = ProjectForm
     template_name = 'core/project_form.html'
-    
+
     def test_func(self):
         project = self.get_object()
         return (
-            self.request.user.role == 'admin' or
-            project.owner == self.request.user or
-            project.projectmember_set.filter(user=self.request.user, role__in=['owner', 'manager']).exists()
+            self.is_admin or
+            project.owner_id == self.request.user.pk or
+            self.is_project_manager(project)
         )
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
     
     def form_valid(self, form):
         response = super().form_valid(form)
         messages.success(self.request, 'Project updated successfully!')
         return response
+
+    def get_success_url(self):
+        return reverse('core:project_detail', kwargs={'pk': self.object.pk})
  
 
-class ProjectDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ProjectDeleteView(LoginRequiredMixin, ProjectObjectMixin, UserPassesTestMixin, DeleteView):
     model = Project
     template_name = 'core/project_confirm_delete.html'
-    success_url = reverse_lazy('project_list')
-    
+    success_url = reverse_lazy('core:project_list')
+
     def test_func(self):
         project = self.get_object()
         return (
-            self.request.user.role == 'admin' or
-            project.owner == self.request.user
+            self.is_admin or
+            project.owner_id == self.request.user.pk
         )
     
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Project deleted successfully!')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        messages.success(self.request, 'Project deleted successfully!')
+        return super().form_valid(form)
 
 
 
 # Task Views
-class TaskListView(LoginRequiredMixin, ListView):
+class TaskListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Task
     template_name = 'core/task_list.html'
     context_object_name = 'tasks'
     paginate_by = 15
     
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Task.objects.all()
-        return Task.objects.filter(
-            Q(project__members=user) | Q(assigned_to=user)
-        )
+        queryset = Task.objects.visible_to(self.request.user)
+
+        # Apply filters before pagination so pages and counts match them
+        status = self.request.GET.get('status', '')
+        priority = self.request.GET.get('priority', '')
+        project = self.request.GET.get('project', '')
+        if status:
+            queryset = queryset.filter(status=status)
+        if priority:
+            queryset = queryset.filter(priority=priority)
+        if project:
+            try:
+                queryset = queryset.filter(project_id=uuid.UUID(project))
+            except ValueError:
+                queryset = queryset.none()
+        tag = normalize_tags(self.request.GET.get('tag', ''))
+        if tag:
+            queryset = queryset.filter(Exists(TaskTag.objects.filter(task=OuterRef('pk'), tag__name=tag[0])))
+        return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['status_filter'] = self.request.GET.get('status', '')
         context['priority_filter'] = self.request.GET.get('priority', '')
         context['project_filter'] = self.request.GET.get('project', '')
-        
-        # Apply filters
-        queryset = context['tasks']
-        if context['status_filter']:
-            queryset = queryset.filter(status=context['status_filter'])
-        if context['priority_filter']:
-            queryset = queryset.filter(priority=context['priority_filter'])
-        if context['project_filter']:
-            queryset = queryset.filter(project_id=context['project_filter'])
-        
-        context['tasks'] = queryset
-        context['projects'] = Project.objects.filter(members=self.request.user)
+        context['tag_filter'] = self.request.GET.get('tag', '')
+        context['projects'] = Project.objects.visible_to(self.request.user)
         return context
  
 
-class TaskDetailView(LoginRequiredMixin, DetailView):
+class TaskDetailView(LoginRequiredMixin, ProjectObjectMixin, DetailView):
     model = Task
     template_name = 'core/task_detail.html'
     context_object_name = 'task'
+    project_field = 'project_id'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        task = self.get_object()
-        
-        # Check access
-        if not self.request.user.role == 'admin' and self.request.user not in task.project.members.all():
-            messages.error(self.request, "You don't have access to this task.")
-            return redirect('task_list')
+        task = self.object
         
-        # Get comments and attachments
-        context['comments'] = task.comments.all()
-        context['attachments'] = task.attachments.all()
+        # Only the newest comments; older ones are paged in from task_comments
+        page = task_comment_page(task)
+        context['comments'] = page.object_list
+        context['comments_next_cursor'] = page.next_cursor
+        context['comment_count'] = task.comments.count()
+        context['attachments'] = task.attachments.select_related('uploaded_by')
         context['comment_form'] = TaskCommentForm()
         context['attachment_form'] = TaskAttachmentForm()
         
@@ -252,21 +306,23 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
         return response
     
     def get_success_url(self):
-        return reverse('task_detail', kwargs={'pk': self.object.pk})
+        return reverse('core:task_detail', kwargs={'pk': self.object.pk})
 
 
-class TaskUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class TaskUpdateView(LoginRequiredMixin, ProjectObjectMixin, UserPassesTestMixin, UpdateView):
     model = Task
     form_class = TaskForm
     template_name = 'core/task_form.html'
-    
+    project_field = 'project_id'
+
     def test_func(self):
         task = self.get_object()
+        user_id = self.request.user.pk
         return (
-            self.request.user.role == 'admin' or
-            task.created_by == self.request.user or
-            task.assigned_to == self.request.user or
-            task.project.owner == self.request.user
+            self.is_admin or
+            task.created_by_id == user_id or
+            task.assigned_to_id == user_id or
+            task.project.owner_id == user_id
         )
     
     def get_form_kwargs(self):
@@ -280,35 +336,74 @@ class TaskUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return response
     
     def get_success_url(self):
-        return reverse('task_detail', kwargs={'pk': self.object.pk})
+        return reverse('core:task_detail', kwargs={'pk': self.object.pk})
 
 
-class TaskDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class TaskDeleteView(LoginRequiredMixin, ProjectObjectMixin, UserPassesTestMixin, DeleteView):
     model = Task
     template_name = 'core/task_confirm_delete.html'
-    
+    project_field = 'project_id'
+
     def test_func(self):
         task = self.get_object()
+        user_id = self.request.user.pk
         return (
-            self.request.user.role == 'admin' or
-            task.created_by == self.request.user or
-            task.project.owner == self.request.user
+            self.is_admin or
+            task.created_by_id == user_id or
+            task.project.owner_id == user_id
         )
     
     def get_success_url(self):
-        return reverse('project_detail', kwargs={'pk': self.object.project.pk})
+        return reverse('core:project_detail', kwargs={'pk': self.object.project_id})
     
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Task deleted successfully!')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        messages.success(self.request, 'Task deleted successfully!')
+        return super().form_valid(form)
 
 
 
 # comment & Attachment
+COMMENTS_PER_PAGE = 20
+
+
+def task_comment_page(task, cursor=None):
+    """
+    Newest-first page of a task's comments with their authors, returned in
+    reading (oldest-first) order.
+    """
+    page = paginate_by_cursor(task.comments.select_related('author'), cursor, COMMENTS_PER_PAGE)
+    page.object_list.reverse()
+    return page
+
+
 @login_required
-def add_comment(request, task_id):
+def task_comments(request, pk):
+    task = get_object_or_404(Task.objects.visible_to(request.user), pk=pk)
+    try:
+        page = task_comment_page(task, request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [{
+                'id': comment.pk,
+                'author': comment.author.username,
+                'author_name': comment.author.full_name,
+                'content': comment.content,
+                'created_at': comment.created_at.isoformat(),
+            } for comment in page],
+            'next_cursor': page.next_cursor,
+        })
+    response = HttpResponse(render_to_string('core/task_comment_list.html', {'comments': page}, request))
+    response['X-Next-Cursor'] = page.next_cursor or ''
+    return response
+
+
+@login_required
+def add_comment(request, pk):
     if request.method == 'POST':
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(Task.objects.visible_to(request.user), id=pk)
         form = TaskCommentForm(request.POST)
         if form.is_valid():
             comment = form.save(commit=False)
@@ -319,13 +414,13 @@ def add_comment(request, task_id):
         else:
             messages.error(request, 'Error adding comment.')
     
-    return redirect('task_detail', pk=task_id)
+    return redirect('core:task_detail', pk=pk)
 
 
 @login_required
-def add_attachment(request, task_id):
+def add_attachment(request, pk):
     if request.method == 'POST':
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(Task.objects.visible_to(request.user), id=pk)
         form = TaskAttachmentForm(request.POST, request.FILES)
         if form.is_valid():
             attachment = form.save(commit=False)
@@ -336,13 +431,13 @@ def add_attachment(request, task_id):
         else:
             messages.error(request, 'Error uploading attachment.')
     
-    return redirect('task_detail', pk=task_id)
+    return redirect('core:task_detail', pk=pk)
  
 
 @login_required
-def task_status_update(request, task_id):
+def task_status_update(request, pk):
     if request.method == 'POST':
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(Task.objects.visible_to(request.user), id=pk)
         new_status = request.POST.get('status')
         
         if new_status in dict(Task.STATUS_CHOICES):
@@ -353,18 +448,445 @@ def task_status_update(request, task_id):
     return JsonResponse({'success': False})
 
 
+BULK_STATUS_LIMIT = 500
+
+
 @login_required
-def project_progress_data(request, project_id):
-    project = get_object_or_404(Project, id=project_id)
-    
-    tasks_by_status = project.tasks.values('status').annotate(count=Count('id'))
-    
+@require_POST
+def task_status_bulk_update(request):
+    """
+    Change the status of many tasks at once, e.g. after a board drag.
+    Expects a JSON body ``{"changes": [{"id": "<task uuid>", "status": "completed"}, ...]}``.
+    """
+    try:
+        payload = json.loads(request.body)
+        changes = {str(uuid.UUID(str(item['id']))): item['status'] for item in payload['changes']}
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid payload.'}, status=400)
+
+    if len(changes) > BULK_STATUS_LIMIT:
+        return JsonResponse({'success': False, 'error': f'At most {BULK_STATUS_LIMIT} tasks per request.'}, status=400)
+    invalid = sorted({status for status in changes.values() if status not in dict(Task.STATUS_CHOICES)})
+    if invalid:
+        return JsonResponse({'success': False, 'error': f"Invalid status: {', '.join(invalid)}"}, status=400)
+
+    try:
+        updated = Task.objects.visible_to(request.user).set_statuses(changes)
+    except Task.DoesNotExist as exc:
+        return JsonResponse({'success': False, 'error': str(exc)}, status=403)
+    return JsonResponse({'success': True, 'updated': updated})
+
+
+def editable_task(request, pk):
+    """A task the user may plan: visible and in a project they contribute to."""
+    task = get_object_or_404(Task.objects.visible_to(request.user), id=pk)
+    if not is_admin(request.user) and get_project_role(request.user, task.project_id) not in CONTRIBUTOR_ROLES:
+        raise PermissionDenied
+    return task
+
+
+@login_required
+@require_POST
+def task_dependency_add(request, pk):
+    """Make the task wait for another task of its project; expects ``{"depends_on": "<task uuid>"}``."""
+    task = editable_task(request, pk)
+    try:
+        depends_on_id = uuid.UUID(str(json.loads(request.body)['depends_on']))
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'error': 'Invalid payload.'}, status=400)
+    depends_on = Task.objects.filter(project_id=task.project_id, pk=depends_on_id).first()
+    if depends_on is None:
+        return JsonResponse({'success': False, 'error': 'Task not found in this project.'}, status=400)
+    try:
+        add_dependency(task, depends_on)
+    except ValidationError as exc:
+        return JsonResponse({'success': False, 'error': exc.messages[0]}, status=400)
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_POST
+def task_dependency_remove(request, pk, depends_on):
+    task = editable_task(request, pk)
+    deleted, _ = task.dependencies.filter(depends_on_id=depends_on).delete()
+    return JsonResponse({'success': bool(deleted)})
+
+
+IMPORT_ERROR_LIMIT = 100
+
+
+@login_required
+@require_POST
+def task_import(request):
+    """
+    Bulk import an uploaded CSV/JSONL task file into projects the user can
+    add tasks to. Responds with the counts and the first rejected rows.
+    """
+    form = TaskImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+
+    project_ids = None
+    if request.user.role != 'admin':
+        project_ids = {pk for pk, role in get_project_roles(request.user).items() if role in CONTRIBUTOR_ROLES}
+    errors = []
+
+    def on_error(line_no, row, row_errors):
+        if len(errors) < IMPORT_ERROR_LIMIT:
+            errors.append({'line': line_no, 'errors': row_errors})
+
+    importer = TaskImporter(default_creator=request.user, project_ids=project_ids, on_error=on_error)
+    upload = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+    try:
+        result = importer.run(read_rows(upload, form.cleaned_data['format']))
+    except UnicodeDecodeError:
+        return JsonResponse({'success': False, 'errors': {'file': ['File is not UTF-8 encoded.']}}, status=400)
+    return JsonResponse({
+        'success': True,
+        'created': result.created,
+        'comments': result.comments,
+        'failed': result.failed,
+        'rows_per_second': round(result.rows_per_second),
+        'errors': errors,
+    })
+
+
+@login_required
+@conditional_json(project_tasks_version)
+def project_progress_data(request, pk):
+    """Progress and tasks per status, read from the project's task counters."""
+    project = get_object_or_404(Project.objects.visible_to(request.user), pk=pk)
+    tasks_by_status = [
+        {'status': status, 'count': getattr(project, field)}
+        for status, field in Project.TASK_COUNTER_FIELDS.items() if getattr(project, field)
+    ]
     return JsonResponse({
         'progress': project.progress,
-        'tasks_by_status': list(tasks_by_status)
+        'tasks_by_status': tasks_by_status,
+    })
+
+
+ACTIVITY_PER_PAGE = 30
+
+
+def activity_feed(request, activities):
+    """
+    JSON page of an activity queryset, newest first, paged by cursor on its
+    (scope, created_at) index. Users named by the page are fetched at once.
+    """
+    try:
+        page = paginate_by_cursor(activities, request.GET.get('cursor'), ACTIVITY_PER_PAGE)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+    user_ids = {activity.actor_id for activity in page} | {activity.data.get('user') for activity in page}
+    users = User.objects.in_bulk(user_id for user_id in user_ids if user_id)
+
+    def username(user_id):
+        user = users.get(user_id)
+        return user.username if user else None
+
+    return JsonResponse({
+        'activities': [{
+            'id': activity.pk,
+            'verb': activity.verb,
+            'description': activity.get_verb_display(),
+            'project': activity.project_id,
+            'task': activity.task_id,
+            'actor': username(activity.actor_id),
+            'user': username(activity.data.get('user')),
+            'data': activity.data,
+            'created_at': activity.created_at.isoformat(),
+        } for activity in page],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+def project_activity(request, pk):
+    if not is_admin(request.user) and str(pk) not in get_project_roles(request.user):
+        raise Http404('Project not found.')
+    return activity_feed(request, Activity.objects.filter(project_id=pk))
+
+
+@login_required
+def user_activity(request, pk):
+    """What the user did, in the projects the requesting user can see."""
+    activities = Activity.objects.filter(actor_id=pk)
+    if not is_admin(request.user):
+        activities = activities.filter(project_id__in=list(get_project_roles(request.user)))
+    return activity_feed(request, activities)
+
+
+@login_required
+def workload_report_data(request):
+    """
+    Task counts and estimated vs actual hours per assignee or project, over
+    the projects the user manages, optionally bucketed by due day, week or
+    month. Reads only the workload rollup.
+    """
+    group_by = request.GET.get('group', 'assignee')
+    bucket = request.GET.get('bucket') or None
+    if group_by not in REPORT_GROUPS or (bucket and bucket not in REPORT_BUCKETS):
+        return JsonResponse({'error': 'Invalid grouping.'}, status=400)
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+
+    project_ids = None
+    if not is_admin(request.user):
+        project_ids = [pk for pk, role in get_project_roles(request.user).items() if role in MANAGER_ROLES]
+    if request.GET.get('project'):
+        try:
+            project_id = str(uuid.UUID(request.GET['project']))
+        except ValueError:
+            raise Http404('Invalid project.')
+        if project_ids is not None and project_id not in project_ids:
+            raise Http404('Project not found.')
+        project_ids = [project_id]
+    rows = workload_report(project_ids, group_by, bucket, start, end)
+    return JsonResponse({'group': group_by, 'bucket': bucket, 'results': rows})
+
+
+def history_chart(request, pk, chart, **options):
+    """Run a status-history chart over the requested range of a project the user can see."""
+    if not is_admin(request.user) and str(pk) not in get_project_roles(request.user):
+        raise Http404('Project not found.')
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return JsonResponse({'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+    days = history_range(start, end)
+    if days is None:
+        return JsonResponse({'error': 'Invalid date range.'}, status=400)
+    start, end = days
+    return JsonResponse({
+        'start': start.isoformat(), 'end': end.isoformat(), **options,
+        'results': chart(pk, start, end, **options),
+    })
+
+
+@login_required
+@conditional_json(project_history_version)
+def project_burndown(request, pk):
+    """Open and completed tasks at the end of each day, from the daily status rollup."""
+    return history_chart(request, pk, burndown)
+
+
+@login_required
+@conditional_json(project_history_version)
+def project_cumulative_flow(request, pk):
+    """Tasks per status at the end of each day, from the daily status rollup."""
+    return history_chart(request, pk, cumulative_flow)
+
+
+@login_required
+@conditional_json(project_history_version)
+def project_cycle_time(request, pk):
+    """Completions and their average cycle time per day, week or month."""
+    bucket = request.GET.get('bucket', 'week')
+    if bucket not in CYCLE_TIME_BUCKETS:
+        return JsonResponse({'error': 'Invalid bucket.'}, status=400)
+    return history_chart(request, pk, cycle_times, bucket=bucket)
+
+
+@login_required
+def project_board_data(request, pk):
+    """
+    Kanban columns of a project with their first tasks and totals. With
+    ``status`` only that column is returned, after ``cursor`` ("load more").
+    """
+    if not is_admin(request.user) and str(pk) not in get_project_roles(request.user):
+        raise Http404('Project not found.')
+    try:
+        per_page = int(request.GET.get('per_page', BOARD_PER_COLUMN))
+    except ValueError:
+        per_page = 0
+    status = request.GET.get('status')
+    if not 0 < per_page <= BOARD_MAX_PER_COLUMN or (status and status not in dict(Task.STATUS_CHOICES)):
+        return JsonResponse({'error': 'Invalid column.'}, status=400)
+
+    project = get_object_or_404(Project, pk=pk)
+    if not status:
+        return JsonResponse({'columns': project_board(project, per_page)})
+    try:
+        column = board_column(project, status, request.GET.get('cursor'), per_page)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+    return JsonResponse({'columns': [column]})
+
+
+@login_required
+@conditional_json(project_graph_version)
+def project_dependency_graph(request, pk):
+    """Tasks in dependency order with their schedule, critical path and blockers, for a Gantt view."""
+    if not is_admin(request.user) and str(pk) not in get_project_roles(request.user):
+        raise Http404('Project not found.')
+    return JsonResponse(project_graph(pk))
+
+
+def event_stream_response(request, channels):
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would buffer the endless stream and tie up a worker; serve it with project_manager.asgi
+        return HttpResponse('Live events are only served by the ASGI application.', status=501)
+    last_id = request.headers.get('Last-Event-ID', '')
+    response = StreamingHttpResponse(
+        stream(channels, int(last_id) if last_id.isdigit() else None), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Let nginx pass events through as they come
+    return response
+
+
+@login_required
+async def project_events(request, pk):
+    """Live status, comment, attachment, member and progress events of one project (SSE, ASGI only)."""
+    user = await request.auser()
+    roles = await sync_to_async(get_project_roles)(user)
+    if not is_admin(user) and str(pk) not in roles:
+        raise Http404('Project not found.')
+    return event_stream_response(request, [project_channel(pk)])
+
+
+@login_required
+async def user_events(request):
+    """Live events of every project the user owns or is a member of (SSE, ASGI only)."""
+    roles = await sync_to_async(get_project_roles)(await request.auser())
+    return event_stream_response(request, [project_channel(pk) for pk in roles])
+
+
+@login_required
+def project_tag_cloud_data(request, pk):
+    project = get_object_or_404(Project.objects.visible_to(request.user), pk=pk)
+    return JsonResponse({'tags': project_tag_cloud(project)})
+
+
+@login_required
+def tag_autocomplete(request):
+    return JsonResponse({'results': autocomplete_tags(request.user, request.GET.get('q', ''))})
+
+
+@login_required
+def project_autocomplete(request):
+    contributing = request.GET.get('contributing') == '1'
+    return JsonResponse({'results': autocomplete_projects(request.user, request.GET.get('q', ''), contributing)})
+
+
+@login_required
+def user_autocomplete(request):
+    project_id = request.GET.get('project') or None
+    if project_id is not None:
+        try:
+            project_id = uuid.UUID(project_id)
+        except ValueError:
+            return JsonResponse({'results': []})
+    return JsonResponse({'results': autocomplete_users(request.user, request.GET.get('q', ''), project_id)})
+
+
+@login_required
+def search_view(request):
+    """
+    Ranked full-text search over the projects, tasks and comments the user
+    can see, as a results page or, with ?format=json, as JSON.
+    """
+    query = request.GET.get('q', '').strip()
+    kinds = [kind for kind in request.GET.getlist('kind') if kind in SEARCH_KINDS]
+    try:
+        page_number = int(request.GET.get('page', 1))
+    except ValueError:
+        page_number = 1
+    page = search(request.user, query, kinds, page_number)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'results': [{
+                'kind': entry.kind,
+                'id': entry.object_id,
+                'title': entry.task.title if entry.kind == 'comment' else entry.title,
+                'snippet': entry.body[:200],
+                'project': entry.project.title,
+                'url': entry_url(entry),
+            } for entry in page.results],
+            'page': page.number,
+            'has_next': page.has_next,
+        })
+    for entry in page.results:
+        entry.url = entry_url(entry)
+    return render(request, 'core/search.html', {
+        'query': query,
+        'kinds': kinds,
+        'kind_choices': SearchEntry.KIND_CHOICES,
+        'page': page,
     })
 
 
+@login_required
+def export_data(request, kind):
+    """
+    Stream the tasks, comments or memberships the user can see, in one
+    project or all of them, as CSV or JSONL without buffering the export.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if kind not in EXPORT_KINDS or export_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export.')
+    project_id = request.GET.get('project') or None
+    if project_id is not None:
+        try:
+            project_id = uuid.UUID(project_id)
+        except ValueError:
+            raise Http404('Invalid project.')
+        get_object_or_404(Project.objects.visible_to(request.user), pk=project_id)
+
+    content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(
+        iter_export(kind, export_format, request.user, project_id),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    filename = f"{kind}-{project_id or 'all'}-{timezone.now():%Y%m%d}.{export_format}"
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def protected_file_response(file, filename=None, as_attachment=False):
+    """
+    Response for a stored file whose access has already been checked. Behind
+    nginx the transfer is delegated with X-Accel-Redirect, so the app server
+    only spends one short request on it whatever the file size.
+    """
+    filename = filename or os.path.basename(file.name)
+    if not settings.MEDIA_ACCEL_REDIRECT:
+        return FileResponse(file.open('rb'), as_attachment=as_attachment, filename=filename)
+
+    response = HttpResponse(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(file.name)
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['Cache-Control'] = 'private, max-age=0'
+    return response
+
+
+@login_required
+def attachment_download(request, pk):
+    attachment = get_object_or_404(
+        TaskAttachment.objects.filter(task__in=Task.objects.visible_to(request.user).values('pk')),
+        pk=pk,
+    )
+    return protected_file_response(attachment.file, attachment.filename, as_attachment=True)
+
+
+@login_required
+def user_avatar(request, pk):
+    avatar_owner = get_object_or_404(User, pk=pk)
+    if not avatar_owner.avatar:
+        raise Http404('No avatar.')
+    if request.user.role != 'admin' and request.user.pk != avatar_owner.pk:
+        # Avatars are visible to people who share a project
+        if not get_project_roles(request.user).keys() & get_project_roles(avatar_owner).keys():
+            raise Http404('No avatar.')
+    return protected_file_response(avatar_owner.avatar)
+
+
 @login_required
 def user_list(request):
     if request.user.role != 'admin':
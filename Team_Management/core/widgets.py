@@ -0,0 +1,63 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+
+class AutocompleteMixin:
+    """
+    Model choice widget that renders only the selected options and fetches
+    the others from a JSON autocomplete endpoint as the user types (see the
+    script in base.html), like the admin's autocomplete widgets. Validation
+    is left to the field, which only looks up the submitted ids.
+
+    ``forward`` names another form field whose value is sent along with each
+    lookup, ``params`` are fixed query parameters for the endpoint.
+    """
+
+    def __init__(self, url_name, forward=None, params=None, attrs=None, choices=()):
+        self.url_name = url_name
+        self.forward = forward
+        self.params = params or {}
+        super().__init__(attrs, choices)
+
+    def get_url(self) -> str:
+        url = reverse(self.url_name)
+        return f'{url}?{urlencode(self.params)}' if self.params else url
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = self.get_url()
+        if self.forward:
+            attrs['data-autocomplete-forward'] = self.forward
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        groups = []
+        index = 0
+        if not self.is_required and not self.allow_multiple_selected:
+            groups.append((None, [self.create_option(name, '', field.empty_label or '', False, index)], index))
+            index += 1
+
+        selected = {str(v) for v in value if str(v) not in field.empty_values}
+        if not selected:
+            return groups
+        try:
+            objects = list(field.queryset.filter(**{f'{field.to_field_name or "pk"}__in': selected}))
+        except (ValidationError, ValueError):
+            # A malformed id was submitted; the field reports it, there is nothing to render
+            return groups
+        for obj in objects:
+            option = self.create_option(name, field.prepare_value(obj), field.label_from_instance(obj), True, index)
+            groups.append((None, [option], index))
+            index += 1
+        return groups
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
@@ -0,0 +1,155 @@
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .deferred import DeferredDeltas, add_to_row
+from .models import WORKLOAD_FIELDS, Project, Task, User, WorkloadRollup
+
+WORKLOAD_BATCH_SIZE = 500
+REPORT_GROUPS = ('assignee', 'project')
+# Report periods over the rollup's due_day
+REPORT_BUCKETS = {
+    'day': F('due_day'),
+    'week': TruncWeek('due_day'),
+    'month': TruncMonth('due_day'),
+}
+
+
+def workload_totals(workload: tuple):
+    """The project, (assignee, due day) bucket and totals one task adds to the rollup."""
+    values = dict(zip(WORKLOAD_FIELDS, workload))
+    is_open = values['status'] in Task.OPEN_STATUSES
+    estimated = values['estimated_hours'] or 0
+    bucket = (values['assigned_to_id'], timezone.localdate(values['due_date']))
+    return values['project_id'], bucket, {
+        'task_count': 1,
+        'open_task_count': int(is_open),
+        'estimated_hours': estimated,
+        'actual_hours': values['actual_hours'] or 0,
+        'open_estimated_hours': estimated if is_open else 0,
+    }
+
+
+def _apply_workload_deltas(project_id, deltas, using):
+    buckets = defaultdict(dict)
+    for (assignee_id, due_day, field), delta in deltas.items():
+        buckets[assignee_id, due_day][field] = delta
+    for (assignee_id, due_day), fields in buckets.items():
+        add_to_row(WorkloadRollup, {'project_id': project_id, 'assignee_id': assignee_id, 'due_day': due_day},
+                   fields, using)
+
+
+# Per-project rollup deltas keyed by (assignee, due day, total), written once per bucket per transaction
+workload_rollups = DeferredDeltas(_apply_workload_deltas)
+
+
+def record_task_workload(old, new, using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Move one task's totals between rollup buckets; ``old`` and ``new`` are
+    Task.workload_values() tuples, None when the task is created or deleted.
+    """
+    if old == new:
+        return
+    for workload, sign in ((old, -1), (new, 1)):
+        if workload is None:
+            continue
+        project_id, (assignee_id, due_day), totals = workload_totals(workload)
+        workload_rollups.add(project_id, {
+            (assignee_id, due_day, field): sign * value for field, value in totals.items()
+        }, using=using)
+
+
+def rebuild_workload(project_ids, using: str = None) -> int:
+    """
+    Recompute the rollup rows of the given projects with one GROUP BY over
+    their tasks. Returns the number of rows written.
+    """
+    project_ids = list(project_ids)
+    if not project_ids:
+        return 0
+    using = using or DEFAULT_DB_ALIAS
+    is_open = Q(status__in=Task.OPEN_STATUSES)
+    with transaction.atomic(using=using):
+        # The rebuild already sees every task write made so far; pending deltas would double count
+        workload_rollups.discard(project_ids, using=using)
+        WorkloadRollup.objects.using(using).filter(project_id__in=project_ids).delete()
+        rows = (
+            Task.objects.using(using).filter(project_id__in=project_ids)
+            .order_by()
+            .values('project_id', 'assigned_to_id', due_day=TruncDate('due_date'))
+            .annotate(
+                tasks=Count('pk'),
+                open_tasks=Count('pk', filter=is_open),
+                estimated=Coalesce(Sum('estimated_hours'), 0),
+                actual=Coalesce(Sum('actual_hours'), 0),
+                open_estimated=Coalesce(Sum('estimated_hours', filter=is_open), 0),
+            )
+        )
+        rollups = WorkloadRollup.objects.using(using).bulk_create([
+            WorkloadRollup(
+                project_id=row['project_id'], assignee_id=row['assigned_to_id'], due_day=row['due_day'],
+                task_count=row['tasks'], open_task_count=row['open_tasks'], estimated_hours=row['estimated'],
+                actual_hours=row['actual'], open_estimated_hours=row['open_estimated'],
+            ) for row in rows
+        ], batch_size=1000)
+    return len(rollups)
+
+
+def rebuild_all_workload(batch_size: int = WORKLOAD_BATCH_SIZE, on_batch=None) -> int:
+    """Rebuild every project's rollup, ``batch_size`` projects per GROUP BY. Returns the project count."""
+    last_pk = None
+    total = 0
+    while True:
+        batch = Project.objects.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        project_ids = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not project_ids:
+            return total
+        rebuild_workload(project_ids)
+        total += len(project_ids)
+        last_pk = project_ids[-1]
+        if on_batch:
+            on_batch(total)
+
+
+def workload_report(project_ids=None, group_by: str = 'assignee', bucket: str = None, start=None, end=None) -> list:
+    """
+    Totals per assignee or project, optionally per day, week or month of
+    due date, read from WorkloadRollup alone. ``project_ids`` None means
+    every project. Open tasks of buckets before today count as overdue.
+    """
+    group_field = 'assignee_id' if group_by == 'assignee' else 'project_id'
+    rollups = WorkloadRollup.objects.order_by()
+    if project_ids is not None:
+        rollups = rollups.filter(project_id__in=project_ids)
+    if start:
+        rollups = rollups.filter(due_day__gte=start)
+    if end:
+        rollups = rollups.filter(due_day__lte=end)
+    group = [group_field]
+    if bucket:
+        rollups = rollups.annotate(period=REPORT_BUCKETS[bucket])
+        group.append('period')
+    rows = list(rollups.values(*group).annotate(
+        tasks=Sum('task_count'),
+        open_tasks=Sum('open_task_count'),
+        overdue_tasks=Coalesce(Sum('open_task_count', filter=Q(due_day__lt=timezone.localdate())), 0),
+        estimated=Sum('estimated_hours'),
+        actual=Sum('actual_hours'),
+        open_estimated=Sum('open_estimated_hours'),
+    ).order_by(*group))
+
+    ids = {row[group_field] for row in rows} - {None}
+    if group_by == 'assignee':
+        names = dict(User.objects.filter(pk__in=ids).values_list('pk', 'username'))
+    else:
+        names = dict(Project.objects.filter(pk__in=ids).values_list('pk', 'title'))
+    for row in rows:
+        row['name'] = names.get(row[group_field])
+        # Actual hours per estimated hour; above 1 means work took longer than estimated
+        row['estimate_accuracy'] = round(row['actual'] / row['estimated'], 2) if row['estimated'] else None
+    return rows
@@ -16,14 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
+# Media is not served publicly; attachments and avatars go through the
+# permission-checked download views in core.
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('core.urls')),
 ]
-
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)